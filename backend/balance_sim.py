@@ -0,0 +1,228 @@
+"""Vectorized Monte Carlo simulator for dungeon balance tuning.
+
+Runs GameLogic.simulate_dungeon_combat's rules for many (level, dungeon)
+cells at once with NumPy and reports win rate, XP/hour and drop rarity
+distributions per cell.
+
+Usage:
+    python balance_sim.py --levels 1-60:5 --dungeons E,D,C,B,A,S --trials 1000000
+    python balance_sim.py --format csv --output report.csv
+    python balance_sim.py --check   # statistical agreement with the scalar function
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import sys
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+# The game modules read these at import time; the simulator never connects
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "balance_sim")
+
+from models import *
+from game_logic import (
+    game_logic, DUNGEON_DIFFICULTY, POWER_ROLL_RANGE, SUCCESS_THRESHOLD,
+    CLEAR_TIME_RANGE, EQUIPMENT_DROP_CHANCE, DROP_RARITY_CHANCES
+)
+import power
+
+RARITIES = list(DROP_RARITY_CHANCES.keys())
+RARITY_PROBABILITIES = np.array(list(DROP_RARITY_CHANCES.values()), dtype=float)
+RARITY_PROBABILITIES /= RARITY_PROBABILITIES.sum()
+
+def combat_power_from_stats(stats: np.ndarray, attack: np.ndarray, defense: np.ndarray) -> np.ndarray:
+    """Vectorized power.combat_power for an (n, 5) array of base stats plus gear attack/defense"""
+    stats = np.asarray(stats, dtype=float)
+    stat_weights = np.array([power.COMBAT_POWER_WEIGHTS[field] for field in power.STAT_FIELDS])
+    total = (
+        stats @ stat_weights
+        + np.asarray(attack, dtype=float) * power.COMBAT_POWER_WEIGHTS["attack"]
+        + np.asarray(defense, dtype=float) * power.COMBAT_POWER_WEIGHTS["defense"]
+    )
+    return np.trunc(total).astype(np.int64)
+
+def stats_for_levels(levels: Sequence[int]) -> np.ndarray:
+    """Base stats per level assuming every earned stat point is spread evenly"""
+    rows = []
+    for level in levels:
+        points = sum(game_logic.get_stat_bonus_for_level(lvl) for lvl in range(2, level + 1))
+        share, extra = divmod(points, len(power.STAT_FIELDS))
+        rows.append([
+            power.BASE_STAT_VALUE + share + (1 if i < extra else 0)
+            for i in range(len(power.STAT_FIELDS))
+        ])
+    return np.array(rows, dtype=np.int64)
+
+def simulate_batch(combat_powers: Sequence[int], dungeons: Sequence[HunterRank], trials: int,
+                   rng: Optional[np.random.Generator] = None, failure_time: int = CLEAR_TIME_RANGE[0],
+                   max_chunk_cells: int = 4_000_000) -> Dict[str, np.ndarray]:
+    """Simulate `trials` fights for every (player, dungeon) cell.
+
+    Returns arrays shaped (players, dungeons) - and (players, dungeons, rarities)
+    for drops - holding win counts, total XP, total time and drop counts.
+    Failed runs have no clear time, so they are charged `failure_time` seconds.
+    """
+    rng = rng or np.random.default_rng()
+    powers = np.asarray(combat_powers, dtype=float)[:, None]
+    n_players, n_dungeons = len(powers), len(dungeons)
+    chunk = max(1, max_chunk_cells // max(n_players, 1))
+
+    wins = np.zeros((n_players, n_dungeons), dtype=np.int64)
+    total_time = np.zeros((n_players, n_dungeons), dtype=np.int64)
+    drops = np.zeros((n_players, n_dungeons, len(RARITIES)), dtype=np.int64)
+
+    for d, rank in enumerate(dungeons):
+        required = DUNGEON_DIFFICULTY[rank]
+        base_rate = np.minimum(powers / required, 1.0)
+        remaining = trials
+        while remaining > 0:
+            size = min(chunk, remaining)
+            remaining -= size
+            shape = (n_players, size)
+
+            success = base_rate * rng.uniform(*POWER_ROLL_RANGE, size=shape) >= SUCCESS_THRESHOLD
+            clear_time = rng.integers(CLEAR_TIME_RANGE[0], CLEAR_TIME_RANGE[1] + 1, size=shape)
+            dropped = success & (rng.random(shape) < EQUIPMENT_DROP_CHANCE)
+            rarity = rng.choice(len(RARITIES), size=shape, p=RARITY_PROBABILITIES)
+
+            wins[:, d] += success.sum(axis=1)
+            total_time[:, d] += np.where(success, clear_time, failure_time).sum(axis=1)
+            for r in range(len(RARITIES)):
+                drops[:, d, r] += (dropped & (rarity == r)).sum(axis=1)
+
+    success_exp = np.array([DUNGEON_DIFFICULTY[rank] // 10 for rank in dungeons])
+    failure_exp = np.array([DUNGEON_DIFFICULTY[rank] // 50 for rank in dungeons])
+    total_exp = wins * success_exp + (trials - wins) * failure_exp
+
+    return {"wins": wins, "total_exp": total_exp, "total_time": total_time, "drops": drops}
+
+def build_report(levels: Sequence[int], combat_powers: Sequence[int], dungeons: Sequence[HunterRank],
+                 trials: int, results: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    rows = []
+    for p, level in enumerate(levels):
+        for d, rank in enumerate(dungeons):
+            wins = int(results["wins"][p, d])
+            drops = results["drops"][p, d]
+            total_drops = int(drops.sum())
+            hours = results["total_time"][p, d] / 3600
+            rows.append({
+                "level": int(level),
+                "combat_power": int(combat_powers[p]),
+                "dungeon": rank.value,
+                "trials": trials,
+                "win_rate": wins / trials,
+                "mean_exp": float(results["total_exp"][p, d]) / trials,
+                "xp_per_hour": float(results["total_exp"][p, d]) / hours if hours else 0.0,
+                "drop_rate": total_drops / trials,
+                "drop_rarity": {
+                    rarity.value: (int(count) / total_drops if total_drops else 0.0)
+                    for rarity, count in zip(RARITIES, drops)
+                }
+            })
+    return rows
+
+def report_to_csv(rows: List[Dict[str, Any]]) -> str:
+    output = io.StringIO()
+    fieldnames = [key for key in rows[0] if key != "drop_rarity"] + [f"drop_{r.value.lower()}" for r in RARITIES]
+    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer.writeheader()
+    for row in rows:
+        flat = {key: value for key, value in row.items() if key != "drop_rarity"}
+        flat.update({f"drop_{rarity.lower()}": share for rarity, share in row["drop_rarity"].items()})
+        writer.writerow(flat)
+    return output.getvalue()
+
+def _z_score(successes_a: int, successes_b: int, n_a: int, n_b: int) -> float:
+    """Two-proportion z statistic"""
+    pooled = (successes_a + successes_b) / (n_a + n_b)
+    variance = pooled * (1 - pooled) * (1 / n_a + 1 / n_b)
+    if variance == 0:
+        return 0.0 if successes_a / n_a == successes_b / n_b else math.inf
+    return (successes_a / n_a - successes_b / n_b) / math.sqrt(variance)
+
+def compare_with_scalar(level: int, combat_power: int, rank: HunterRank, trials: int = 20000,
+                        rng: Optional[np.random.Generator] = None) -> Dict[str, float]:
+    """Run the scalar GameLogic function and the batch simulator side by side"""
+    player = Player(name="Simulated Hunter", level=level, combat_power=combat_power)
+    dungeon = Dungeon(name="Simulated Dungeon", difficulty=rank, recommended_level=level,
+                      monsters=[], rewards=[], description="")
+
+    scalar_wins = 0
+    scalar_drops = 0
+    for _ in range(trials):
+        result = game_logic.simulate_dungeon_combat(player, dungeon)
+        scalar_wins += result["success"]
+        scalar_drops += result["equipment_drop"] is not None
+
+    results = simulate_batch([combat_power], [rank], trials, rng=rng)
+    batch_wins = int(results["wins"][0, 0])
+    batch_drops = int(results["drops"][0, 0].sum())
+
+    return {
+        "scalar_win_rate": scalar_wins / trials,
+        "batch_win_rate": batch_wins / trials,
+        "win_rate_z": _z_score(scalar_wins, batch_wins, trials, trials),
+        "scalar_drop_rate": scalar_drops / trials,
+        "batch_drop_rate": batch_drops / trials,
+        "drop_rate_z": _z_score(scalar_drops, batch_drops, trials, trials)
+    }
+
+def _parse_levels(spec: str) -> List[int]:
+    """"1-60:5" -> 1, 6, 11, ... ; "1,10,20" -> 1, 10, 20"""
+    if "-" in spec:
+        bounds, _, step = spec.partition(":")
+        start, end = (int(part) for part in bounds.split("-"))
+        return list(range(start, end + 1, int(step or 1)))
+    return [int(part) for part in spec.split(",")]
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1-60:5", help="level range start-end[:step] or a comma list")
+    parser.add_argument("--dungeons", default=",".join(rank.value for rank in HunterRank))
+    parser.add_argument("--trials", type=int, default=100000, help="fights per (level, dungeon) cell")
+    parser.add_argument("--gear-attack", type=int, default=20, help="equipped attack assumed at every level")
+    parser.add_argument("--gear-defense", type=int, default=15, help="equipped defense assumed at every level")
+    parser.add_argument("--failure-time", type=int, default=CLEAR_TIME_RANGE[0], help="seconds charged per failed run")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--check", action="store_true", help="compare against the scalar function and exit")
+    args = parser.parse_args(argv[1:])
+
+    rng = np.random.default_rng(args.seed)
+    levels = _parse_levels(args.levels)
+    dungeons = [HunterRank(rank.strip()) for rank in args.dungeons.split(",")]
+    stats = stats_for_levels(levels)
+    combat_powers = combat_power_from_stats(
+        stats, np.full(len(levels), args.gear_attack), np.full(len(levels), args.gear_defense)
+    )
+
+    if args.check:
+        worst = 0.0
+        for level, combat_power in zip(levels, combat_powers):
+            for rank in dungeons:
+                comparison = compare_with_scalar(level, int(combat_power), rank, rng=rng)
+                worst = max(worst, abs(comparison["win_rate_z"]), abs(comparison["drop_rate_z"]))
+                print(f"level {level:>3} {rank.value}: {json.dumps(comparison)}")
+        # |z| > 4 is far outside sampling noise for the number of cells checked
+        print(f"worst |z| = {worst:.2f}")
+        return 0 if worst < 4 else 1
+
+    results = simulate_batch(combat_powers, dungeons, args.trials, rng=rng, failure_time=args.failure_time)
+    rows = build_report(levels, combat_powers, dungeons, args.trials, results)
+    report = json.dumps(rows, indent=2) if args.format == "json" else report_to_csv(rows)
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(report)
+    else:
+        print(report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
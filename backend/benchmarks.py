@@ -0,0 +1,152 @@
+"""In-process micro-benchmarks for the hot paths that do not need MongoDB.
+
+Usage: python benchmarks.py <benchmark_name> [--size N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# The game modules read these at import time; benchmarks never connect
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmarks")
+
+def _timed(label: str, operations: int, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    per_op_us = elapsed / operations * 1e6 if operations else 0.0
+    print(f"{label:<40} {elapsed * 1000:>10.1f} ms  {per_op_us:>10.2f} us/op")
+    return result
+
+def bench_leaderboard(size: int):
+    from leaderboard import RankIndex
+
+    players = [(f"player-{i}", random.randint(0, 5_000_000)) for i in range(size)]
+    index = _timed(f"build RankIndex ({size:,} players)", size, lambda: RankIndex.from_items(players))
+
+    samples = [random.choice(players)[0] for _ in range(100_000)]
+    _timed("position lookup", len(samples), lambda: [index.position(pid) for pid in samples])
+    _timed("power update (remove + insert)", len(samples),
+           lambda: [index.upsert(pid, random.randint(0, 5_000_000)) for pid in samples])
+    _timed("top-50 page at random offset", 10_000,
+           lambda: [index.slice(random.randrange(size), 50) for _ in range(10_000)])
+    _timed("neighbourhood (+/- 5)", 10_000,
+           lambda: [index.slice(max(0, index.position(pid) - 5), 11) for pid in samples[:10_000]])
+
+def _legacy_level_from_exp(total_exp: int) -> int:
+    """The level-by-level loop GameLogic used before the curve engine"""
+    def requirement(level):
+        if level <= 5:
+            return {1: 1000, 2: 2000, 3: 3500, 4: 5500, 5: 8000}.get(level, 1000)
+        return int(1000 * (1.5 ** (level - 1)))
+    level = 1
+    while total_exp >= requirement(level):
+        total_exp -= requirement(level)
+        level += 1
+    return level
+
+def bench_level_curve(size: int):
+    import numpy as np
+    from level_curve import get_curve
+
+    curve = get_curve()
+    exps = [int(random.paretovariate(0.6) * 1000) % curve.thresholds[40] for _ in range(size)]
+    legacy = _timed(f"legacy loop ({size:,} players)", size, lambda: [_legacy_level_from_exp(e) for e in exps])
+    bisected = _timed("bisect lookup", size, lambda: [curve.level_for_exp(e) for e in exps])
+    exp_array = np.array(exps, dtype=np.int64)
+    vectorized = _timed("levels_for_exp (numpy)", size, lambda: curve.levels_for_exp(exp_array))
+    assert legacy == bisected == vectorized.tolist(), "curve engine disagrees with the legacy loop"
+
+def _wire_sizes(label: str, body: bytes):
+    from serialization import brotli, compress
+
+    sizes = [f"raw {len(body):>9,}", f"gzip {len(compress(body, 'gzip')):>9,}"]
+    if brotli is not None:
+        sizes.append(f"br {len(compress(body, 'br')):>9,}")
+    print(f"{label:<40} " + "  ".join(sizes) + " bytes")
+
+def bench_serialization(size: int):
+    """Before: response_model validation + jsonable_encoder + json.dumps. After: serialization fast paths"""
+    os.environ["FAST_JSON_ENABLED"] = "true"
+    import json
+    from typing import List
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from models import Shadow, ItemRarity, StoryChapter
+    from serialization import dumps, orjson
+    import pydantic_core
+    from story_content import get_story_chapters, get_story_index
+
+    def fastapi_json(content) -> bytes:
+        return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    responses = max(1, size // 1000)
+    page = [
+        Shadow(name=f"Shadow {i}", type="Knight", rarity=random.choice(list(ItemRarity)), player_id="player-1",
+               skills=["Shadow Form", "Loyalty"])
+        for i in range(100)
+    ]
+    page_adapter = TypeAdapter(List[Shadow])
+    before = _timed(f"shadows page x{responses}: response_model", responses * len(page),
+                    lambda: [json.dumps(page_adapter.dump_python(page_adapter.validate_python(page), mode="json"),
+                                        ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                             for _ in range(responses)][-1])
+    after = _timed(f"shadows page x{responses}: model_response", responses * len(page),
+                   lambda: [pydantic_core.to_json(page) for _ in range(responses)][-1])
+    assert json.loads(before) == json.loads(after), "model_response changed the shadows payload"
+
+    chapters = [StoryChapter(**chapter, player_id="player-1").model_dump() for chapter in get_story_chapters()]
+    story = {"chapters": chapters, "progress": {"completed": 1, "total": len(chapters), "percentage": 10}}
+    before = _timed(f"story progress x{responses}: jsonable_encoder", responses,
+                    lambda: [fastapi_json(story) for _ in range(responses)][-1])
+    after = _timed(f"story progress x{responses}: dumps ({'orjson' if orjson else 'json'})", responses,
+                   lambda: [dumps(story) for _ in range(responses)][-1])
+    assert json.loads(before) == json.loads(after), "dumps changed the story payload"
+
+    _wire_sizes("shadows page (100)", pydantic_core.to_json(page))
+    _wire_sizes("story progress with content", dumps(story))
+    chapter = next(iter(get_story_index().values()))
+    _wire_sizes(f"/story/chapters/{chapter.chapter_number}", chapter.render_payload())
+
+def bench_trusted_reads(size: int):
+    """Validation vs documents.construct per stored model, to pick TRUSTED_READ_MODELS"""
+    from models import Player, Equipment, Shadow, Quest, QuestType, ItemRarity, StoryChapter
+    from documents import construct
+    from story_content import get_story_chapters
+
+    chapter = get_story_chapters()[0]
+    samples = {
+        Player: Player(name="Sung Jin-Woo").model_dump(),
+        Equipment: Equipment(name="Kasaka's Fang", type="weapon", category="dagger", rarity=ItemRarity.RARE,
+                             player_id="player-1").model_dump(),
+        Shadow: Shadow(name="Igris", type="Knight", rarity=ItemRarity.LEGENDARY, player_id="player-1",
+                       skills=["Sword Mastery", "Loyalty"]).model_dump(),
+        Quest: Quest(title="Daily", description="Train", type=QuestType.DAILY, reward="XP", player_id="player-1").model_dump(),
+        StoryChapter: StoryChapter(**chapter, id="player-1-chapter-1", player_id="player-1").model_dump(),
+    }
+    documents = max(1, size // 10)
+    for model, doc in samples.items():
+        validated = _timed(f"{model.__name__}: validate", documents, lambda: [model(**doc) for _ in range(documents)])
+        constructed = _timed(f"{model.__name__}: construct", documents,
+                             lambda: [construct(model, doc) for _ in range(documents)])
+        assert validated[-1].model_dump() == constructed[-1].model_dump(), f"construct changed {model.__name__}"
+
+BENCHMARKS = {
+    "leaderboard": bench_leaderboard,
+    "level_curve": bench_level_curve,
+    "serialization": bench_serialization,
+    "trusted_reads": bench_trusted_reads,
+}
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args(argv[1:])
+    BENCHMARKS[args.benchmark](args.size)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,94 @@
+# In-process read-through caches with LRU eviction and a TTL
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+import os
+import time
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after ttl_seconds.
+
+    Meant for the asyncio event loop thread; it is not thread-safe.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl_seconds: float = 30.0, enabled: bool = True):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled and maxsize > 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Bumped by every invalidation; a read that started before one must not fill the cache
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls, prefix: str, maxsize: int = 10000, ttl_seconds: float = 30.0) -> "TTLCache":
+        """Read <prefix>_ENABLED, <prefix>_SIZE and <prefix>_TTL_SECONDS"""
+        enabled = os.environ.get(f"{prefix}_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+        return cls(
+            maxsize=int(os.environ.get(f"{prefix}_SIZE", maxsize)),
+            ttl_seconds=float(os.environ.get(f"{prefix}_TTL_SECONDS", ttl_seconds)),
+            enabled=enabled
+        )
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None):
+        """Store value; skipped if version is given and an invalidation happened since"""
+        if not self.enabled or (version is not None and version != self._version):
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self._version += 1
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def invalidate_many(self, keys: Iterable[Hashable]):
+        for key in keys:
+            self.invalidate(key)
+
+    def clear(self):
+        self._version += 1
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
@@ -1,57 +1,296 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Optional, Dict, Any
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from typing import List, Optional, Dict, Any, AsyncIterator, Iterable, Mapping, Tuple
 from models import *
+from mongo_client import get_database
+from cache import TTLCache
+from documents import from_document
+from dungeon_catalog import DungeonCatalog
+from events import event_bus
+from level_curve import get_curve
+from story_content import CompiledChapter, get_story_index
+import power
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
-# Database connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Database connection, shared with server.py through the client factory
+db = get_database()
+
+# Players written before combat power was stored on the player document
+MISSING_COMBAT_POWER = {"$or": [{"combat_power": {"$exists": False}}, {"effective_stats": {"$exists": False}}]}
+
+# Player-owned collections served with keyset pagination and streaming
+PLAYER_COLLECTIONS = {
+    "equipment": Equipment,
+    "shadows": Shadow,
+    "quests": Quest,
+    "dungeon_attempts": DungeonAttempt
+}
+MAX_PAGE_SIZE = 1000
+
+# Collections read through documents.from_document, for stamp_schema_versions
+VERSIONED_COLLECTIONS = {
+    "players": Player,
+    **PLAYER_COLLECTIONS,
+    "daily_quests": DailyQuestStatus,
+    "penalty_zones": PenaltyZoneSession,
+    "dungeons": Dungeon
+}
 
 class DatabaseManager:
-    def __init__(self):
-        self.players = db.players
-        self.equipment = db.equipment
-        self.consumables = db.consumables
-        self.shadows = db.shadows
-        self.skills = db.skills
-        self.quests = db.quests
-        self.dungeons = db.dungeons
-        self.dungeon_attempts = db.dungeon_attempts
-        self.story_chapters = db.story_chapters
-        self.guild_members = db.guild_members
-        self.rankings = db.rankings
+    def __init__(self, mongo_db):
+        self.db = mongo_db
+        self.players = mongo_db.players
+        self.equipment = mongo_db.equipment
+        self.consumables = mongo_db.consumables
+        self.shadows = mongo_db.shadows
+        self.skills = mongo_db.skills
+        self.quests = mongo_db.quests
+        self.dungeons = mongo_db.dungeons
+        self.dungeon_attempts = mongo_db.dungeon_attempts
+        self.story_chapters = mongo_db.story_chapters
+        self.guild_members = mongo_db.guild_members
+        self.rankings = mongo_db.rankings
+        self.daily_quests = mongo_db.daily_quests
+        self.penalty_zones = mongo_db.penalty_zones
+        # Per-process player cache; every player write below invalidates its entry.
+        # With several workers, PLAYER_CACHE_TTL_SECONDS bounds how stale a read can be.
+        self.player_cache = TTLCache.from_env("PLAYER_CACHE", maxsize=10000, ttl_seconds=30)
+        self.dungeon_catalog = DungeonCatalog(self.dungeons)
 
     # Player operations
     async def create_player(self, player_data: PlayerCreate) -> Player:
-        player = Player(name=player_data.name)
-        await self.players.insert_one(player.dict())
-        
-        # Initialize default equipment and skills
-        await self.initialize_player_data(player.id)
-        
-        return player
+        result = await self.onboard_players([player_data])
+        if not result.players:
+            raise DuplicateKeyError(result.errors[0]["error"])
+        return result.players[0]
+
+    async def onboard_players(self, players_data: List[PlayerCreate], use_transaction: bool = False) -> OnboardingResult:
+        """Create players and all of their starter documents with one bulk write per collection.
+
+        Without a transaction, players whose insert hits a duplicate key are
+        reported as failed and get no starter documents; the others are
+        created. With one, any failure rolls the whole batch back.
+        """
+        players = [Player(name=player_data.name) for player_data in players_data]
+        if not players:
+            return OnboardingResult(players=[], inserted=0, failed=0)
+
+        starter_documents = {}
+        for player in players:
+            starter_documents[player.id] = self.build_starter_documents(player.id)
+            self._apply_gear(player, [item for item in starter_documents[player.id]["equipment"] if item["equipped"]])
+
+        if use_transaction:
+            async with await self.db.client.start_session() as session:
+                async with session.start_transaction():
+                    await self.players.insert_many([player.dict() for player in players], session=session)
+                    await self._insert_starter_documents(starter_documents.values(), session=session)
+            return OnboardingResult(players=players, inserted=len(players), failed=0)
+
+        errors = {}
+        try:
+            await self.players.insert_many([player.dict() for player in players], ordered=False)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in write_errors):
+                raise
+            errors = {error["index"]: error.get("errmsg", "duplicate key") for error in write_errors}
+        created = [player for index, player in enumerate(players) if index not in errors]
+        await self._insert_starter_documents(starter_documents[player.id] for player in created)
+        return OnboardingResult(
+            players=created,
+            inserted=len(created),
+            failed=len(errors),
+            errors=[{"name": players[index].name, "error": error} for index, error in sorted(errors.items())]
+        )
+
+    @staticmethod
+    def _apply_gear(player: Player, equipped_items: List[Any]):
+        """Set the denormalized gear bonus, effective stats and combat power on an in-memory player"""
+        gear = power.sum_bonuses(equipped_items)
+        effective = power.effective_stats(player.stats.dict(), gear)
+        player.gear_bonus = GearBonus(**gear)
+        player.effective_stats = EffectiveStats(**effective)
+        player.combat_power = power.combat_power(effective)
+
+    async def _insert_starter_documents(self, starter_documents: Iterable[Dict[str, List[Dict[str, Any]]]], session=None):
+        documents: Dict[str, List[Dict[str, Any]]] = {}
+        for player_documents in starter_documents:
+            for collection_name, docs in player_documents.items():
+                documents.setdefault(collection_name, []).extend(docs)
+        for collection_name, docs in documents.items():
+            if docs:
+                await getattr(self, collection_name).insert_many(docs, ordered=False, session=session)
 
     async def get_player(self, player_id: str) -> Optional[Player]:
+        cached = self.player_cache.get(player_id)
+        if cached is not None:
+            return cached.copy(deep=True)
+        version = self.player_cache.version
         player_doc = await self.players.find_one({"id": player_id})
-        return Player(**player_doc) if player_doc else None
+        if not player_doc:
+            return None
+        player = from_document(Player, player_doc)
+        self.player_cache.set(player_id, player, version)
+        return player.copy(deep=True)
+
+    async def get_players(self, player_ids: List[str]) -> Dict[str, Player]:
+        """Batched get_player: cached players plus one $in query for the rest"""
+        players = {}
+        missing = []
+        for player_id in dict.fromkeys(player_ids):
+            cached = self.player_cache.get(player_id)
+            if cached is not None:
+                players[player_id] = cached.copy(deep=True)
+            else:
+                missing.append(player_id)
+        if missing:
+            version = self.player_cache.version
+            async for player_doc in self.players.find({"id": {"$in": missing}}):
+                player = from_document(Player, player_doc)
+                self.player_cache.set(player.id, player, version)
+                players[player.id] = player.copy(deep=True)
+        return players
 
     async def update_player(self, player_id: str, updates: PlayerUpdate) -> Optional[Player]:
         update_data = {k: v for k, v in updates.dict().items() if v is not None}
         update_data["updated_at"] = datetime.utcnow()
         
-        result = await self.players.update_one(
-            {"id": player_id},
-            {"$set": update_data}
-        )
+        if "stats" in update_data:
+            # Stats feed effective_stats/combat_power, so rewrite them in the same update
+            update = [{"$set": {k: {"$literal": v} for k, v in update_data.items()}}] + power.power_update_stages()
+        else:
+            update = {"$set": update_data}
+        
+        result = await self.players.update_one({"id": player_id}, update)
+        self.player_cache.invalidate(player_id)
         
         if result.modified_count > 0:
             return await self.get_player(player_id)
         return None
 
-    async def initialize_player_data(self, player_id: str):
-        # Create default equipment
+    async def spend_mp(self, player_id: str, cost: int) -> Optional[int]:
+        """Take cost MP (a negative cost refunds) if the player has it; the MP left, or None"""
+        doc = await self.players.find_one_and_update(
+            {"id": player_id, "mp": {"$gte": cost}},
+            {"$inc": {"mp": -cost}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"_id": 0, "mp": 1}
+        )
+        self.player_cache.invalidate(player_id)
+        return doc["mp"] - cost if doc else None
+
+    async def apply_rewards(self, player_id: str, exp: int = 0, stat_deltas: Optional[Dict[str, int]] = None,
+                            min_experience: Optional[int] = None, session=None,
+                            publish: bool = True) -> Optional[RewardResult]:
+        """Apply XP (negative to spend) and stat deltas in one atomic write.
+
+        Level, rank, experience_to_next and combat power are derived inside
+        the same update. Returns None when the player does not exist or has
+        less than min_experience XP. Without publish the caller sends the
+        events itself.
+        """
+        curve = get_curve()
+        now = datetime.utcnow()
+        rewards = {
+            "last_reward": {
+                "exp": {"$literal": exp},
+                "stats": {"$literal": stat_deltas or {}},
+                "at": {"$literal": now},
+                "previous_level": "$level",
+                "previous_rank": "$rank"
+            },
+            "experience": {"$add": [{"$ifNull": ["$experience", 0]}, exp]},
+            "updated_at": now
+        }
+        for field, value in (stat_deltas or {}).items():
+            rewards[f"stats.{field}"] = {"$add": [{"$ifNull": [f"$stats.{field}", power.BASE_STAT_VALUE]}, value]}
+        update = [{"$set": rewards}] + curve.progression_stages()
+        if stat_deltas:
+            update += power.power_update_stages()
+
+        query = {"id": player_id}
+        if min_experience is not None:
+            query["experience"] = {"$gte": min_experience}
+        doc = await self.players.find_one_and_update(
+            query, update, projection={"_id": 0}, return_document=ReturnDocument.AFTER, session=session
+        )
+        if session is None:
+            # Inside a transaction the caller invalidates and publishes once it commits
+            self.player_cache.invalidate(player_id)
+        if not doc:
+            return None
+
+        previous = doc["last_reward"]
+        old_level, new_level = previous["previous_level"], doc["level"]
+        player = from_document(Player, doc)
+        result = RewardResult(
+            player=player,
+            exp_gained=exp,
+            old_level=old_level,
+            new_level=new_level,
+            stat_points_gained=curve.stat_points_between(old_level, new_level),
+            new_rank=player.rank if player.rank != previous.get("previous_rank") else None
+        )
+        if session is None and publish:
+            self._publish_reward(result)
+        return result
+
+    @staticmethod
+    def _publish_reward(result: RewardResult):
+        player = result.player
+        event_bus.publish(player.id, "experience", {
+            "exp_gained": result.exp_gained,
+            "experience": player.experience,
+            "experience_to_next": player.experience_to_next,
+            "level": player.level,
+            "combat_power": player.combat_power
+        })
+        if result.leveled_up:
+            event_bus.publish(player.id, "level_up", {**result.level_up_info(), "rank": player.rank.value})
+
+    async def _apply_gear_delta(self, player_id: str, delta: Dict[str, int], session=None):
+        await self.players.update_one({"id": player_id}, power.gear_delta_stages(delta), session=session)
+        if session is None:
+            self.player_cache.invalidate(player_id)
+
+    async def refresh_combat_power(self, player_ids: List[str]) -> int:
+        """Recompute gear_bonus, effective_stats and combat_power from scratch"""
+        equipped = {player_id: [] for player_id in player_ids}
+        async for item in self.equipment.find({"player_id": {"$in": player_ids}, "equipped": True}):
+            equipped[item["player_id"]].append(item)
+        requests = [
+            UpdateOne(
+                {"id": player_id},
+                [{"$set": {"gear_bonus": {"$literal": power.sum_bonuses(items)}}}] + power.power_update_stages()
+            )
+            for player_id, items in equipped.items()
+        ]
+        if not requests:
+            return 0
+        result = await self.players.bulk_write(requests, ordered=False)
+        self.player_cache.invalidate_many(player_ids)
+        return result.matched_count
+
+    async def backfill_combat_power(self, query: Optional[Dict[str, Any]] = None, batch_size: int = 1000) -> int:
+        """refresh_combat_power for every player matching query (default: all players)"""
+        refreshed = 0
+        batch = []
+        async for doc in self.players.find(query or {}, {"_id": 0, "id": 1}):
+            batch.append(doc["id"])
+            if len(batch) >= batch_size:
+                refreshed += await self.refresh_combat_power(batch)
+                batch = []
+        if batch:
+            refreshed += await self.refresh_combat_power(batch)
+        return refreshed
+
+    def build_starter_documents(self, player_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Build every starter document for a new player without touching the database"""
+        # Default equipment
         default_equipment = [
             {
                 "name": "Rusty Sword",
@@ -72,12 +311,8 @@ class DatabaseManager:
                 "equipped": True
             }
         ]
-        
-        for item in default_equipment:
-            equipment = Equipment(**item)
-            await self.equipment.insert_one(equipment.dict())
 
-        # Create default skills
+        # Default skills
         default_skills = [
             {
                 "name": "Basic Attack",
@@ -92,12 +327,8 @@ class DatabaseManager:
                 "player_id": player_id
             }
         ]
-        
-        for skill_data in default_skills:
-            skill = Skill(**skill_data)
-            await self.skills.insert_one(skill.dict())
 
-        # Create default quests
+        # Default quests
         default_quests = [
             {
                 "title": "First Steps",
@@ -116,15 +347,20 @@ class DatabaseManager:
                 "player_id": player_id
             }
         ]
-        
-        for quest_data in default_quests:
-            quest = Quest(**quest_data)
-            await self.quests.insert_one(quest.dict())
+
+        return {
+            "equipment": [Equipment(**item).dict() for item in default_equipment],
+            "skills": [Skill(**skill_data).dict() for skill_data in default_skills],
+            "quests": [Quest(**quest_data).dict() for quest_data in default_quests]
+        }
+
+    async def initialize_player_data(self, player_id: str):
+        """Insert the starter documents for an already existing player"""
+        await self._insert_starter_documents([self.build_starter_documents(player_id)])
 
     # Equipment operations
     async def get_player_equipment(self, player_id: str) -> List[Equipment]:
-        equipment_docs = await self.equipment.find({"player_id": player_id}).to_list(1000)
-        return [Equipment(**doc) for doc in equipment_docs]
+        return [item async for item in self.stream_player_documents("equipment", player_id)]
 
     async def create_equipment(self, player_id: str, equipment_data: EquipmentCreate) -> Equipment:
         equipment = Equipment(**equipment_data.dict(), player_id=player_id)
@@ -137,7 +373,9 @@ class DatabaseManager:
         if not item_doc:
             return False
         
-        item = Equipment(**item_doc)
+        item = from_document(Equipment, item_doc)
+        if item.equipped:
+            return True
         
         # Unequip other items of the same type
         await self.equipment.update_many(
@@ -151,33 +389,211 @@ class DatabaseManager:
             {"$set": {"equipped": True}}
         )
         
+        # Rebuild the gear contribution from what is equipped now rather than applying a
+        # delta, so concurrent equips cannot leave combat_power permanently off
+        await self.refresh_combat_power([player_id])
+        
         return True
 
+    async def get_player_item(self, player_id: str, item_id: str) -> Optional[Equipment]:
+        item_doc = await self.equipment.find_one({"id": item_id, "player_id": player_id})
+        return from_document(Equipment, item_doc) if item_doc else None
+
+    async def enhance_equipment(self, item: Equipment, levels_gained: int, stat_boost: int, cost: int,
+                                use_transaction: bool = False) -> Optional[RewardResult]:
+        """Charge cost XP and raise the item by levels_gained as one guarded operation.
+
+        The XP is only taken if the player can afford it, and the item is only
+        raised if its enhancement_level is still the one that was rolled
+        against. Returns None when either guard fails. With a transaction,
+        events are only published after it commits.
+
+        Without one the two writes are not atomic: when the item guard fails
+        the XP is given back with a plain $inc, and a process that dies
+        between the writes loses it. Events are only published once the item
+        was raised, so clients never see a charge that was refunded.
+        """
+        if use_transaction:
+            async with await self.db.client.start_session() as session:
+                async with session.start_transaction():
+                    result = await self._enhance_equipment(item, levels_gained, stat_boost, cost, session)
+                    if not result:
+                        await session.abort_transaction()
+            # Only what the transaction committed is evicted and pushed to clients
+            self.player_cache.invalidate(item.player_id)
+            if result:
+                self._publish_reward(result)
+            return result
+        return await self._enhance_equipment(item, levels_gained, stat_boost, cost)
+
+    async def _enhance_equipment(self, item: Equipment, levels_gained: int, stat_boost: int, cost: int,
+                                 session=None) -> Optional[RewardResult]:
+        reward = await self.apply_rewards(item.player_id, exp=-cost, min_experience=cost, session=session,
+                                          publish=False)
+        if not reward or not levels_gained:
+            if reward and session is None:
+                self._publish_reward(reward)
+            return reward
+
+        increments = {"enhancement_level": levels_gained}
+        delta = {}
+        for field in ("attack", "defense"):
+            if getattr(item, field) and stat_boost:
+                increments[field] = stat_boost
+                delta[field] = stat_boost
+        # Items created before enhancement_level existed have no field at +0
+        current_level = item.enhancement_level or {"$in": [0, None]}
+        updated = await self.equipment.update_one(
+            {"id": item.id, "player_id": item.player_id, "enhancement_level": current_level},
+            {"$inc": increments},
+            session=session
+        )
+        if not updated.modified_count:
+            if session is None:
+                # Spending never lowers the level, so giving the XP back needs no progression stages
+                await self.players.update_one({"id": item.player_id}, {"$inc": {"experience": cost}})
+                self.player_cache.invalidate(item.player_id)
+            return None
+
+        if item.equipped and delta:
+            await self._apply_gear_delta(item.player_id, delta, session=session)
+        if session is None:
+            self._publish_reward(reward)
+        return reward
+
     # Shadow operations
     async def get_player_shadows(self, player_id: str) -> List[Shadow]:
-        shadow_docs = await self.shadows.find({"player_id": player_id}).to_list(1000)
-        return [Shadow(**doc) for doc in shadow_docs]
+        return [shadow async for shadow in self.stream_player_documents("shadows", player_id)]
 
-    async def create_shadow(self, player_id: str, shadow_data: ShadowCreate) -> Shadow:
+    async def create_shadow(self, player_id: str, shadow_data: ShadowCreate) -> Optional[Shadow]:
+        """Add a shadow to the army; None if the player does not exist or the army is full"""
         shadow = Shadow(**shadow_data.dict(), player_id=player_id)
-        await self.shadows.insert_one(shadow.dict())
+        # Reserve the slot first so concurrent extractions cannot overfill the army
+        reserved = await self._reserve_shadow_slot(player_id, shadow.rarity.value)
+        if not reserved:
+            # The counters may predate the shadows they should count; check them before refusing
+            await self.reconcile_shadow_army([player_id])
+            reserved = await self._reserve_shadow_slot(player_id, shadow.rarity.value)
+        if not reserved:
+            return None
+        self.player_cache.invalidate(player_id)
+        try:
+            await self.shadows.insert_one(shadow.dict())
+        except Exception:
+            await self.players.update_one({"id": player_id}, {"$inc": self._army_delta(shadow.rarity.value, -1)})
+            raise
+        event_bus.publish(player_id, "shadow_extracted", shadow.model_dump(mode="json"))
         return shadow
 
+    async def _reserve_shadow_slot(self, player_id: str, rarity: str) -> bool:
+        reserved = await self.players.update_one(
+            {"id": player_id, "$expr": {"$lt": [
+                {"$ifNull": ["$shadow_army.current", 0]},
+                {"$ifNull": ["$shadow_army.capacity", float("inf")]}
+            ]}},
+            {"$inc": self._army_delta(rarity, 1)}
+        )
+        return reserved.modified_count > 0
+
+    async def delete_shadow(self, player_id: str, shadow_id: str) -> Optional[Shadow]:
+        """Release a shadow; the released shadow, or None if it was not found"""
+        shadow_doc = await self.shadows.find_one_and_delete({"id": shadow_id, "player_id": player_id}, {"_id": 0})
+        if not shadow_doc:
+            return None
+        # Counters that predate the shadow (never reconciled) must not go negative
+        await self.players.update_one({"id": player_id}, [{"$set": {
+            field: {"$max": [0, {"$add": [{"$ifNull": [f"${field}", 0]}, amount]}]}
+            for field, amount in self._army_delta(shadow_doc["rarity"], -1).items()
+        }}])
+        self.player_cache.invalidate(player_id)
+        event_bus.publish(player_id, "shadow_released", {"id": shadow_id})
+        return from_document(Shadow, shadow_doc)
+
+    @staticmethod
+    def _army_delta(rarity: str, amount: int) -> Dict[str, int]:
+        return {"shadow_army.current": amount, f"shadow_army.by_rarity.{rarity}": amount}
+
+    async def get_shadow_army(self, player_id: str) -> Optional[ShadowArmy]:
+        """The maintained army counters, without loading any shadows"""
+        player_doc = await self.players.find_one({"id": player_id}, {"_id": 0, "shadow_army": 1})
+        return ShadowArmy(**player_doc.get("shadow_army", {})) if player_doc else None
+
+    async def reconcile_shadow_army(self, player_ids: Optional[List[str]] = None, batch_size: int = 1000) -> int:
+        """Recompute shadow_army counters from the shadows collection"""
+        if player_ids is None:
+            reconciled = 0
+            batch = []
+            async for doc in self.players.find({}, {"_id": 0, "id": 1}):
+                batch.append(doc["id"])
+                if len(batch) >= batch_size:
+                    reconciled += await self.reconcile_shadow_army(batch)
+                    batch = []
+            if batch:
+                reconciled += await self.reconcile_shadow_army(batch)
+            return reconciled
+
+        counts = {player_id: {} for player_id in player_ids}
+        pipeline = [
+            {"$match": {"player_id": {"$in": player_ids}}},
+            {"$group": {"_id": {"player_id": "$player_id", "rarity": "$rarity"}, "count": {"$sum": 1}}}
+        ]
+        async for group in self.shadows.aggregate(pipeline):
+            counts[group["_id"]["player_id"]][group["_id"]["rarity"]] = group["count"]
+        requests = [
+            UpdateOne(
+                {"id": player_id},
+                [{"$set": {
+                    "shadow_army.current": sum(by_rarity.values()),
+                    "shadow_army.by_rarity": {"$literal": by_rarity},
+                    # Armies that grew past the limit before it was enforced keep growing
+                    "shadow_army.capacity": {"$cond": [
+                        {"$gt": [sum(by_rarity.values()), {"$ifNull": ["$shadow_army.capacity", float("inf")]}]},
+                        None,
+                        "$shadow_army.capacity"
+                    ]}
+                }}]
+            )
+            for player_id, by_rarity in counts.items()
+        ]
+        if not requests:
+            return 0
+        result = await self.players.bulk_write(requests, ordered=False)
+        self.player_cache.invalidate_many(player_ids)
+        return result.matched_count
+
     async def get_shadow(self, shadow_id: str) -> Optional[Shadow]:
         shadow_doc = await self.shadows.find_one({"id": shadow_id})
-        return Shadow(**shadow_doc) if shadow_doc else None
+        return from_document(Shadow, shadow_doc) if shadow_doc else None
+
+    async def get_shadows(self, shadow_ids: List[str]) -> Dict[str, Shadow]:
+        shadow_docs = await self.shadows.find({"id": {"$in": list(shadow_ids)}}).to_list(None)
+        return {doc["id"]: from_document(Shadow, doc) for doc in shadow_docs}
+
+    async def get_shadow_power_totals(self, player_ids: Optional[List[str]] = None) -> Dict[str, Tuple[int, int]]:
+        """Summed attack and defense of every shadow per player"""
+        pipeline = []
+        if player_ids is not None:
+            pipeline.append({"$match": {"player_id": {"$in": player_ids}}})
+        pipeline.append({"$group": {
+            "_id": "$player_id",
+            "attack": {"$sum": "$stats.attack"},
+            "defense": {"$sum": "$stats.defense"}
+        }})
+        return {
+            doc["_id"]: (doc["attack"], doc["defense"])
+            async for doc in self.shadows.aggregate(pipeline, allowDiskUse=True)
+        }
 
     # Quest operations
     async def get_player_quests(self, player_id: str) -> List[Quest]:
-        quest_docs = await self.quests.find({"player_id": player_id}).to_list(1000)
-        return [Quest(**doc) for doc in quest_docs]
+        return [quest async for quest in self.stream_player_documents("quests", player_id)]
 
     async def update_quest_progress(self, quest_id: str, progress: int) -> Optional[Quest]:
         quest_doc = await self.quests.find_one({"id": quest_id})
         if not quest_doc:
             return None
         
-        quest = Quest(**quest_doc)
+        quest = from_document(Quest, quest_doc)
         new_progress = min(progress, quest.target)
         completed = new_progress >= quest.target
         
@@ -190,16 +606,180 @@ class DatabaseManager:
 
     async def get_quest(self, quest_id: str) -> Optional[Quest]:
         quest_doc = await self.quests.find_one({"id": quest_id})
-        return Quest(**quest_doc) if quest_doc else None
+        return from_document(Quest, quest_doc) if quest_doc else None
 
-    # Dungeon operations
-    async def get_dungeons(self) -> List[Dungeon]:
-        dungeon_docs = await self.dungeons.find().to_list(1000)
-        return [Dungeon(**doc) for doc in dungeon_docs]
+    # Daily quest operations
+    # Quest days are UTC dates; the rollover scheduler pre-creates each day's
+    # quests and fails the previous day's, so reads normally find a document.
+    @staticmethod
+    def quest_date(moment: Optional[datetime] = None) -> str:
+        return (moment or datetime.utcnow()).strftime("%Y-%m-%d")
+
+    async def get_daily_quest(self, player_id: str, date: str, create: bool = True) -> Optional[DailyQuestStatus]:
+        """The player's quest for date, created on the spot (unless create is False) if the rollover has not made it"""
+        quest_doc = await self.daily_quests.find_one({"player_id": player_id, "date": date}, {"_id": 0})
+        if not quest_doc and not create:
+            return None
+        if not quest_doc:
+            try:
+                quest_doc = await self.daily_quests.find_one_and_update(
+                    {"player_id": player_id, "date": date},
+                    {"$setOnInsert": DailyQuestStatus(player_id=player_id, date=date).dict()},
+                    upsert=True,
+                    projection={"_id": 0},
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # A concurrent request inserted it between our find and upsert
+                quest_doc = await self.daily_quests.find_one({"player_id": player_id, "date": date}, {"_id": 0})
+        return from_document(DailyQuestStatus, quest_doc)
+
+    async def update_daily_quest(self, player_id: str, date: str,
+                                 update_data: Dict[str, Any]) -> Optional[DailyQuestStatus]:
+        """Record progress; failed quests and quests already completed cannot be completed again"""
+        query = {"player_id": player_id, "date": date, "failed": {"$ne": True}}
+        if update_data.get("completed"):
+            query["completed"] = {"$ne": True}
+        quest_doc = await self.daily_quests.find_one_and_update(
+            query, {"$set": update_data}, projection={"_id": 0}, return_document=ReturnDocument.AFTER
+        )
+        if not quest_doc:
+            return None
+        quest = from_document(DailyQuestStatus, quest_doc)
+        event_bus.publish(player_id, "quest_completed" if update_data.get("completed") else "quest_progress",
+                          quest.model_dump(mode="json"))
+        return quest
+
+    async def active_player_ids(self, since: datetime, quest_date: str) -> AsyncIterator[str]:
+        """Players written since `since` or with progress on quest_date's quest; ids may repeat"""
+        async for doc in self.players.find({"updated_at": {"$gte": since}}, {"_id": 0, "id": 1}):
+            yield doc["id"]
+        touched = {"date": quest_date, "$or": [
+            {"completed": True}, {"pushups": {"$gt": 0}}, {"situps": {"$gt": 0}}, {"running_km": {"$gt": 0}}
+        ]}
+        async for doc in self.daily_quests.find(touched, {"_id": 0, "player_id": 1}):
+            yield doc["player_id"]
+
+    async def create_daily_quests(self, date: str, batch_size: int = 1000) -> int:
+        """Insert date's quest for every player active since the start of the previous day.
+
+        Dormant players get no quest, so the next rollover does not fail them
+        or open penalty sessions for them; they still get one on demand from
+        get_daily_quest. Existing quests are left alone.
+        """
+        day_start = datetime.strptime(date, "%Y-%m-%d")
+        previous_day = day_start - timedelta(days=1)
+        created = 0
+        batch = {}
+        async for player_id in self.active_player_ids(previous_day, self.quest_date(previous_day)):
+            batch.setdefault(player_id, DailyQuestStatus(player_id=player_id, date=date).dict())
+            if len(batch) >= batch_size:
+                created += await self._insert_daily_quests(list(batch.values()))
+                batch = {}
+        if batch:
+            created += await self._insert_daily_quests(list(batch.values()))
+        return created
+
+    async def _insert_daily_quests(self, docs: List[Dict[str, Any]]) -> int:
+        try:
+            result = await self.daily_quests.insert_many(docs, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Duplicates on {player_id, date} are quests created by an earlier run or a request
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            return e.details["nInserted"]
+
+    async def fail_daily_quests(self, date: str) -> int:
+        """Mark every quest of date that was not completed as failed"""
+        result = await self.daily_quests.update_many(
+            {"date": date, "completed": {"$ne": True}, "failed": {"$ne": True}},
+            {"$set": {"failed": True}}
+        )
+        return result.modified_count
+
+    async def open_penalty_sessions(self, date: str, batch_size: int = 1000) -> int:
+        """Open a penalty zone session for each failed quest of date that does not have one yet"""
+        opened = 0
+        cursor = self.daily_quests.find(
+            {"date": date, "failed": True, "penalty_session_id": None},
+            {"_id": 0, "id": 1, "player_id": 1}
+        )
+        batch = []
+        async for quest_doc in cursor:
+            batch.append(quest_doc)
+            if len(batch) >= batch_size:
+                opened += await self._open_penalty_batch(date, batch)
+                batch = []
+        if batch:
+            opened += await self._open_penalty_batch(date, batch)
+        return opened
+
+    async def open_penalty_session(self, quest: DailyQuestStatus) -> Optional[PenaltyZoneSession]:
+        """Open the session for one unfinished quest (manual entry); None if the quest already has one"""
+        session = PenaltyZoneSession(player_id=quest.player_id, quest_date=quest.date)
+        await self.penalty_zones.insert_one(session.dict())
+        linked = await self.daily_quests.update_one(
+            {"id": quest.id, "completed": {"$ne": True}, "penalty_session_id": None},
+            {"$set": {"penalty_session_id": session.id}}
+        )
+        if not linked.modified_count:
+            # Completed meanwhile, or a concurrent request or the rollover opened one first
+            await self.penalty_zones.delete_one({"id": session.id})
+            return None
+        self._publish_penalty_started(session)
+        return session
 
+    async def _open_penalty_batch(self, date: str, quest_docs: List[Dict[str, Any]]) -> int:
+        sessions = [PenaltyZoneSession(player_id=doc["player_id"], quest_date=date) for doc in quest_docs]
+        await self.penalty_zones.insert_many([session.dict() for session in sessions], ordered=False)
+        await self.daily_quests.bulk_write([
+            UpdateOne({"id": doc["id"]}, {"$set": {"penalty_session_id": session.id}})
+            for doc, session in zip(quest_docs, sessions)
+        ], ordered=False)
+        for session in sessions:
+            self._publish_penalty_started(session)
+        return len(sessions)
+
+    @staticmethod
+    def _publish_penalty_started(session: PenaltyZoneSession):
+        event_bus.publish(session.player_id, "penalty_started", {
+            "id": session.id,
+            "quest_date": session.quest_date,
+            "start_time": session.start_time,
+            "duration_minutes": session.duration_minutes
+        })
+
+    async def get_active_penalty_session(self, player_id: str) -> Optional[PenaltyZoneSession]:
+        """The player's most recent penalty session, if it is still running"""
+        session_doc = await self.penalty_zones.find_one(
+            {"player_id": player_id}, {"_id": 0}, sort=[("start_time", -1)]
+        )
+        if not session_doc:
+            return None
+        session = from_document(PenaltyZoneSession, session_doc)
+        ends_at = session.start_time + timedelta(minutes=session.duration_minutes)
+        return session if not session.survived and ends_at > datetime.utcnow() else None
+
+    # Dungeon operations
+    # Served from the in-memory catalog; only ids it does not know (added
+    # since its last reload, or bogus) go to the database.
     async def get_dungeon(self, dungeon_id: str) -> Optional[Dungeon]:
-        dungeon_doc = await self.dungeons.find_one({"id": dungeon_id})
-        return Dungeon(**dungeon_doc) if dungeon_doc else None
+        return (await self.get_dungeons([dungeon_id])).get(dungeon_id)
+
+    async def get_dungeons(self, dungeon_ids: List[str]) -> Dict[str, Dungeon]:
+        dungeons = {}
+        missing = []
+        for dungeon_id in dict.fromkeys(dungeon_ids):
+            dungeon = self.dungeon_catalog.get(dungeon_id)
+            if dungeon is not None:
+                dungeons[dungeon_id] = dungeon
+            else:
+                missing.append(dungeon_id)
+        if missing:
+            async for doc in self.dungeons.find({"id": {"$in": missing}}, {"_id": 0}):
+                dungeons[doc["id"]] = from_document(Dungeon, doc)
+        return dungeons
 
     async def create_dungeon_attempt(self, player_id: str, dungeon_id: str) -> DungeonAttempt:
         attempt = DungeonAttempt(player_id=player_id, dungeon_id=dungeon_id)
@@ -207,30 +787,164 @@ class DatabaseManager:
         return attempt
 
     async def get_player_dungeon_attempts(self, player_id: str) -> List[DungeonAttempt]:
-        attempt_docs = await self.dungeon_attempts.find({"player_id": player_id}).to_list(1000)
-        return [DungeonAttempt(**doc) for doc in attempt_docs]
+        return [attempt async for attempt in self.stream_player_documents("dungeon_attempts", player_id)]
+
+    # Paginated player collections
+    # Pages are ordered by _id and resume after the last _id seen (keyset
+    # pagination), served by the {player_id, _id} indexes.
+    async def get_player_page(self, collection_name: str, player_id: str, after: Optional[str] = None,
+                              limit: int = 100) -> Tuple[List[BaseModel], Optional[str]]:
+        """One page of a player's documents plus the cursor of the next page (None on the last page)"""
+        model = PLAYER_COLLECTIONS[collection_name]
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = {"player_id": player_id}
+        if after:
+            query["_id"] = {"$gt": self._parse_cursor(after)}
+        docs = await getattr(self, collection_name).find(query).sort("_id", 1).limit(limit + 1).to_list(limit + 1)
+        next_cursor = str(docs[limit - 1]["_id"]) if len(docs) > limit else None
+        return [from_document(model, doc) for doc in docs[:limit]], next_cursor
+
+    async def stream_player_documents(self, collection_name: str, player_id: str,
+                                      batch_size: int = 500) -> AsyncIterator[BaseModel]:
+        """Every document a player owns in _id order, fetched batch_size at a time"""
+        model = PLAYER_COLLECTIONS[collection_name]
+        cursor = getattr(self, collection_name).find({"player_id": player_id}).sort("_id", 1).batch_size(batch_size)
+        async for doc in cursor:
+            yield from_document(model, doc)
+
+    @staticmethod
+    def _parse_cursor(cursor: str) -> ObjectId:
+        try:
+            return ObjectId(cursor)
+        except (InvalidId, TypeError):
+            raise ValueError(f"Invalid cursor: {cursor}")
 
     # Story operations
+    # Chapter content lives once in the shared templates; players only carry
+    # the unlocked/completed bitmasks in `story_progress` (bit n-1 = chapter n).
+    def get_story_templates(self) -> Mapping[int, CompiledChapter]:
+        return get_story_index()
+
+    async def _get_story_progress(self, player_id: str) -> Optional[StoryProgress]:
+        player_doc = await self.players.find_one({"id": player_id}, {"_id": 0, "story_progress": 1})
+        return StoryProgress(**player_doc.get("story_progress", {})) if player_doc else None
+
+    async def get_player_story_summaries(self, player_id: str) -> List[StoryChapterSummary]:
+        """Chapter metadata and progress only - no narrative content is copied"""
+        progress = await self._get_story_progress(player_id)
+        if not progress:
+            return []
+        return [
+            StoryChapterSummary(
+                id=f"{player_id}-chapter-{chapter_number}",
+                chapter_number=chapter_number,
+                title=template.title,
+                description=template.description,
+                content_length=template.content_length,
+                unlocked=progress.is_unlocked(chapter_number),
+                completed=progress.is_completed(chapter_number),
+                player_id=player_id
+            )
+            for chapter_number, template in self.get_story_templates().items()
+        ]
+
     async def get_player_story_chapters(self, player_id: str) -> List[StoryChapter]:
-        chapter_docs = await self.story_chapters.find({"player_id": player_id}).sort("chapter_number").to_list(1000)
-        return [StoryChapter(**doc) for doc in chapter_docs]
+        progress = await self._get_story_progress(player_id)
+        if not progress:
+            return []
+
+        chapters = []
+        for chapter_number, template in self.get_story_templates().items():
+            chapters.append(StoryChapter(
+                id=f"{player_id}-chapter-{chapter_number}",
+                chapter_number=chapter_number,
+                title=template.title,
+                description=template.description,
+                content=list(template.content),
+                unlocked=progress.is_unlocked(chapter_number),
+                completed=progress.is_completed(chapter_number),
+                player_id=player_id
+            ))
+        return chapters
 
     async def unlock_story_chapter(self, player_id: str, chapter_number: int) -> bool:
-        result = await self.story_chapters.update_one(
-            {"player_id": player_id, "chapter_number": chapter_number},
-            {"$set": {"unlocked": True}}
+        # Chapter 1 is always part of the mask so a player without progress keeps it
+        mask = StoryProgress.chapter_bit(1) | StoryProgress.chapter_bit(chapter_number)
+        result = await self.players.update_one(
+            {"id": player_id},
+            {"$bit": {"story_progress.unlocked": {"or": mask}}}
         )
+        self.player_cache.invalidate(player_id)
         return result.modified_count > 0
 
     async def complete_story_chapter(self, player_id: str, chapter_number: int) -> bool:
-        result = await self.story_chapters.update_one(
-            {"player_id": player_id, "chapter_number": chapter_number},
-            {"$set": {"completed": True}}
+        result = await self.players.update_one(
+            {"id": player_id},
+            {"$bit": {"story_progress.completed": {"or": StoryProgress.chapter_bit(chapter_number)}}}
         )
+        self.player_cache.invalidate(player_id)
         return result.modified_count > 0
 
+    async def compact_story_chapters(self, batch_size: int = 1000) -> int:
+        """Fold legacy per-player story_chapters documents into story_progress bitmasks"""
+        migrated = 0
+        pipeline = [
+            {"$group": {
+                "_id": "$player_id",
+                "chapters": {"$push": {
+                    "chapter_number": "$chapter_number",
+                    "unlocked": "$unlocked",
+                    "completed": "$completed"
+                }}
+            }}
+        ]
+        batch = []
+        async for group in self.story_chapters.aggregate(pipeline, allowDiskUse=True):
+            batch.append(group)
+            if len(batch) >= batch_size:
+                migrated += await self._compact_story_batch(batch)
+                batch = []
+        if batch:
+            migrated += await self._compact_story_batch(batch)
+        return migrated
+
+    async def _compact_story_batch(self, groups: List[Dict[str, Any]]) -> int:
+        requests = []
+        for group in groups:
+            progress = StoryProgress(unlocked=StoryProgress.chapter_bit(1))
+            for chapter in group["chapters"]:
+                bit = StoryProgress.chapter_bit(chapter["chapter_number"])
+                if chapter.get("unlocked"):
+                    progress.unlocked |= bit
+                if chapter.get("completed"):
+                    progress.completed |= bit
+            requests.append(UpdateOne(
+                {"id": group["_id"]},
+                {"$set": {"story_progress": progress.dict()}}
+            ))
+
+        await self.players.bulk_write(requests, ordered=False)
+        self.player_cache.invalidate_many(group["_id"] for group in groups)
+        await self.story_chapters.delete_many({"player_id": {"$in": [group["_id"] for group in groups]}})
+        return len(requests)
+
     # Initialize game data
-    async def initialize_game_data(self):
+    async def dedupe_dungeons(self) -> int:
+        """Keep the oldest dungeon per name, repoint attempts at it and delete the other copies"""
+        removed = 0
+        duplicates = self.dungeons.aggregate([
+            {"$sort": {"created_at": 1}},
+            {"$group": {"_id": "$name", "ids": {"$push": "$id"}}},
+            {"$match": {"ids.1": {"$exists": True}}}
+        ])
+        async for group in duplicates:
+            keep, extra = group["ids"][0], group["ids"][1:]
+            await self.dungeon_attempts.update_many({"dungeon_id": {"$in": extra}}, {"$set": {"dungeon_id": keep}})
+            removed += (await self.dungeons.delete_many({"id": {"$in": extra}})).deleted_count
+        return removed
+
+    async def initialize_game_data(self, overwrite_dungeons: bool = False) -> Dict[str, int]:
+        """Seed the default catalog; dungeons that already exist keep their edits unless overwrite_dungeons"""
         # Create default dungeons
         default_dungeons = [
             {
@@ -267,11 +981,30 @@ class DatabaseManager:
             }
         ]
         
-        for dungeon_data in default_dungeons:
-            # Check if dungeon already exists
-            existing = await self.dungeons.find_one({"name": dungeon_data["name"]})
-            if not existing:
-                dungeon = Dungeon(**dungeon_data)
-                await self.dungeons.insert_one(dungeon.dict())
-
-database = DatabaseManager()
\ No newline at end of file
+        return await self.seed_dungeons(default_dungeons, overwrite=overwrite_dungeons)
+
+    async def seed_dungeons(self, dungeon_data: List[Dict[str, Any]], overwrite: bool = False) -> Dict[str, int]:
+        """Insert missing catalog dungeons by name in one bulk_write.
+
+        Existing dungeons are left as they are (edited ones included) unless
+        overwrite, which resets their catalog fields; their ids never change.
+        """
+        requests = []
+        for data in dungeon_data:
+            dungeon = Dungeon(**data).dict()
+            if overwrite:
+                on_insert = {key: dungeon.pop(key) for key in ("id", "created_at")}
+                update = {"$set": dungeon, "$setOnInsert": on_insert}
+            else:
+                update = {"$setOnInsert": dungeon}
+            requests.append(UpdateOne({"name": dungeon["name"]}, update, upsert=True))
+        try:
+            result = await self.dungeons.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            # Another worker upserted the same names first; the unique name index kept one copy
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            return {"inserted": e.details.get("nUpserted", 0), "updated": e.details.get("nModified", 0)}
+        return {"inserted": result.upserted_count, "updated": result.modified_count}
+
+database = DatabaseManager(db)
\ No newline at end of file
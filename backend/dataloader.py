@@ -0,0 +1,103 @@
+"""Request-scoped data loaders.
+
+Each request gets its own loaders (see loaders_for). A loader memoizes every
+key it has served for the lifetime of the request, and keys requested in the
+same event-loop tick - e.g. under asyncio.gather - are coalesced into one
+batched `$in` query.
+"""
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Set, Tuple, TypeVar
+import asyncio
+
+from database import database
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+class DataLoader(Generic[K, V]):
+    def __init__(self, batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]], max_batch_size: int = 1000):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._memo: Dict[K, asyncio.Future] = {}
+        self._queue: List[Tuple[K, asyncio.Future]] = []
+        # The event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+
+    async def load(self, key: K) -> Optional[V]:
+        """The value for key, or None if it does not exist"""
+        future = self._memo.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._memo[key] = future
+            self._queue.append((key, future))
+            if len(self._queue) == 1:
+                # Let every coroutine that is ready this tick queue its keys first
+                loop.call_soon(self._schedule_dispatch)
+        # Shielded: one cancelled caller must not cancel the value other callers share
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: Optional[V]):
+        """Seed the memo, e.g. with a post-image the handler already holds"""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._memo[key] = future
+
+    def clear(self, key: K):
+        """Forget key so the next load goes back to the database"""
+        self._memo.pop(key, None)
+
+    def _schedule_dispatch(self):
+        task = asyncio.ensure_future(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self):
+        queue, self._queue = self._queue, []
+        try:
+            for start in range(0, len(queue), self.max_batch_size):
+                batch = queue[start:start + self.max_batch_size]
+                self.batches += 1
+                try:
+                    values = await self._batch_fn([key for key, _ in batch])
+                    results = [(future, values.get(key)) for key, future in batch]
+                except Exception as e:
+                    self._fail(batch, e)
+                    continue
+                for future, value in results:
+                    if not future.done():
+                        future.set_result(value)
+        except BaseException as e:
+            # Cancelled mid-batch: nothing may be left waiting on a future that never resolves
+            self._fail(queue, e)
+            raise
+
+    def _fail(self, batch: List[Tuple[K, asyncio.Future]], error: BaseException):
+        for key, future in batch:
+            if future.done():
+                continue
+            # Failed keys are retried by the next load
+            if self._memo.get(key) is future:
+                del self._memo[key]
+            if isinstance(error, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(error)
+
+class RequestLoaders:
+    """The loaders available to one request"""
+
+    def __init__(self, database=database):
+        self.players = DataLoader(database.get_players)
+        self.shadows = DataLoader(database.get_shadows)
+        self.dungeons = DataLoader(database.get_dungeons)
+
+def loaders_for(request: Any) -> RequestLoaders:
+    """The loaders for this request, created on first use"""
+    loaders = getattr(request.state, "loaders", None)
+    if loaders is None:
+        loaders = request.state.loaders = RequestLoaders()
+    return loaders
@@ -0,0 +1,55 @@
+"""Models from our own documents.
+
+Every read of a stored document goes through from_document, which validates
+it and times the build per model; the numbers are at /admin/model-validation.
+
+Skipping validation for documents this backend wrote itself does not pay off
+here: measured on stored documents, pydantic-core validates a Player in about
+6.5 us and the flat models in 1.4-1.8 us, while building the same instances
+without validation (model_construct plus nested models and enums, even as
+generated straight-line code) took as long or longer. So there is no
+unvalidated read path.
+
+Models still carry a schema_version; bump its default whenever the stored
+shape changes, then run `python migrations.py stamp_schema_versions` to find
+the documents that no longer validate.
+"""
+from typing import Any, Dict, List, Mapping, Optional, Type, TypeVar
+import time
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+class BuildTimings:
+    """Documents built and seconds spent per model"""
+
+    def __init__(self):
+        self._timings: Dict[str, List[float]] = {}
+
+    def record(self, model_name: str, seconds: float):
+        entry = self._timings.setdefault(model_name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        return {"models": {
+            model_name: {"documents": count, "seconds": seconds, "us_per_document": seconds / count * 1e6}
+            for model_name, (count, seconds) in self._timings.items()
+        }}
+
+    def reset(self):
+        self._timings.clear()
+
+timings = BuildTimings()
+
+def current_version(model: Type[BaseModel]) -> Optional[int]:
+    field = model.model_fields.get("schema_version")
+    return field.default if field is not None else None
+
+def from_document(model: Type[M], doc: Mapping[str, Any]) -> M:
+    """Validate a stored document into model, timing the build"""
+    started = time.perf_counter()
+    instance = model(**doc)
+    timings.record(model.__name__, time.perf_counter() - started)
+    return instance
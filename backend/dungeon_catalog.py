@@ -0,0 +1,119 @@
+"""In-memory dungeon catalog.
+
+The dungeons collection is reference data seeded at startup, so every worker
+keeps all of it in memory: O(1) lookups by id and name, per-difficulty lists
+and a recommended_level index for range queries. A reload builds a new
+snapshot and swaps it in whole, so readers never see a half-built catalog.
+The Dungeon objects are shared between requests and must not be mutated.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+import asyncio
+import logging
+import os
+
+from models import Dungeon, HunterRank
+from documents import from_document
+
+logger = logging.getLogger(__name__)
+
+class CatalogSnapshot:
+    """Immutable indexes over one load of the dungeons collection"""
+    __slots__ = ("by_id", "by_name", "by_difficulty", "_levels", "_by_level")
+
+    def __init__(self, dungeons: Iterable[Dungeon]):
+        ordered = sorted(dungeons, key=lambda dungeon: (dungeon.recommended_level, dungeon.name))
+        by_difficulty: Dict[HunterRank, List[Dungeon]] = {}
+        for dungeon in ordered:
+            by_difficulty.setdefault(dungeon.difficulty, []).append(dungeon)
+        self.by_id: Mapping[str, Dungeon] = MappingProxyType({dungeon.id: dungeon for dungeon in ordered})
+        self.by_name: Mapping[str, Dungeon] = MappingProxyType({dungeon.name: dungeon for dungeon in ordered})
+        self.by_difficulty: Mapping[HunterRank, Tuple[Dungeon, ...]] = MappingProxyType(
+            {difficulty: tuple(dungeons) for difficulty, dungeons in by_difficulty.items()}
+        )
+        self._levels: Tuple[int, ...] = tuple(dungeon.recommended_level for dungeon in ordered)
+        self._by_level: Tuple[Dungeon, ...] = tuple(ordered)
+
+    def __len__(self) -> int:
+        return len(self._by_level)
+
+    def all(self) -> Tuple[Dungeon, ...]:
+        """Every dungeon, by recommended_level"""
+        return self._by_level
+
+    def between(self, min_level: int, max_level: int) -> Tuple[Dungeon, ...]:
+        """Dungeons with min_level <= recommended_level <= max_level"""
+        return self._by_level[bisect_left(self._levels, min_level):bisect_right(self._levels, max_level)]
+
+class DungeonCatalog:
+    def __init__(self, collection):
+        self.collection = collection
+        self.reload_interval = int(os.environ.get("DUNGEON_CATALOG_RELOAD_SECONDS", "300"))
+        self._snapshot = CatalogSnapshot([])
+        self.loaded_at: Optional[datetime] = None
+        self.hits = 0
+        self.misses = 0
+        self._reload_task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    async def load(self) -> int:
+        """Read the whole collection and swap in a new snapshot"""
+        docs = await self.collection.find({}, {"_id": 0}).to_list(None)
+        self._snapshot = CatalogSnapshot(from_document(Dungeon, doc) for doc in docs)
+        self.loaded_at = datetime.utcnow()
+        return len(self._snapshot)
+
+    def get(self, dungeon_id: str) -> Optional[Dungeon]:
+        dungeon = self._snapshot.by_id.get(dungeon_id)
+        if dungeon is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return dungeon
+
+    def by_name(self, name: str) -> Optional[Dungeon]:
+        return self._snapshot.by_name.get(name)
+
+    def by_difficulty(self, difficulty: HunterRank) -> Tuple[Dungeon, ...]:
+        return self._snapshot.by_difficulty.get(difficulty, ())
+
+    def between(self, min_level: int, max_level: int) -> Tuple[Dungeon, ...]:
+        return self._snapshot.between(min_level, max_level)
+
+    def all(self) -> Tuple[Dungeon, ...]:
+        return self._snapshot.all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dungeons": len(self._snapshot),
+            "loaded_at": self.loaded_at,
+            "reload_interval": self.reload_interval,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def start_periodic_reload(self):
+        if self.reload_interval > 0 and self._reload_task is None:
+            self._reload_task = asyncio.create_task(self._reload_loop())
+
+    async def _reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Dungeon catalog reload failed: {e}")
+
+    def stop_periodic_reload(self):
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            self._reload_task = None
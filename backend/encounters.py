@@ -0,0 +1,89 @@
+"""Instant dungeon encounter engine.
+
+A run is 3-7 encounters against the dungeon's enemies and ends at the first
+defeat. Runs are rolled with NumPy so a whole auto-grind session - thousands
+of runs - costs a handful of array operations instead of a Python loop per
+encounter.
+"""
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+ENCOUNTER_RANGE = (3, 7)
+ENEMY_POWER_RANGE = (50, 200)
+VICTORY_THRESHOLD = 0.7  # enemies fight at 70% of their rolled power
+EXP_RANGE = (100, 300)
+SHADOW_CHANCE = 0.3
+
+VICTORY_LABEL = "Victory! ⚔️"
+DEFEAT_LABEL = "Defeat... 💀"
+
+class EncounterTable(NamedTuple):
+    """Everything the engine needs about one instant dungeon, resolved once by instant_dungeons"""
+    enemies: Tuple[str, ...]
+    enemy_power_range: Tuple[int, int] = ENEMY_POWER_RANGE
+    exp_range: Tuple[int, int] = EXP_RANGE
+    shadow_chance: float = SHADOW_CHANCE
+
+DEFAULT_TABLE = EncounterTable(enemies=("Goblin",))
+
+def level_multiplier(level: int) -> int:
+    """Enemy power and XP both scale every 5 player levels"""
+    return level // 5 + 1
+
+def roll_runs(level: int, combat_power: int, table: EncounterTable, runs: int,
+              rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """Roll `runs` instant dungeon runs at once.
+
+    Returns (runs, max encounters) arrays: which encounters were fought,
+    won, yielded a shadow candidate, the XP each one gave and the enemy index.
+    """
+    rng = rng or np.random.default_rng()
+    multiplier = level_multiplier(level)
+    shape = (runs, ENCOUNTER_RANGE[1])
+
+    planned = rng.integers(ENCOUNTER_RANGE[0], ENCOUNTER_RANGE[1] + 1, size=runs)
+    enemy = rng.integers(0, len(table.enemies), size=shape)
+    enemy_power = rng.integers(table.enemy_power_range[0], table.enemy_power_range[1] + 1, size=shape) * multiplier
+    won = combat_power > enemy_power * VICTORY_THRESHOLD
+
+    # An encounter is fought if it was planned and every earlier one was won
+    within_plan = np.arange(shape[1]) < planned[:, None]
+    survived = np.cumprod(np.hstack([np.ones((runs, 1), dtype=bool), won[:, :-1]]), axis=1).astype(bool)
+    fought = within_plan & survived
+    victories = fought & won
+
+    exp = np.where(victories, rng.integers(table.exp_range[0], table.exp_range[1] + 1, size=shape) * multiplier, 0)
+    shadow = victories & (rng.random(shape) < table.shadow_chance)
+    return {"fought": fought, "victories": victories, "exp": exp, "shadow": shadow, "enemy": enemy}
+
+def encounter_log(rolls: Dict[str, np.ndarray], run: int, table: EncounterTable) -> List[Dict[str, Any]]:
+    """The per-encounter log for one rolled run"""
+    log = []
+    for i in np.flatnonzero(rolls["fought"][run]):
+        won = bool(rolls["victories"][run, i])
+        log.append({
+            "encounter": int(i) + 1,
+            "enemy": table.enemies[rolls["enemy"][run, i]],
+            "result": VICTORY_LABEL if won else DEFEAT_LABEL,
+            "exp_gained": int(rolls["exp"][run, i]),
+            "shadow_available": bool(rolls["shadow"][run, i])
+        })
+    return log
+
+def shadow_candidates(rolls: Dict[str, np.ndarray], table: EncounterTable) -> Dict[str, int]:
+    counts = np.bincount(rolls["enemy"][rolls["shadow"]], minlength=len(table.enemies))
+    return {table.enemies[i]: int(count) for i, count in enumerate(counts) if count}
+
+def summarize(rolls: Dict[str, np.ndarray], table: EncounterTable, log_sample: int = 0) -> Dict[str, Any]:
+    """Aggregate stats for a batch of rolled runs plus the logs of the first log_sample runs"""
+    runs = len(rolls["fought"])
+    return {
+        "runs": runs,
+        "clears": int(rolls["victories"].any(axis=1).sum()),
+        "encounters": int(rolls["fought"].sum()),
+        "victories": int(rolls["victories"].sum()),
+        "total_exp": int(rolls["exp"].sum()),
+        "shadow_candidates": shadow_candidates(rolls, table),
+        "encounter_logs": [encounter_log(rolls, run, table) for run in range(min(log_sample, runs))]
+    }
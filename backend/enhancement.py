@@ -0,0 +1,187 @@
+"""Equipment enhancement economy.
+
+Owns the enhancement curves (XP cost and success rate per level) and models
+enhancing from one level to another as an absorbing Markov chain: each
+attempt at +L costs cost(L) and moves to +L+1 with the success probability,
+otherwise the item stays at +L (FAILURE_DOWNGRADE_CHANCE can make failures
+drop a level instead). Expected XP cost, variance and the distribution of
+attempts are solved exactly and cached; simulate() is the Monte Carlo
+cross-check.
+
+Usage: python enhancement.py [--start 0] [--check] [--trials 200000]
+"""
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+MAX_LEVEL = 10
+STAT_BOOST = 0.15  # each success adds 15% of the item's main stat
+FAILURE_DOWNGRADE_CHANCE = 0.0  # items never lose levels today
+
+# Attempt distributions are cut off once this much probability is left in the tail
+DISTRIBUTION_TAIL = 1e-9
+MAX_DISTRIBUTION_ATTEMPTS = 20000
+
+def cost(level: int) -> int:
+    """XP charged for an enhancement attempt on a +level item"""
+    return (level + 1) * 1000
+
+def success_rate(level: int) -> int:
+    """Success chance in percent for an attempt on a +level item"""
+    return max(10, 100 - level * 10)
+
+def success_probability(level: int) -> float:
+    return success_rate(level) / 100
+
+def stat_boost(main_stat: Optional[int]) -> int:
+    return int((main_stat or 10) * STAT_BOOST)
+
+def _chain(start_level: int, target_level: int):
+    """Transient-state transition matrix Q, absorption vector and per-state attempt cost"""
+    levels = list(range(start_level, target_level))
+    size = len(levels)
+    transient = np.zeros((size, size))
+    absorb = np.zeros(size)
+    costs = np.array([cost(level) for level in levels], dtype=float)
+    for i, level in enumerate(levels):
+        p = success_probability(level)
+        if i + 1 < size:
+            transient[i, i + 1] = p
+        else:
+            absorb[i] = p
+        fail = 1 - p
+        if i > 0:
+            transient[i, i - 1] += fail * FAILURE_DOWNGRADE_CHANCE
+            transient[i, i] += fail * (1 - FAILURE_DOWNGRADE_CHANCE)
+        else:
+            transient[i, i] += fail  # +start_level is the floor of the chain
+    return transient, absorb, costs
+
+def _moments(transient: np.ndarray, reward: np.ndarray):
+    """Mean and variance of the total reward collected before absorption, from the first state"""
+    fundamental = np.linalg.inv(np.eye(len(reward)) - transient)
+    mean = fundamental @ reward
+    second = fundamental @ (reward ** 2 + 2 * reward * (transient @ mean))
+    return float(mean[0]), float(max(second[0] - mean[0] ** 2, 0.0))
+
+@lru_cache(maxsize=None)
+def _attempt_distribution(start_level: int, target_level: int) -> tuple:
+    transient, absorb, _ = _chain(start_level, target_level)
+    state = np.zeros(len(absorb))
+    state[0] = 1.0
+    pmf = [0.0]  # nothing is reached in zero attempts
+    remaining = 1.0
+    while remaining > DISTRIBUTION_TAIL and len(pmf) <= MAX_DISTRIBUTION_ATTEMPTS:
+        finished = float(state @ absorb)
+        state = state @ transient
+        pmf.append(finished)
+        remaining -= finished
+    return tuple(pmf)
+
+def attempt_distribution(start_level: int, target_level: int) -> np.ndarray:
+    """P(exactly k attempts are needed to go from +start_level to +target_level), k = 0, 1, ..."""
+    if target_level <= start_level:
+        return np.array([1.0])
+    return np.array(_attempt_distribution(start_level, target_level))
+
+def _percentile(pmf: np.ndarray, q: float) -> int:
+    return int(np.searchsorted(np.cumsum(pmf), q - 1e-12))
+
+@lru_cache(maxsize=None)
+def _forecast(start_level: int, target_level: int) -> tuple:
+    transient, _, costs = _chain(start_level, target_level)
+    expected_cost, cost_variance = _moments(transient, costs)
+    expected_attempts, attempts_variance = _moments(transient, np.ones(len(costs)))
+    pmf = attempt_distribution(start_level, target_level)
+    return (
+        ("start_level", start_level),
+        ("target_level", target_level),
+        ("expected_cost", expected_cost),
+        ("cost_std", math.sqrt(cost_variance)),
+        ("expected_attempts", expected_attempts),
+        ("attempts_std", math.sqrt(attempts_variance)),
+        ("attempts_p50", _percentile(pmf, 0.5)),
+        ("attempts_p90", _percentile(pmf, 0.9)),
+        ("attempts_p99", _percentile(pmf, 0.99)),
+    )
+
+def forecast(start_level: int, target_level: int) -> Dict[str, Any]:
+    """Expected XP cost, variance and attempt percentiles for enhancing +start_level to +target_level"""
+    if not 0 <= start_level < target_level <= MAX_LEVEL:
+        raise ValueError(f"Need 0 <= start_level < target_level <= {MAX_LEVEL}")
+    return dict(_forecast(start_level, target_level))
+
+def economy_table(start_level: int = 0) -> List[Dict[str, Any]]:
+    """forecast() from start_level to every higher level"""
+    return [forecast(start_level, target) for target in range(start_level + 1, MAX_LEVEL + 1)]
+
+def curves() -> List[Dict[str, Any]]:
+    return [
+        {"level": level, "cost": cost(level), "success_rate": success_rate(level)}
+        for level in range(MAX_LEVEL)
+    ]
+
+def simulate(start_level: int, target_level: int, trials: int,
+             rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """Monte Carlo attempts and XP cost per trial (no-downgrade rules only)"""
+    rng = rng or np.random.default_rng()
+    attempts = np.zeros(trials, dtype=np.int64)
+    total_cost = np.zeros(trials, dtype=np.int64)
+    for level in range(start_level, target_level):
+        # Attempts spent at +level until the first success
+        tries = rng.geometric(success_probability(level), size=trials)
+        attempts += tries
+        total_cost += tries * cost(level)
+    return {"attempts": attempts, "cost": total_cost}
+
+def _z_score(simulated: np.ndarray, expected: float, std: float) -> float:
+    """z statistic of a simulated mean against its exact value"""
+    difference = float(simulated.mean()) - expected
+    if std == 0:
+        return 0.0 if abs(difference) < 1e-9 else math.inf
+    return difference / (std / math.sqrt(len(simulated)))
+
+def compare_with_simulation(start_level: int, target_level: int, trials: int = 200000,
+                            rng: Optional[np.random.Generator] = None) -> Dict[str, float]:
+    """z scores of the simulated means against the exact Markov results"""
+    exact = forecast(start_level, target_level)
+    simulated = simulate(start_level, target_level, trials, rng)
+    return {
+        "expected_cost": exact["expected_cost"],
+        "simulated_cost": float(simulated["cost"].mean()),
+        "cost_z": _z_score(simulated["cost"], exact["expected_cost"], exact["cost_std"]),
+        "expected_attempts": exact["expected_attempts"],
+        "simulated_attempts": float(simulated["attempts"].mean()),
+        "attempts_z": _z_score(simulated["attempts"], exact["expected_attempts"], exact["attempts_std"]),
+        "cost_std": exact["cost_std"],
+        "simulated_cost_std": float(simulated["cost"].std())
+    }
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=int, default=0, help="starting enhancement level")
+    parser.add_argument("--check", action="store_true", help="compare against a Monte Carlo simulation and exit")
+    parser.add_argument("--trials", type=int, default=200000)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv[1:])
+
+    if args.check:
+        rng = np.random.default_rng(args.seed)
+        worst = 0.0
+        for target in range(args.start + 1, MAX_LEVEL + 1):
+            comparison = compare_with_simulation(args.start, target, args.trials, rng)
+            worst = max(worst, abs(comparison["cost_z"]), abs(comparison["attempts_z"]))
+            print(f"+{args.start} -> +{target}: {json.dumps(comparison)}")
+        print(f"worst |z| = {worst:.2f}")
+        return 0 if worst < 4 else 1
+
+    print(json.dumps({"curves": curves(), "table": economy_table(args.start)}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
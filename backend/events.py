@@ -0,0 +1,190 @@
+"""Per-player push events.
+
+Handlers and DatabaseManager publish events (level-ups, drops, quest
+completions, penalty zone sessions) to an in-process bus; every open
+/players/{id}/events stream of that player receives them as Server-Sent
+Events. Penalty zone ticks are computed from the session's start_time by the
+stream itself, so a running countdown costs no database reads.
+
+The bus is per worker process: a client only sees events published by the
+worker its stream is connected to, plus the state the stream reads once when
+it opens.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Set
+import asyncio
+import itertools
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = int(os.environ.get("EVENTS_MAX_CONNECTIONS", "5000"))
+MAX_CONNECTIONS_PER_PLAYER = int(os.environ.get("EVENTS_MAX_CONNECTIONS_PER_PLAYER", "3"))
+QUEUE_SIZE = int(os.environ.get("EVENTS_QUEUE_SIZE", "100"))
+HEARTBEAT_SECONDS = float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", "15"))
+PENALTY_TICK_SECONDS = float(os.environ.get("EVENTS_PENALTY_TICK_SECONDS", "10"))
+RETRY_MILLISECONDS = 5000
+
+class ConnectionLimitError(Exception):
+    pass
+
+def penalty_progress(start_time: datetime, duration_minutes: int, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Countdown of a penalty zone session, derived only from its start time"""
+    now = now or datetime.utcnow()
+    elapsed_minutes = max(0.0, (now - start_time).total_seconds() / 60)
+    remaining_minutes = max(0.0, duration_minutes - elapsed_minutes)
+    return {
+        "elapsed_minutes": int(elapsed_minutes),
+        "remaining_minutes": int(remaining_minutes),
+        "remaining_seconds": int(remaining_minutes * 60),
+        "progress_percent": min(100, (elapsed_minutes / duration_minutes) * 100) if duration_minutes else 100,
+        "status": "SURVIVING" if remaining_minutes > 0 else "ESCAPED"
+    }
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+class Subscription:
+    """One open stream; a bounded queue that drops its oldest events when the client falls behind"""
+
+    def __init__(self, bus: "EventBus", player_id: str, queue_size: int):
+        self.bus = bus
+        self.player_id = player_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, event: Dict[str, Any]):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.bus.dropped += 1
+        self.queue.put_nowait(event)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.bus.unsubscribe(self)
+
+class EventBus:
+    def __init__(self, max_connections: int = MAX_CONNECTIONS,
+                 max_connections_per_player: int = MAX_CONNECTIONS_PER_PLAYER, queue_size: int = QUEUE_SIZE):
+        self.max_connections = max_connections
+        self.max_connections_per_player = max_connections_per_player
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._ids = itertools.count(1)
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def subscribe(self, player_id: str) -> Subscription:
+        """Open a subscription, or raise ConnectionLimitError"""
+        player_subscribers = self._subscribers.get(player_id, set())
+        if self.connections >= self.max_connections:
+            self.rejected += 1
+            raise ConnectionLimitError("Too many open event streams - try again later")
+        if len(player_subscribers) >= self.max_connections_per_player:
+            self.rejected += 1
+            raise ConnectionLimitError(
+                f"At most {self.max_connections_per_player} event streams per player - close one first"
+            )
+        subscription = Subscription(self, player_id, self.queue_size)
+        self._subscribers.setdefault(player_id, set()).add(subscription)
+        self.connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        player_subscribers = self._subscribers.get(subscription.player_id)
+        if player_subscribers and subscription in player_subscribers:
+            player_subscribers.discard(subscription)
+            self.connections -= 1
+            if not player_subscribers:
+                del self._subscribers[subscription.player_id]
+
+    def publish(self, player_id: str, event_type: str, data: Optional[Dict[str, Any]] = None) -> int:
+        """Queue an event for every stream of player_id; never blocks and never raises"""
+        player_subscribers = self._subscribers.get(player_id)
+        if not player_subscribers:
+            return 0
+        event = {"id": next(self._ids), "type": event_type, "data": data or {}}
+        self.published += 1
+        for subscription in player_subscribers:
+            subscription.offer(event)
+        self.delivered += len(player_subscribers)
+        return len(player_subscribers)
+
+    def is_subscribed(self, player_id: str) -> bool:
+        return player_id in self._subscribers
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "players": len(self._subscribers),
+            "max_connections": self.max_connections,
+            "max_connections_per_player": self.max_connections_per_player,
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "rejected": self.rejected
+        }
+
+event_bus = EventBus()
+
+async def event_stream(subscription: Subscription, penalty_session: Optional[Dict[str, Any]] = None,
+                       is_disconnected=None) -> AsyncIterator[str]:
+    """SSE frames for one subscription: published events, penalty ticks and heartbeats.
+
+    penalty_session is the player's running session ({"id", "start_time",
+    "duration_minutes"}) when the stream opens; a later penalty_started event
+    replaces it.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        yield format_sse("connected", {"player_id": subscription.player_id})
+        reported_drops = 0
+        next_beat = loop.time()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), max(0.0, next_beat - loop.time()))
+            except asyncio.TimeoutError:
+                event = None
+            if is_disconnected is not None and await is_disconnected():
+                return
+
+            if subscription.dropped > reported_drops:
+                # The client fell behind; tell it to refetch instead of trusting its state
+                yield format_sse("lagged", {"dropped": subscription.dropped - reported_drops})
+                reported_drops = subscription.dropped
+
+            if event is not None:
+                if event["type"] == "penalty_started":
+                    penalty_session = event["data"]
+                    next_beat = loop.time()
+                yield format_sse(event["type"], event["data"], event["id"])
+                if loop.time() < next_beat:
+                    continue
+
+            # Ticks and heartbeats keep their own schedule however busy the queue is
+            if penalty_session:
+                progress = penalty_progress(penalty_session["start_time"], penalty_session["duration_minutes"])
+                yield format_sse("penalty_tick", {"session_id": penalty_session["id"], **progress})
+                if progress["status"] == "ESCAPED":
+                    yield format_sse("penalty_ended", {"session_id": penalty_session["id"]})
+                    penalty_session = None
+            elif event is None:
+                yield ": heartbeat\n\n"
+            next_beat = loop.time() + (PENALTY_TICK_SECONDS if penalty_session else HEARTBEAT_SECONDS)
+    finally:
+        subscription.close()
@@ -1,65 +1,58 @@
 from typing import Dict, List, Any, Optional
 from models import *
 from database import database
+from level_curve import get_curve
+import enhancement
+import power
 import random
 import math
 
+# Dungeon combat balance, shared with the batch simulator in balance_sim.py
+DUNGEON_DIFFICULTY = {
+    HunterRank.E: 100,
+    HunterRank.D: 300,
+    HunterRank.C: 800,
+    HunterRank.B: 2000,
+    HunterRank.A: 5000,
+    HunterRank.S: 12000
+}
+POWER_ROLL_RANGE = (0.8, 1.2)
+SUCCESS_THRESHOLD = 0.7
+CLEAR_TIME_RANGE = (300, 1800)  # 5-30 minutes
+EQUIPMENT_DROP_CHANCE = 0.3
+DROP_RARITY_CHANCES = {
+    ItemRarity.COMMON: 0.4,
+    ItemRarity.RARE: 0.3,
+    ItemRarity.EPIC: 0.2,
+    ItemRarity.LEGENDARY: 0.08,
+    ItemRarity.MYTHIC: 0.02
+}
+
 class GameLogic:
-    def __init__(self):
-        self.level_exp_requirements = {
-            1: 1000,
-            2: 2000,
-            3: 3500,
-            4: 5500,
-            5: 8000,
-            # Exponential growth
-        }
-    
     def calculate_level_requirement(self, level: int) -> int:
         """Calculate experience requirement for a given level"""
-        if level <= 5:
-            return self.level_exp_requirements.get(level, 1000)
-        # Exponential formula for higher levels
-        return int(1000 * (1.5 ** (level - 1)))
+        return get_curve().requirement(level)
     
     def calculate_level_from_exp(self, total_exp: int) -> int:
         """Calculate level from total experience"""
-        level = 1
-        while total_exp >= self.calculate_level_requirement(level):
-            total_exp -= self.calculate_level_requirement(level)
-            level += 1
-        return level
+        return get_curve().level_for_exp(total_exp)
     
     def get_stat_bonus_for_level(self, level: int) -> int:
         """Get stat bonus points for leveling up"""
-        if level <= 10:
-            return 3
-        elif level <= 25:
-            return 4
-        elif level <= 50:
-            return 5
-        else:
-            return 6
+        return get_curve().stat_bonus(level)
     
     def calculate_combat_power(self, player: Player, equipment: List[Equipment]) -> int:
-        """Calculate total combat power"""
-        base_power = (
-            player.stats.strength * 2 +
-            player.stats.agility * 1.5 +
-            player.stats.intelligence * 1.8 +
-            player.stats.vitality * 1.2 +
-            player.stats.sense * 1.0
-        )
-        
-        equipment_power = 0
-        for item in equipment:
-            if item.equipped:
-                if item.attack:
-                    equipment_power += item.attack
-                if item.defense:
-                    equipment_power += item.defense * 0.8
-        
-        return int(base_power + equipment_power)
+        """Calculate total combat power from base stats and the equipped items"""
+        gear = power.sum_bonuses(item for item in equipment if item.equipped)
+        return power.combat_power(power.effective_stats(player.stats.dict(), gear))
+    
+    def calculate_shadow_army_power(self, shadow_attack: int, shadow_defense: int) -> int:
+        """Shadows add a tenth of their combined attack and defense"""
+        return (shadow_attack + shadow_defense) // 10
+    
+    def calculate_total_power(self, player: Player, shadow_attack: int, shadow_defense: int) -> int:
+        """Total power used for the hunter rankings"""
+        return player.combat_power + self.calculate_shadow_army_power(shadow_attack, shadow_defense)
     
     def calculate_hp_mp(self, player: Player) -> Dict[str, int]:
         """Calculate HP and MP based on stats"""
@@ -151,41 +144,25 @@ class GameLogic:
     
     def simulate_dungeon_combat(self, player: Player, dungeon: Dungeon) -> Dict[str, Any]:
         """Simulate dungeon combat and return results"""
-        player_power = self.calculate_combat_power(player, [])
-        dungeon_difficulty = {
-            HunterRank.E: 100,
-            HunterRank.D: 300,
-            HunterRank.C: 800,
-            HunterRank.B: 2000,
-            HunterRank.A: 5000,
-            HunterRank.S: 12000
-        }
-        
-        required_power = dungeon_difficulty[dungeon.difficulty]
+        player_power = player.combat_power
+        required_power = DUNGEON_DIFFICULTY[dungeon.difficulty]
         success_rate = min(player_power / required_power, 1.0)
         
         # Add some randomness
-        success_rate *= random.uniform(0.8, 1.2)
+        success_rate *= random.uniform(*POWER_ROLL_RANGE)
         
-        success = success_rate >= 0.7
+        success = success_rate >= SUCCESS_THRESHOLD
         
         if success:
             # Calculate rewards
-            exp_reward = dungeon_difficulty[dungeon.difficulty] // 10
+            exp_reward = required_power // 10
             
             # Chance for equipment drop
             equipment_drop = None
-            if random.random() < 0.3:  # 30% chance
-                rarity_chances = {
-                    ItemRarity.COMMON: 0.4,
-                    ItemRarity.RARE: 0.3,
-                    ItemRarity.EPIC: 0.2,
-                    ItemRarity.LEGENDARY: 0.08,
-                    ItemRarity.MYTHIC: 0.02
-                }
+            if random.random() < EQUIPMENT_DROP_CHANCE:
                 rarity = random.choices(
-                    list(rarity_chances.keys()),
-                    weights=list(rarity_chances.values())
+                    list(DROP_RARITY_CHANCES.keys()),
+                    weights=list(DROP_RARITY_CHANCES.values())
                 )[0]
                 equipment_drop = self.generate_random_equipment(player.level, rarity)
             
@@ -193,18 +170,59 @@ class GameLogic:
                 "success": True,
                 "exp_gained": exp_reward,
                 "equipment_drop": equipment_drop,
-                "clear_time": random.randint(300, 1800),  # 5-30 minutes
+                "clear_time": random.randint(*CLEAR_TIME_RANGE),
                 "damage_taken": random.randint(0, player.hp // 3)
             }
         else:
             return {
                 "success": False,
-                "exp_gained": dungeon_difficulty[dungeon.difficulty] // 50,  # Small consolation exp
+                "exp_gained": required_power // 50,  # Small consolation exp
                 "equipment_drop": None,
                 "clear_time": None,
                 "damage_taken": random.randint(player.hp // 3, player.hp - 1)
             }
     
+    def enhancement_cost(self, level: int) -> int:
+        """XP charged for an enhancement attempt on a +level item"""
+        return enhancement.cost(level)
+    
+    def enhancement_success_rate(self, level: int) -> int:
+        """Success chance in percent for an attempt on a +level item"""
+        return enhancement.success_rate(level)
+    
+    def enhancement_stat_boost(self, item: Equipment) -> int:
+        return enhancement.stat_boost(item.attack or item.defense)
+    
+    def roll_enhancements(self, item: Equipment, available_exp: int, target_level: int) -> Dict[str, Any]:
+        """Attempt enhancements until the item reaches target_level or the XP runs out"""
+        target_level = min(target_level, enhancement.MAX_LEVEL)
+        attempts = []
+        level = item.enhancement_level
+        attack, defense = item.attack, item.defense
+        total_cost = 0
+        total_boost = 0
+        
+        while level < target_level and total_cost + self.enhancement_cost(level) <= available_exp:
+            cost = self.enhancement_cost(level)
+            total_cost += cost
+            success = random.randint(1, 100) <= self.enhancement_success_rate(level)
+            boost = 0
+            if success:
+                boost = enhancement.stat_boost(attack or defense)
+                attack = attack + boost if attack else attack
+                defense = defense + boost if defense else defense
+                total_boost += boost
+            attempts.append({"from_level": level, "cost": cost, "success": success, "stat_increase": boost})
+            level += 1 if success else 0
+        
+        return {
+            "attempts": attempts,
+            "start_level": item.enhancement_level,
+            "final_level": level,
+            "total_cost": total_cost,
+            "stat_increase": total_boost
+        }
+    
     def calculate_quest_rewards(self, quest: Quest) -> Dict[str, Any]:
         """Calculate rewards for completing a quest"""
         base_exp = {
@@ -235,64 +253,13 @@ class GameLogic:
     
     def get_rank_from_level(self, level: int) -> HunterRank:
         """Determine hunter rank based on level"""
-        if level < 10:
-            return HunterRank.E
-        elif level < 20:
-            return HunterRank.D
-        elif level < 30:
-            return HunterRank.C
-        elif level < 40:
-            return HunterRank.B
-        elif level < 50:
-            return HunterRank.A
-        else:
-            return HunterRank.S
+        return HunterRank(get_curve().rank_for_level(level))
     
     async def level_up_player(self, player_id: str, exp_gained: int) -> Dict[str, Any]:
-        """Level up a player and return level up information"""
-        player = await database.get_player(player_id)
-        if not player:
+        """Award experience, level up the player and return level up information"""
+        result = await database.apply_rewards(player_id, exp=exp_gained)
+        if not result:
             return {"error": "Player not found"}
-        
-        new_exp = player.experience + exp_gained
-        current_level = player.level
-        new_level = self.calculate_level_from_exp(new_exp)
-        
-        level_up_info = {
-            "leveled_up": new_level > current_level,
-            "old_level": current_level,
-            "new_level": new_level,
-            "exp_gained": exp_gained,
-            "stat_points_gained": 0,
-            "new_rank": None
-        }
-        
-        if new_level > current_level:
-            # Calculate stat points gained
-            stat_points = sum(self.get_stat_bonus_for_level(level) for level in range(current_level + 1, new_level + 1))
-            level_up_info["stat_points_gained"] = stat_points
-            
-            # Check for rank up
-            new_rank = self.get_rank_from_level(new_level)
-            if new_rank != player.rank:
-                level_up_info["new_rank"] = new_rank
-            
-            # Update player
-            hp_mp = self.calculate_hp_mp(Player(
-                **player.dict(),
-                level=new_level,
-                experience=new_exp
-            ))
-            
-            updates = PlayerUpdate(
-                level=new_level,
-                experience=new_exp,
-                experience_to_next=self.calculate_level_requirement(new_level + 1),
-                rank=new_rank if new_rank != player.rank else player.rank
-            )
-            
-            await database.update_player(player_id, updates)
-        
-        return level_up_info
+        return result.level_up_info()
 
-game_logic = GameLogic()
\ No newline at end of file
+game_logic = GameLogic()
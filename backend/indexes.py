@@ -0,0 +1,162 @@
+from pydantic import BaseModel
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+from typing import List, Dict, Any, Tuple
+from database import db
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IndexSpec(BaseModel):
+    collection: str
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    reason: str
+
+    @property
+    def name(self) -> str:
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def to_index_model(self) -> IndexModel:
+        return IndexModel(self.keys, name=self.name, unique=self.unique)
+
+# Every access pattern used by DatabaseManager and server.py, one entry per index
+INDEX_PLAN: List[IndexSpec] = [
+    IndexSpec(collection="players", keys=[("id", 1)], unique=True,
+              reason="get_player / update_player by id"),
+    IndexSpec(collection="equipment", keys=[("id", 1)], unique=True,
+              reason="equip_item and enhancement lookups by {id, player_id}"),
+    IndexSpec(collection="equipment", keys=[("player_id", 1), ("type", 1)],
+              reason="equipped items by {player_id, type}"),
+    IndexSpec(collection="equipment", keys=[("player_id", 1), ("_id", 1)],
+              reason="inventory pages and streams by player in _id order"),
+    IndexSpec(collection="consumables", keys=[("player_id", 1)],
+              reason="consumables by player"),
+    IndexSpec(collection="shadows", keys=[("id", 1)], unique=True,
+              reason="get_shadow and upgrade_shadow by id"),
+    IndexSpec(collection="shadows", keys=[("player_id", 1), ("_id", 1)],
+              reason="shadow army pages, streams and reconciliation by player"),
+    IndexSpec(collection="skills", keys=[("player_id", 1)],
+              reason="skills by player"),
+    IndexSpec(collection="quests", keys=[("id", 1)], unique=True,
+              reason="get_quest / update_quest_progress by id"),
+    IndexSpec(collection="quests", keys=[("player_id", 1), ("_id", 1)],
+              reason="quest pages and streams by player"),
+    IndexSpec(collection="dungeons", keys=[("id", 1)], unique=True,
+              reason="dungeon catalog misses by id"),
+    IndexSpec(collection="dungeons", keys=[("name", 1)], unique=True,
+              reason="catalog seeding upserts by name; one document per dungeon across workers"),
+    IndexSpec(collection="dungeon_attempts", keys=[("id", 1)], unique=True,
+              reason="attempt updates by id"),
+    IndexSpec(collection="dungeon_attempts", keys=[("player_id", 1), ("_id", 1)],
+              reason="attempt history pages and streams by player"),
+    IndexSpec(collection="story_chapters", keys=[("player_id", 1), ("chapter_number", 1)],
+              reason="legacy per-player chapters until compact_story_chapters has run"),
+    IndexSpec(collection="rankings", keys=[("category", 1), ("player_id", 1)], unique=True,
+              reason="leaderboard upserts by {category, player_id}"),
+    IndexSpec(collection="rankings", keys=[("category", 1), ("updated_at", 1)],
+              reason="leaderboard rebuild cleanup of stale rankings"),
+    IndexSpec(collection="guild_members", keys=[("player_id", 1)],
+              reason="guild membership by player"),
+    IndexSpec(collection="daily_quests", keys=[("player_id", 1), ("date", 1)], unique=True,
+              reason="today's daily quest by {player_id, date}"),
+    IndexSpec(collection="daily_quests", keys=[("date", 1), ("failed", 1)],
+              reason="daily rollover failure marking and penalty assignment by date"),
+    IndexSpec(collection="penalty_zones", keys=[("id", 1)], unique=True,
+              reason="penalty zone status by {id, player_id}"),
+    IndexSpec(collection="penalty_zones", keys=[("player_id", 1), ("start_time", -1)],
+              reason="a player's latest open penalty session"),
+]
+
+class IndexManager:
+    def __init__(self, database, plan: List[IndexSpec] = INDEX_PLAN):
+        self.db = database
+        self.plan = plan
+
+    def plan_by_collection(self) -> Dict[str, List[IndexSpec]]:
+        grouped: Dict[str, List[IndexSpec]] = {}
+        for spec in self.plan:
+            grouped.setdefault(spec.collection, []).append(spec)
+        return grouped
+
+    def describe_plan(self) -> List[Dict[str, Any]]:
+        return [{**spec.dict(), "name": spec.name} for spec in self.plan]
+
+    async def ensure_indexes(self) -> Dict[str, Any]:
+        """Create every planned index; existing indexes are left untouched.
+
+        Indexes are created one at a time so a conflicting spec only costs
+        that index; failures are reported under "collection.index_name".
+        """
+        created: Dict[str, List[str]] = {}
+        errors: Dict[str, str] = {}
+        for collection_name, specs in self.plan_by_collection().items():
+            collection = self.db[collection_name]
+            try:
+                await self._drop_changed(collection_name, specs)
+            except OperationFailure as e:
+                logger.error(f"Could not check existing indexes on {collection_name}: {e}")
+                errors[collection_name] = str(e)
+            created[collection_name] = []
+            for spec in specs:
+                try:
+                    created[collection_name] += await collection.create_indexes([spec.to_index_model()])
+                except OperationFailure as e:
+                    # e.g. a unique index over documents that already contain duplicates,
+                    # or an index of the same name with other options
+                    logger.error(f"Could not create index {collection_name}.{spec.name}: {e}")
+                    errors[f"{collection_name}.{spec.name}"] = str(e)
+        return {"created": created, "errors": errors}
+
+    async def _drop_changed(self, collection_name: str, specs: List[IndexSpec]):
+        """Drop indexes whose uniqueness changed in the plan so they can be recreated"""
+        existing = await self.db[collection_name].index_information()
+        for spec in specs:
+            info = existing.get(spec.name)
+            if info is not None and bool(info.get("unique")) != spec.unique:
+                logger.info(f"Recreating {collection_name}.{spec.name} with unique={spec.unique}")
+                try:
+                    await self.db[collection_name].drop_index(spec.name)
+                except OperationFailure:
+                    pass  # another worker dropped it first
+
+    async def audit(self) -> Dict[str, Any]:
+        """Compare the plan with what exists and report missing, unplanned and unused indexes"""
+        report = {"missing": [], "unplanned": [], "unused": [], "usage": {}}
+        planned = self.plan_by_collection()
+        collection_names = set(planned) | set(await self.db.list_collection_names())
+
+        for collection_name in sorted(collection_names):
+            collection = self.db[collection_name]
+            existing = await collection.index_information()
+            existing_keys = {
+                tuple((field, int(direction)) for field, direction in info["key"]): name
+                for name, info in existing.items()
+            }
+            specs = planned.get(collection_name, [])
+            planned_keys = {tuple(spec.keys) for spec in specs}
+
+            for spec in specs:
+                if tuple(spec.keys) not in existing_keys:
+                    report["missing"].append({"collection": collection_name, "name": spec.name})
+            for keys, name in existing_keys.items():
+                if name != "_id_" and keys not in planned_keys:
+                    report["unplanned"].append({"collection": collection_name, "name": name})
+
+            usage = await self._index_usage(collection)
+            report["usage"][collection_name] = usage
+            for name, ops in usage.items():
+                if name != "_id_" and ops == 0:
+                    report["unused"].append({"collection": collection_name, "name": name})
+
+        return report
+
+    async def _index_usage(self, collection) -> Dict[str, int]:
+        # $indexStats counts operations since the last mongod restart
+        try:
+            stats = await collection.aggregate([{"$indexStats": {}}]).to_list(None)
+        except OperationFailure:
+            return {}
+        return {stat["name"]: stat["accesses"]["ops"] for stat in stats}
+
+index_manager = IndexManager(db)
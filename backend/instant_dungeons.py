@@ -0,0 +1,179 @@
+"""Instant dungeon catalog.
+
+Instant dungeons are static game data: each one is defined once as an
+InstantDungeon and compiled into an InstantDungeonCatalog holding the API
+payloads, an interval index over [min_level, max_level] and the encounter
+tables the engine rolls against. The catalog can be replaced from a JSON
+file (INSTANT_DUNGEONS_FILE) holding a list of InstantDungeon objects, e.g.
+
+    [{"id": "ant_island", "name": "🐜 Jeju Island", "description": "...",
+      "min_level": 60, "max_level": 80, "entry_cost": 5000,
+      "rewards": ["Ant King Shadow"], "enemies": ["Soldier Ant", "Ant King"],
+      "exp_range": [300, 900]}]
+"""
+from bisect import bisect_right
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Optional, Dict, Tuple, Any
+import json
+import logging
+import os
+import threading
+import time
+
+from encounters import DEFAULT_TABLE, ENEMY_POWER_RANGE, EXP_RANGE, SHADOW_CHANCE, EncounterTable
+
+logger = logging.getLogger(__name__)
+
+class InstantDungeon(BaseModel):
+    id: str
+    name: str
+    description: str
+    min_level: int
+    max_level: int
+    entry_cost: int = 0
+    rewards: List[str] = []
+    easter_egg: Optional[str] = None
+    # Encounter engine parameters
+    enemies: List[str]
+    enemy_power_range: Tuple[int, int] = ENEMY_POWER_RANGE
+    exp_range: Tuple[int, int] = EXP_RANGE
+    shadow_chance: float = SHADOW_CHANCE
+
+    def payload(self) -> Dict[str, Any]:
+        """What /instant-dungeons shows for this dungeon"""
+        return self.dict(include={"id", "name", "description", "min_level", "max_level",
+                                  "entry_cost", "rewards", "easter_egg"})
+
+DEFAULT_INSTANT_DUNGEONS = [
+    InstantDungeon(
+        id="training_grounds",
+        name="🏟️ Training Grounds",
+        description="Perfect for beginners. Weak goblins and slimes await.",
+        min_level=1,
+        max_level=10,
+        entry_cost=0,
+        rewards=["XP", "Basic Equipment", "Goblin Shadows"],
+        easter_egg="🎮 Tutorial dungeon - even your grandma could clear this!",
+        enemies=["Goblin", "Slime", "Wolf"]
+    ),
+    InstantDungeon(
+        id="shadow_realm",
+        name="🌑 Shadow Realm",
+        description="Where shadows come to train. Mysterious and dangerous.",
+        min_level=15,
+        max_level=30,
+        entry_cost=100,
+        rewards=["Shadow Essence", "Dark Equipment", "Rare Shadows"],
+        easter_egg="👻 'Welcome to the shadow realm, Jimbo!' - Yu-Gi-Oh vibes",
+        enemies=["Shadow Goblin", "Dark Wraith", "Void Walker"]
+    ),
+    InstantDungeon(
+        id="monarchs_trial",
+        name="👑 Monarch's Trial",
+        description="The ultimate test. Only for those who dare to become kings.",
+        min_level=40,
+        max_level=50,
+        entry_cost=1000,
+        rewards=["Monarch Equipment", "Ancient Shadows", "Crown Fragments"],
+        easter_egg="🏆 'Heavy is the head that wears the crown...' 👑",
+        enemies=["Elite Knight", "Ancient Dragon", "Demon Lord"]
+    ),
+]
+
+class InstantDungeonCatalog:
+    """Compiled, read-only view of a list of instant dungeons.
+
+    The payload dicts are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, dungeons: List[InstantDungeon]):
+        ordered = sorted(dungeons, key=lambda dungeon: (dungeon.min_level, dungeon.max_level, dungeon.id))
+        self.dungeons: Dict[str, InstantDungeon] = {dungeon.id: dungeon for dungeon in ordered}
+        if len(self.dungeons) != len(ordered):
+            raise ValueError("Instant dungeon ids must be unique")
+        for dungeon in ordered:
+            if dungeon.min_level > dungeon.max_level or not dungeon.enemies:
+                raise ValueError(f"Instant dungeon {dungeon.id} needs min_level <= max_level and enemies")
+
+        self.tables: Dict[str, EncounterTable] = {
+            dungeon.id: EncounterTable(
+                enemies=tuple(dungeon.enemies),
+                enemy_power_range=tuple(dungeon.enemy_power_range),
+                exp_range=tuple(dungeon.exp_range),
+                shadow_chance=dungeon.shadow_chance
+            )
+            for dungeon in ordered
+        }
+        self._payloads: Tuple[Dict[str, Any], ...] = tuple(dungeon.payload() for dungeon in ordered)
+        self._min_levels: List[int] = [dungeon.min_level for dungeon in ordered]
+
+        # Interval index: the level line is cut at every min_level and max_level + 1;
+        # _segment_dungeons[i] holds the dungeons whose range covers [_breaks[i], _breaks[i + 1])
+        self._breaks: List[int] = sorted(
+            {dungeon.min_level for dungeon in ordered} | {dungeon.max_level + 1 for dungeon in ordered}
+        )
+        self._segment_dungeons: List[Tuple[Dict[str, Any], ...]] = [
+            tuple(payload for dungeon, payload in zip(ordered, self._payloads)
+                  if dungeon.min_level <= start <= dungeon.max_level)
+            for start in self._breaks
+        ]
+
+    def __len__(self) -> int:
+        return len(self.dungeons)
+
+    def get(self, dungeon_id: str) -> Optional[InstantDungeon]:
+        return self.dungeons.get(dungeon_id)
+
+    def table_for(self, dungeon_id: str) -> EncounterTable:
+        """The encounter table of dungeon_id; unknown ids fight goblins"""
+        return self.tables.get(dungeon_id, DEFAULT_TABLE)
+
+    def unlocked_for(self, level: int) -> Tuple[Dict[str, Any], ...]:
+        """Payloads of every dungeon with min_level <= level"""
+        return self._payloads[:bisect_right(self._min_levels, level)]
+
+    def in_range_for(self, level: int) -> Tuple[Dict[str, Any], ...]:
+        """Payloads of the dungeons with min_level <= level <= max_level"""
+        segment = bisect_right(self._breaks, level) - 1
+        return self._segment_dungeons[segment] if segment >= 0 else ()
+
+_dungeon_list = TypeAdapter(List[InstantDungeon])
+_catalog = InstantDungeonCatalog(DEFAULT_INSTANT_DUNGEONS)
+_catalog_file = os.environ.get("INSTANT_DUNGEONS_FILE")
+_catalog_mtime: Optional[float] = None
+_last_check = 0.0
+_reload_lock = threading.Lock()
+RELOAD_CHECK_SECONDS = 5.0
+
+def get_catalog() -> InstantDungeonCatalog:
+    """The active catalog, reloaded when INSTANT_DUNGEONS_FILE changes (checked every few seconds)"""
+    global _last_check, _catalog_mtime
+    if _catalog_file and time.monotonic() - _last_check > RELOAD_CHECK_SECONDS:
+        _last_check = time.monotonic()
+        mtime = None
+        try:
+            mtime = os.path.getmtime(_catalog_file)
+            if mtime != _catalog_mtime:
+                reload_catalog()
+        except (OSError, ValueError, TypeError) as e:
+            # Keep serving the previous catalog; the file is only read again once it changes
+            _catalog_mtime = mtime
+            logger.error(f"Cannot load instant dungeons from {_catalog_file}: {e}")
+    return _catalog
+
+def reload_catalog(path: Optional[str] = None) -> InstantDungeonCatalog:
+    """Load instant dungeons from path (default INSTANT_DUNGEONS_FILE) and make them active"""
+    global _catalog, _catalog_file, _catalog_mtime
+    with _reload_lock:
+        path = path or _catalog_file
+        if not path:
+            _catalog = InstantDungeonCatalog(DEFAULT_INSTANT_DUNGEONS)
+            return _catalog
+        with open(path) as handle:
+            # Wrong shapes and types surface as ValidationError, not TypeError from **data
+            dungeons = _dungeon_list.validate_python(json.load(handle))
+        _catalog = InstantDungeonCatalog(dungeons)
+        _catalog_file = path
+        _catalog_mtime = os.path.getmtime(path)
+        logger.info(f"Instant dungeons loaded from {path} ({len(_catalog)} dungeons)")
+        return _catalog
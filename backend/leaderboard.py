@@ -0,0 +1,407 @@
+from bisect import bisect_left, insort
+from pymongo import UpdateOne, ReturnDocument
+from typing import List, Optional, Dict, Any, Iterable, NamedTuple, Tuple
+from models import *
+from database import database
+from documents import from_document
+from game_logic import game_logic
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+HUNTER_CATEGORY = "hunter"
+
+# (-total_power, player_id): ascending order is the leaderboard order, ties broken by id
+RankKey = Tuple[int, str]
+# Summed (attack, defense) of a player's shadows
+ShadowPower = Tuple[int, int]
+
+# Incremental reloads re-read this much before the newest ranking already seen,
+# covering clock skew between workers and writes that were in flight
+RELOAD_OVERLAP = timedelta(seconds=30)
+
+class RankIndex:
+    """Order-statistic index over player powers.
+
+    Keys live in sorted sublists of bounded size; a Fenwick tree over the
+    sublist lengths turns "position of player" and "k-th entry" into
+    O(log n) operations instead of a sort of the whole board.
+    """
+    LOAD = 512
+
+    def __init__(self):
+        self._lists: List[List[RankKey]] = []
+        self._maxes: List[RankKey] = []
+        self._tree: List[int] = [0]
+        self._keys: Dict[str, RankKey] = {}
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[str, int]]) -> "RankIndex":
+        index = cls()
+        keys = sorted((-power, player_id) for player_id, power in items)
+        index._keys = {key[1]: key for key in keys}
+        index._lists = [keys[i:i + cls.LOAD] for i in range(0, len(keys), cls.LOAD)]
+        index._maxes = [sublist[-1] for sublist in index._lists]
+        index._build_tree()
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self._keys
+
+    def power(self, player_id: str) -> Optional[int]:
+        key = self._keys.get(player_id)
+        return -key[0] if key else None
+
+    def _build_tree(self):
+        size = len(self._lists)
+        tree = [0] * (size + 1)
+        for i in range(1, size + 1):
+            tree[i] += len(self._lists[i - 1])
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, list_index: int, delta: int):
+        i = list_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, list_index: int) -> int:
+        """Number of keys stored in the sublists before list_index"""
+        total = 0
+        i = list_index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        """Sublist index and offset of the key at a 0-based position"""
+        list_index = 0
+        remaining = position
+        step = 1 << (len(self._lists).bit_length() - 1) if self._lists else 0
+        while step:
+            candidate = list_index + step
+            if candidate <= len(self._lists) and self._tree[candidate] <= remaining:
+                list_index = candidate
+                remaining -= self._tree[candidate]
+            step >>= 1
+        return list_index, remaining
+
+    def upsert(self, player_id: str, power: int):
+        if player_id in self._keys:
+            self.remove(player_id)
+        key = (-power, player_id)
+        self._keys[player_id] = key
+
+        if not self._lists:
+            self._lists = [[key]]
+            self._maxes = [key]
+            self._build_tree()
+            return
+
+        i = min(bisect_left(self._maxes, key), len(self._lists) - 1)
+        sublist = self._lists[i]
+        insort(sublist, key)
+        self._maxes[i] = sublist[-1]
+
+        if len(sublist) > 2 * self.LOAD:
+            self._lists[i:i + 1] = [sublist[:self.LOAD], sublist[self.LOAD:]]
+            self._maxes[i:i + 1] = [self._lists[i][-1], self._lists[i + 1][-1]]
+            self._build_tree()
+        else:
+            self._tree_add(i, 1)
+
+    def remove(self, player_id: str) -> bool:
+        key = self._keys.pop(player_id, None)
+        if key is None:
+            return False
+
+        i = bisect_left(self._maxes, key)
+        sublist = self._lists[i]
+        del sublist[bisect_left(sublist, key)]
+
+        if sublist:
+            self._maxes[i] = sublist[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._build_tree()
+        return True
+
+    def position(self, player_id: str) -> Optional[int]:
+        """0-based leaderboard position"""
+        key = self._keys.get(player_id)
+        if key is None:
+            return None
+        i = bisect_left(self._maxes, key)
+        return self._prefix(i) + bisect_left(self._lists[i], key)
+
+    def slice(self, offset: int, limit: int) -> List[Tuple[str, int]]:
+        """(player_id, power) pairs for positions [offset, offset + limit)"""
+        if offset < 0 or limit <= 0 or offset >= len(self):
+            return []
+        i, j = self._locate(offset)
+        entries = []
+        while i < len(self._lists) and len(entries) < limit:
+            for negative_power, player_id in self._lists[i][j:j + limit - len(entries)]:
+                entries.append((player_id, -negative_power))
+            i, j = i + 1, 0
+        return entries
+
+class _Entry(NamedTuple):
+    player_name: str
+    level: int
+    rank: HunterRank
+    guild_name: str
+    total_power: int
+
+class Leaderboard:
+    """Materialized hunter rankings.
+
+    The rankings collection is the durable copy; each worker serves reads
+    from in-memory RankIndex boards (one overall, one per hunter rank) that
+    are kept current by refresh_player and reloaded from the collection.
+    Ranking documents also carry the player's combat power and summed shadow
+    power, so neither refreshes nor reloads have to aggregate the shadows.
+    """
+
+    def __init__(self, db_manager):
+        self.database = db_manager
+        self.rankings = db_manager.rankings
+        self.reload_interval = int(os.environ.get("LEADERBOARD_RELOAD_SECONDS", "300"))
+        self._entries: Dict[str, _Entry] = {}
+        self._overall = RankIndex()
+        self._by_rank: Dict[HunterRank, RankIndex] = {rank: RankIndex() for rank in HunterRank}
+        self._shadow_power: Dict[str, ShadowPower] = {}
+        self._loaded_through: Optional[datetime] = None
+        self._reload_task: Optional[asyncio.Task] = None
+
+    def _board(self, rank: Optional[HunterRank]) -> RankIndex:
+        return self._by_rank[rank] if rank else self._overall
+
+    def _ranking(self, player_id: str, board: RankIndex) -> Ranking:
+        entry = self._entries[player_id]
+        return Ranking(
+            player_id=player_id,
+            player_name=entry.player_name,
+            level=entry.level,
+            rank=entry.rank,
+            guild_name=entry.guild_name,
+            total_power=entry.total_power,
+            position=board.position(player_id) + 1,
+            category=HUNTER_CATEGORY
+        )
+
+    def _replace_boards(self, entries: Dict[str, _Entry]):
+        self._entries = entries
+        self._overall = RankIndex.from_items((pid, e.total_power) for pid, e in entries.items())
+        self._by_rank = {
+            rank: RankIndex.from_items(
+                (pid, e.total_power) for pid, e in entries.items() if e.rank == rank
+            )
+            for rank in HunterRank
+        }
+
+    def _apply_entry(self, player_id: str, entry: _Entry):
+        previous = self._entries.get(player_id)
+        if previous and previous.rank != entry.rank:
+            self._by_rank[previous.rank].remove(player_id)
+        self._entries[player_id] = entry
+        self._overall.upsert(player_id, entry.total_power)
+        self._by_rank[entry.rank].upsert(player_id, entry.total_power)
+
+    @staticmethod
+    def _entry_from(doc: Dict[str, Any]) -> _Entry:
+        total_power = doc["total_power"]
+        if "combat_power" in doc and "shadow_attack" in doc:
+            # Derived again: another worker may have written total_power from an outdated shadow total
+            total_power = doc["combat_power"] + game_logic.calculate_shadow_army_power(
+                doc["shadow_attack"], doc["shadow_defense"]
+            )
+        return _Entry(
+            player_name=doc["player_name"],
+            level=doc["level"],
+            rank=HunterRank(doc["rank"]),
+            guild_name=doc["guild_name"],
+            total_power=total_power
+        )
+
+    @staticmethod
+    def _entry_for(player: Player, total_power: int) -> _Entry:
+        return _Entry(
+            player_name=player.name,
+            level=player.level,
+            rank=player.rank,
+            guild_name=player.guild.name,
+            total_power=total_power
+        )
+
+    # Reads
+    def top(self, rank: Optional[HunterRank] = None, offset: int = 0, limit: int = 50) -> List[Ranking]:
+        board = self._board(rank)
+        return [self._ranking(player_id, board) for player_id, _ in board.slice(offset, limit)]
+
+    def total(self, rank: Optional[HunterRank] = None) -> int:
+        return len(self._board(rank))
+
+    def around(self, player_id: str, radius: int = 5, rank: Optional[HunterRank] = None) -> Optional[Dict[str, Any]]:
+        """A player's own ranking plus the players directly above and below"""
+        board = self._board(rank)
+        position = board.position(player_id)
+        if position is None:
+            return None
+        start = max(0, position - radius)
+        neighbourhood = board.slice(start, position - start + radius + 1)
+        return {
+            "ranking": self._ranking(player_id, board),
+            "neighbours": [self._ranking(pid, board) for pid, _ in neighbourhood]
+        }
+
+    # Writes
+    async def refresh_player(self, player_id: str, player: Optional[Player] = None,
+                             shadow_delta: Optional[ShadowPower] = None) -> Optional[Ranking]:
+        """Recompute one player's power and update the board incrementally.
+
+        Pass the player when the caller already holds a fresh post-image, and
+        shadow_delta when the call changed the player's shadows. The shadows
+        are only aggregated for a player this worker has not seen yet.
+        """
+        player = player or await self.database.get_player(player_id)
+        if not player:
+            return None
+        ranking_filter = {"category": HUNTER_CATEGORY, "player_id": player_id}
+
+        shadow_fields = {}
+        shadow_power = self._shadow_power.get(player_id)
+        if shadow_power is not None and shadow_delta:
+            # $inc on the stored total, so concurrent changes from other workers add up
+            doc = await self.rankings.find_one_and_update(
+                ranking_filter,
+                {"$inc": {"shadow_attack": shadow_delta[0], "shadow_defense": shadow_delta[1]}},
+                {"_id": 0, "shadow_attack": 1, "shadow_defense": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            shadow_power = (doc["shadow_attack"], doc["shadow_defense"]) if doc else None
+        if shadow_power is None:
+            shadow_totals = await self.database.get_shadow_power_totals([player_id])
+            shadow_power = shadow_totals.get(player_id, (0, 0))
+            shadow_fields = {"shadow_attack": shadow_power[0], "shadow_defense": shadow_power[1]}
+        self._shadow_power[player_id] = shadow_power
+        total_power = game_logic.calculate_total_power(player, *shadow_power)
+
+        self._apply_entry(player_id, self._entry_for(player, total_power))
+        ranking = self._ranking(player_id, self._overall)
+        await self.rankings.update_one(
+            ranking_filter,
+            {"$set": {
+                **ranking.dict(), **shadow_fields,
+                "combat_power": player.combat_power,
+                "updated_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+        return ranking
+
+    async def load(self) -> int:
+        """Apply the rankings written since the previous load.
+
+        The first load reads the whole collection, rebuilding it if it is empty.
+        """
+        query: Dict[str, Any] = {"category": HUNTER_CATEGORY}
+        if self._loaded_through is not None:
+            query["updated_at"] = {"$gte": self._loaded_through - RELOAD_OVERLAP}
+
+        entries = {}
+        shadow_power = {}
+        loaded_through = self._loaded_through
+        async for doc in self.rankings.find(query, {"_id": 0, "position": 0, "category": 0}):
+            entries[doc["player_id"]] = self._entry_from(doc)
+            if "shadow_attack" in doc:
+                shadow_power[doc["player_id"]] = (doc["shadow_attack"], doc["shadow_defense"])
+            updated_at = doc.get("updated_at")
+            if updated_at and (loaded_through is None or updated_at > loaded_through):
+                loaded_through = updated_at
+
+        if self._loaded_through is None:
+            if not entries:
+                return await self.rebuild()
+            self._replace_boards(entries)
+        else:
+            for player_id, entry in entries.items():
+                self._apply_entry(player_id, entry)
+        self._shadow_power.update(shadow_power)
+        self._loaded_through = loaded_through
+        return len(self._entries)
+
+    async def rebuild(self, batch_size: int = 1000) -> int:
+        """Recompute every player's power from scratch and rewrite the rankings collection"""
+        started_at = datetime.utcnow()
+        shadow_totals = await self.database.get_shadow_power_totals()
+
+        entries = {}
+        combat_power = {}
+        shadow_power = {}
+        async for doc in self.database.players.find({}, {"_id": 0}):
+            player = from_document(Player, doc)
+            shadow_power[player.id] = shadow_totals.get(player.id, (0, 0))
+            combat_power[player.id] = player.combat_power
+            total_power = game_logic.calculate_total_power(player, *shadow_power[player.id])
+            entries[player.id] = self._entry_for(player, total_power)
+        self._replace_boards(entries)
+        self._shadow_power = shadow_power
+
+        requests = []
+        for player_id, _ in self._overall.slice(0, len(self._overall)):
+            shadow_attack, shadow_defense = shadow_power[player_id]
+            requests.append(UpdateOne(
+                {"category": HUNTER_CATEGORY, "player_id": player_id},
+                {"$set": {
+                    **self._ranking(player_id, self._overall).dict(),
+                    "combat_power": combat_power[player_id],
+                    "shadow_attack": shadow_attack,
+                    "shadow_defense": shadow_defense,
+                    "updated_at": datetime.utcnow()
+                }},
+                upsert=True
+            ))
+            if len(requests) >= batch_size:
+                await self.rankings.bulk_write(requests, ordered=False)
+                requests = []
+        if requests:
+            await self.rankings.bulk_write(requests, ordered=False)
+        # Anything not touched by this rebuild or a concurrent refresh belongs to a deleted player
+        await self.rankings.delete_many({"category": HUNTER_CATEGORY, "updated_at": {"$lt": started_at}})
+        self._loaded_through = datetime.utcnow()
+
+        logger.info(f"Leaderboard rebuilt with {len(entries)} hunters")
+        return len(entries)
+
+    # Other workers write rankings too, so every worker reloads periodically
+    def start_periodic_reload(self):
+        if self.reload_interval > 0 and self._reload_task is None:
+            self._reload_task = asyncio.create_task(self._reload_loop())
+
+    async def _reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Leaderboard reload failed: {e}")
+
+    def stop_periodic_reload(self):
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            self._reload_task = None
+
+leaderboard = Leaderboard(database)
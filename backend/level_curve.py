@@ -0,0 +1,177 @@
+"""Level/XP curve engine.
+
+Cumulative XP thresholds and stat-point prefix sums are precomputed up to
+the level cap, so level lookups are a bisect instead of a level-by-level
+loop. The curve can be replaced at runtime from a JSON file
+(LEVEL_CURVE_FILE) holding CurveDefinition fields, e.g.
+
+    {"level_cap": 120, "growth": 1.45, "stat_bonus_tiers": [[10, 3], [null, 5]]}
+"""
+from bisect import bisect_right
+from pydantic import BaseModel
+from typing import List, Optional, Dict, Tuple, Any
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class CurveDefinition(BaseModel):
+    level_cap: int = 100
+    # Hand-tuned requirements for the first levels, then base * growth ** (level - 1)
+    fixed_requirements: Dict[int, int] = {1: 1000, 2: 2000, 3: 3500, 4: 5500, 5: 8000}
+    base_requirement: int = 1000
+    growth: float = 1.5
+    # (highest level of the tier, stat points per level); None means "and above"
+    stat_bonus_tiers: List[Tuple[Optional[int], int]] = [(10, 3), (25, 4), (50, 5), (None, 6)]
+    # (highest level of the tier, hunter rank); None means "and above"
+    rank_tiers: List[Tuple[Optional[int], str]] = [(9, "E"), (19, "D"), (29, "C"), (39, "B"), (49, "A"), (None, "S")]
+
+# Largest value MongoDB can store as an integer; thresholds above it are unreachable
+MAX_STORED_EXP = 2 ** 63 - 1
+
+class LevelCurve:
+    def __init__(self, definition: CurveDefinition):
+        self.definition = definition
+        self.level_cap = definition.level_cap
+
+        # requirements[level] is the XP needed to go from level to level + 1
+        self.requirements = [0] + [self._requirement_formula(level) for level in range(1, self.level_cap + 1)]
+
+        # thresholds[k] is the total XP needed to reach level k + 2
+        self.thresholds = []
+        total = 0
+        for level in range(1, self.level_cap):
+            total += self.requirements[level]
+            self.thresholds.append(total)
+
+        # stat_prefix[level] is the sum of stat bonuses for levels 1..level
+        self.stat_prefix = [0]
+        for level in range(1, self.level_cap + 1):
+            self.stat_prefix.append(self.stat_prefix[-1] + self._stat_bonus_formula(level))
+
+        dtype = np.int64 if not self.thresholds or self.thresholds[-1] < 2 ** 63 else np.float64
+        self._threshold_array = np.array(self.thresholds, dtype=dtype)
+        self._progression_stages = self._build_progression_stages()
+
+    def _requirement_formula(self, level: int) -> int:
+        if level <= max(self.definition.fixed_requirements, default=0):
+            return self.definition.fixed_requirements.get(level, self.definition.base_requirement)
+        return int(self.definition.base_requirement * (self.definition.growth ** (level - 1)))
+
+    def _stat_bonus_formula(self, level: int) -> int:
+        for highest_level, points in self.definition.stat_bonus_tiers:
+            if highest_level is None or level <= highest_level:
+                return points
+        return self.definition.stat_bonus_tiers[-1][1]
+
+    def requirement(self, level: int) -> int:
+        """XP needed to go from level to level + 1"""
+        if 1 <= level <= self.level_cap:
+            return self.requirements[level]
+        return self._requirement_formula(level)
+
+    def stat_bonus(self, level: int) -> int:
+        return self._stat_bonus_formula(level)
+
+    def level_for_exp(self, total_exp: int) -> int:
+        """Level reached with total_exp, clamped to the level cap"""
+        return 1 + bisect_right(self.thresholds, total_exp)
+
+    def levels_for_exp(self, total_exps) -> np.ndarray:
+        """Vectorized level_for_exp for bulk recalculation jobs"""
+        return np.searchsorted(self._threshold_array, np.asarray(total_exps), side="right") + 1
+
+    def rank_for_level(self, level: int) -> str:
+        for highest_level, rank in self.definition.rank_tiers:
+            if highest_level is None or level <= highest_level:
+                return rank
+        return self.definition.rank_tiers[-1][1]
+
+    def progression_stages(self) -> List[Dict[str, Any]]:
+        """Update-pipeline stages that derive level, rank and experience_to_next from experience.
+
+        Levels never go down, and rank/experience_to_next are only rewritten
+        when the level changes, so spending XP leaves them untouched.
+        """
+        return self._progression_stages
+
+    def _build_progression_stages(self) -> List[Dict[str, Any]]:
+        reachable = [threshold for threshold in self.thresholds if threshold <= MAX_STORED_EXP]
+        computed_level = {"$add": [1, {"$size": {"$filter": {
+            "input": {"$literal": reachable},
+            "cond": {"$lte": ["$$this", "$experience"]}
+        }}}]}
+        rank_branches = [
+            {"case": {"$lte": ["$level", highest_level]}, "then": rank}
+            for highest_level, rank in self.definition.rank_tiers if highest_level is not None
+        ]
+        next_requirements = [min(self.requirement(level), MAX_STORED_EXP) for level in range(0, self.level_cap + 2)]
+        leveled_up = {"$gt": ["$level", "$_previous_level"]}
+        return [
+            {"$set": {"_previous_level": "$level"}},
+            {"$set": {"level": {"$max": ["$level", computed_level]}}},
+            {"$set": {
+                "rank": {"$cond": [
+                    leveled_up,
+                    {"$switch": {"branches": rank_branches, "default": self.definition.rank_tiers[-1][1]}},
+                    "$rank"
+                ]},
+                "experience_to_next": {"$cond": [
+                    leveled_up,
+                    {"$arrayElemAt": [{"$literal": next_requirements}, {"$min": [{"$add": ["$level", 1]}, self.level_cap + 1]}]},
+                    "$experience_to_next"
+                ]}
+            }},
+            {"$unset": "_previous_level"}
+        ]
+
+    def stat_points_between(self, old_level: int, new_level: int) -> int:
+        """Stat points earned by levelling from old_level to new_level"""
+        old_level = min(max(old_level, 0), self.level_cap)
+        new_level = min(max(new_level, 0), self.level_cap)
+        return self.stat_prefix[new_level] - self.stat_prefix[old_level] if new_level > old_level else 0
+
+# The active curve; swapped atomically on reload
+_curve = LevelCurve(CurveDefinition())
+_curve_file = os.environ.get("LEVEL_CURVE_FILE")
+_curve_mtime: Optional[float] = None
+_last_check = 0.0
+_reload_lock = threading.Lock()
+RELOAD_CHECK_SECONDS = 5.0
+
+def get_curve() -> LevelCurve:
+    """The active curve, reloaded when LEVEL_CURVE_FILE changes (checked every few seconds)"""
+    global _last_check, _curve_mtime
+    if _curve_file and time.monotonic() - _last_check > RELOAD_CHECK_SECONDS:
+        _last_check = time.monotonic()
+        mtime = None
+        try:
+            mtime = os.path.getmtime(_curve_file)
+            if mtime != _curve_mtime:
+                reload_curve()
+        except (OSError, ValueError, TypeError) as e:
+            # Keep serving the previous curve; the file is only read again once it changes
+            _curve_mtime = mtime
+            logger.error(f"Cannot load level curve from {_curve_file}: {e}")
+    return _curve
+
+def reload_curve(path: Optional[str] = None) -> LevelCurve:
+    """Load a curve definition from path (default LEVEL_CURVE_FILE) and make it active"""
+    global _curve, _curve_file, _curve_mtime
+    with _reload_lock:
+        path = path or _curve_file
+        if not path:
+            _curve = LevelCurve(CurveDefinition())
+            return _curve
+        with open(path) as handle:
+            definition = CurveDefinition(**json.load(handle))
+        _curve = LevelCurve(definition)
+        _curve_file = path
+        _curve_mtime = os.path.getmtime(path)
+        logger.info(f"Level curve loaded from {path} (cap {definition.level_cap})")
+        return _curve
@@ -0,0 +1,92 @@
+"""One-off data migrations and maintenance jobs.
+
+Usage: python migrations.py <job_name>
+"""
+from dotenv import load_dotenv
+from pathlib import Path
+import asyncio
+import logging
+import sys
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from database import database
+
+logger = logging.getLogger(__name__)
+
+async def compact_story_chapters():
+    """Replace per-player story_chapters copies with story_progress bitmasks"""
+    migrated = await database.compact_story_chapters()
+    logger.info(f"Compacted story chapters for {migrated} players")
+
+async def backfill_combat_power(batch_size: int = 1000):
+    """Populate gear_bonus, effective_stats and combat_power for every player"""
+    refreshed = await database.backfill_combat_power(batch_size=batch_size)
+    logger.info(f"Backfilled combat power for {refreshed} players")
+
+async def rebuild_rankings():
+    """Recompute every hunter's power and rewrite the rankings collection"""
+    from leaderboard import leaderboard
+    ranked = await leaderboard.rebuild()
+    logger.info(f"Rebuilt rankings for {ranked} hunters")
+
+async def reconcile_shadow_army():
+    """Recompute shadow_army counters from the shadows collection"""
+    reconciled = await database.reconcile_shadow_army()
+    logger.info(f"Reconciled shadow army counters for {reconciled} players")
+
+async def dedupe_dungeons():
+    """Merge duplicate dungeons by name so the unique name index can be built"""
+    removed = await database.dedupe_dungeons()
+    logger.info(f"Removed {removed} duplicate dungeons")
+
+async def stamp_schema_versions(batch_size: int = 1000):
+    """Validate documents without the current schema_version and stamp the valid ones"""
+    from pymongo import UpdateOne
+    from pydantic import ValidationError
+    from database import VERSIONED_COLLECTIONS
+    from documents import current_version
+
+    for collection_name, model in VERSIONED_COLLECTIONS.items():
+        collection = getattr(database.db, collection_name)
+        version = current_version(model)
+        stamped = invalid = 0
+        requests = []
+        async for doc in collection.find({"schema_version": {"$ne": version}}):
+            try:
+                model(**doc)
+            except ValidationError as e:
+                invalid += 1
+                logger.warning(f"{collection_name} {doc.get('id')} is not a valid {model.__name__}: {e}")
+                continue
+            requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"schema_version": version}}))
+            if len(requests) >= batch_size:
+                stamped += (await collection.bulk_write(requests, ordered=False)).modified_count
+                requests = []
+        if requests:
+            stamped += (await collection.bulk_write(requests, ordered=False)).modified_count
+        logger.info(f"{collection_name}: stamped {stamped} documents with schema_version {version}, {invalid} invalid")
+
+MIGRATIONS = {
+    "compact_story_chapters": compact_story_chapters,
+    "backfill_combat_power": backfill_combat_power,
+    "rebuild_rankings": rebuild_rankings,
+    "reconcile_shadow_army": reconcile_shadow_army,
+    "stamp_schema_versions": stamp_schema_versions,
+    "dedupe_dungeons": dedupe_dungeons,
+}
+
+def main(argv):
+    if len(argv) != 2 or argv[1] not in MIGRATIONS:
+        print(f"Usage: python migrations.py <{'|'.join(MIGRATIONS)}>")
+        return 1
+    asyncio.run(MIGRATIONS[argv[1]]())
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    sys.exit(main(sys.argv))
@@ -33,16 +33,50 @@ class Stats(BaseModel):
     vitality: int = 10
     sense: int = 10
 
+class GearBonus(BaseModel):
+    """Totals contributed by currently equipped items"""
+    attack: int = 0
+    defense: int = 0
+    strength: int = 0
+    agility: int = 0
+    intelligence: int = 0
+    vitality: int = 0
+    sense: int = 0
+    hp: int = 0
+    mp: int = 0
+
+class EffectiveStats(Stats):
+    """Base stats plus equipped gear"""
+    attack: int = 0
+    defense: int = 0
+    hp: int = 0
+    mp: int = 0
+
 class Guild(BaseModel):
     name: str
     position: str
     members: int
 
 class ShadowArmy(BaseModel):
-    capacity: int = 10
-    current: int = 0
+    capacity: Optional[int] = 10  # None: no limit (armies that outgrew it before it was enforced)
+    current: int = 0  # maintained by DatabaseManager on shadow create/delete
+    by_rarity: Dict[str, int] = {}
     shadows: List[str] = []
 
+class StoryProgress(BaseModel):
+    unlocked: int = 1  # bitmask, bit n-1 is set when chapter n is unlocked
+    completed: int = 0  # bitmask, same layout as unlocked
+
+    @staticmethod
+    def chapter_bit(chapter_number: int) -> int:
+        return 1 << (chapter_number - 1)
+
+    def is_unlocked(self, chapter_number: int) -> bool:
+        return bool(self.unlocked & self.chapter_bit(chapter_number))
+
+    def is_completed(self, chapter_number: int) -> bool:
+        return bool(self.completed & self.chapter_bit(chapter_number))
+
 class Player(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -52,14 +86,19 @@ class Player(BaseModel):
     experience: int = 0
     experience_to_next: int = 1000
     stats: Stats = Stats()
+    gear_bonus: GearBonus = GearBonus()
+    effective_stats: EffectiveStats = EffectiveStats()
+    combat_power: int = 0  # kept current by DatabaseManager on stat and gear changes
     hp: int = 100
     max_hp: int = 100
     mp: int = 50
     max_mp: int = 50
     shadow_army: ShadowArmy = ShadowArmy()
     guild: Guild = Guild(name="No Guild", position="None", members=0)
+    story_progress: StoryProgress = StoryProgress()
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    schema_version: int = 1  # bump when the stored shape changes; see documents.py
 
 class Equipment(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -71,9 +110,11 @@ class Equipment(BaseModel):
     defense: Optional[int] = None
     effect: Optional[str] = None
     durability: int = 100
+    enhancement_level: int = 0
     equipped: bool = False
     player_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    schema_version: int = 1
 
 class Consumable(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -102,6 +143,7 @@ class Shadow(BaseModel):
     max_experience: int = 1000
     player_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    schema_version: int = 1
 
 class Skill(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -125,6 +167,7 @@ class Quest(BaseModel):
     player_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    schema_version: int = 1
 
 class Dungeon(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -135,6 +178,7 @@ class Dungeon(BaseModel):
     rewards: List[str]
     description: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    schema_version: int = 1
 
 class DungeonAttempt(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -144,6 +188,7 @@ class DungeonAttempt(BaseModel):
     clear_time: Optional[int] = None  # in seconds
     rewards_gained: List[str] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    schema_version: int = 1
 
 class StoryChapter(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -156,6 +201,42 @@ class StoryChapter(BaseModel):
     player_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class StoryChapterSummary(BaseModel):
+    """Chapter metadata and progress without the narrative content"""
+    id: str
+    chapter_number: int
+    title: str
+    description: str
+    content_length: int  # number of story pages
+    unlocked: bool = False
+    completed: bool = False
+    player_id: str
+
+class DailyQuestStatus(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    player_id: str
+    date: str  # UTC day, YYYY-MM-DD
+    pushups: int = 0
+    situps: int = 0
+    running_km: float = 0.0
+    completed: bool = False
+    failed: bool = False
+    penalty_served: bool = False
+    penalty_session_id: Optional[str] = None  # opened by the daily rollover when failed
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    schema_version: int = 1
+
+class PenaltyZoneSession(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    player_id: str
+    quest_date: Optional[str] = None  # the failed daily quest that sent the player here
+    start_time: datetime = Field(default_factory=datetime.utcnow)
+    duration_minutes: int = 120  # 2 hours
+    survived: bool = False
+    damage_taken: int = 0
+    centipedes_killed: int = 0
+    schema_version: int = 1
+
 class GuildMember(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     player_id: str
@@ -173,10 +254,43 @@ class Ranking(BaseModel):
     position: int
     category: str  # hunter, guild, dungeon
 
+class RewardResult(BaseModel):
+    player: Player  # post-image of the reward write
+    exp_gained: int
+    old_level: int
+    new_level: int
+    stat_points_gained: int = 0
+    new_rank: Optional[HunterRank] = None  # set only when the rank changed
+
+    @property
+    def leveled_up(self) -> bool:
+        return self.new_level > self.old_level
+
+    def level_up_info(self) -> Dict[str, Any]:
+        """The summary shape returned by GameLogic.level_up_player"""
+        return {
+            "leveled_up": self.leveled_up,
+            "old_level": self.old_level,
+            "new_level": self.new_level,
+            "exp_gained": self.exp_gained,
+            "stat_points_gained": self.stat_points_gained,
+            "new_rank": self.new_rank
+        }
+
+class OnboardingResult(BaseModel):
+    players: List[Player]  # only the players that were created
+    inserted: int
+    failed: int
+    errors: List[Dict[str, Any]] = []  # {"name", "error"} per player that was not created
+
 # Create models for API requests
 class PlayerCreate(BaseModel):
     name: str
 
+class PlayerBatchCreate(BaseModel):
+    players: List[PlayerCreate]
+    use_transaction: bool = False
+
 class PlayerUpdate(BaseModel):
     name: Optional[str] = None
     level: Optional[int] = None
@@ -185,6 +299,11 @@ class PlayerUpdate(BaseModel):
     experience: Optional[int] = None
     stats: Optional[Stats] = None
 
+class DailyQuestUpdate(BaseModel):
+    pushups: Optional[int] = None
+    situps: Optional[int] = None
+    running_km: Optional[float] = None
+
 class EquipmentCreate(BaseModel):
     name: str
     type: str
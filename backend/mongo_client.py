@@ -0,0 +1,198 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import BaseModel
+from pymongo import monitoring
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from typing import Optional, Dict, Any
+import asyncio
+import os
+import threading
+import time
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+class MongoSettings(BaseModel):
+    url: str
+    db_name: str
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    connect_timeout_ms: int = 10000
+    server_selection_timeout_ms: int = 30000
+    socket_timeout_ms: Optional[int] = None
+    read_concern: Optional[str] = None  # local, majority, ...
+    write_concern: Optional[str] = None  # majority or a number of nodes
+    warm_up_connections: int = 0
+
+    @classmethod
+    def from_env(cls) -> "MongoSettings":
+        min_pool_size = _env_int("MONGO_MIN_POOL_SIZE", 0)
+        return cls(
+            url=os.environ['MONGO_URL'],
+            db_name=os.environ['DB_NAME'],
+            max_pool_size=_env_int("MONGO_MAX_POOL_SIZE", 100),
+            min_pool_size=min_pool_size,
+            max_idle_time_ms=_env_int("MONGO_MAX_IDLE_TIME_MS", None),
+            wait_queue_timeout_ms=_env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", None),
+            connect_timeout_ms=_env_int("MONGO_CONNECT_TIMEOUT_MS", 10000),
+            server_selection_timeout_ms=_env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 30000),
+            socket_timeout_ms=_env_int("MONGO_SOCKET_TIMEOUT_MS", None),
+            read_concern=os.environ.get("MONGO_READ_CONCERN") or None,
+            write_concern=os.environ.get("MONGO_WRITE_CONCERN") or None,
+            warm_up_connections=_env_int("MONGO_POOL_WARMUP", min_pool_size)
+        )
+
+    def client_options(self) -> Dict[str, Any]:
+        options = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+        }
+        if self.max_idle_time_ms is not None:
+            options["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.wait_queue_timeout_ms is not None:
+            options["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        if self.socket_timeout_ms is not None:
+            options["socketTimeoutMS"] = self.socket_timeout_ms
+        return options
+
+    def database_options(self) -> Dict[str, Any]:
+        options = {}
+        if self.read_concern:
+            options["read_concern"] = ReadConcern(self.read_concern)
+        if self.write_concern:
+            w = int(self.write_concern) if self.write_concern.isdigit() else self.write_concern
+            options["write_concern"] = WriteConcern(w=w)
+        return options
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters; checkout wait is measured per thread since Motor checks out on its executor"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open_connections = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.pool_clears = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_checkout_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_checkout_wait_ms": round(self.max_wait_ms, 3),
+                "pool_clears": self.pool_clears
+            }
+
+    def _checkout_wait_ms(self) -> float:
+        started = getattr(self._local, "checkout_started", None)
+        self._local.checkout_started = None
+        return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.checkout_started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait_ms = self._checkout_wait_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def connection_check_out_failed(self, event):
+        self._checkout_wait_ms()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+# One client (and so one pool) per process, shared by DatabaseManager and server.py
+_client: Optional[AsyncIOMotorClient] = None
+_settings: Optional[MongoSettings] = None
+pool_metrics = PoolMetrics()
+
+def get_settings() -> MongoSettings:
+    global _settings
+    if _settings is None:
+        _settings = MongoSettings.from_env()
+    return _settings
+
+def get_client() -> AsyncIOMotorClient:
+    global _client
+    if _client is None:
+        settings = get_settings()
+        _client = AsyncIOMotorClient(
+            settings.url,
+            event_listeners=[pool_metrics],
+            **settings.client_options()
+        )
+    return _client
+
+def get_database():
+    settings = get_settings()
+    return get_client().get_database(settings.db_name, **settings.database_options())
+
+async def warm_up_pool(connections: Optional[int] = None) -> int:
+    """Open connections up front so the first requests do not pay for the handshakes"""
+    connections = get_settings().warm_up_connections if connections is None else connections
+    connections = min(max(connections, 1), get_settings().max_pool_size)
+    admin = get_client().admin
+    # Concurrent pings force the pool to open one connection each
+    await asyncio.gather(*(admin.command("ping") for _ in range(connections)))
+    return connections
+
+def pool_stats() -> Dict[str, Any]:
+    settings = get_settings()
+    return {
+        **pool_metrics.snapshot(),
+        "max_pool_size": settings.max_pool_size,
+        "min_pool_size": settings.min_pool_size
+    }
+
+def close_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,85 @@
+# Combat power and effective stats, shared by GameLogic and DatabaseManager
+from typing import Dict, Any, Iterable, List
+import re
+
+STAT_FIELDS = ("strength", "agility", "intelligence", "vitality", "sense")
+GEAR_FIELDS = ("attack", "defense") + STAT_FIELDS + ("hp", "mp")
+BASE_STAT_VALUE = 10
+
+COMBAT_POWER_WEIGHTS = {
+    "strength": 2,
+    "agility": 1.5,
+    "intelligence": 1.8,
+    "vitality": 1.2,
+    "sense": 1.0,
+    "attack": 1,
+    "defense": 0.8
+}
+
+# Accessory effects look like "+10 HP" or "+2 Strength"
+_EFFECT_PATTERN = re.compile(r"^\+(\d+)\s+(HP|MP|Strength|Agility|Intelligence|Vitality|Sense)$")
+
+def _field(item: Any, name: str) -> Any:
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+def item_bonus(item: Any) -> Dict[str, int]:
+    """What a single item adds to its wearer while equipped"""
+    bonus = dict.fromkeys(GEAR_FIELDS, 0)
+    bonus["attack"] = _field(item, "attack") or 0
+    bonus["defense"] = _field(item, "defense") or 0
+    match = _EFFECT_PATTERN.match(_field(item, "effect") or "")
+    if match:
+        bonus[match.group(2).lower()] += int(match.group(1))
+    return bonus
+
+def sum_bonuses(items: Iterable[Any]) -> Dict[str, int]:
+    total = dict.fromkeys(GEAR_FIELDS, 0)
+    for item in items:
+        for field, value in item_bonus(item).items():
+            total[field] += value
+    return total
+
+def effective_stats(stats: Dict[str, int], gear_bonus: Dict[str, int]) -> Dict[str, int]:
+    """Base stats plus equipped gear"""
+    effective = {field: gear_bonus.get(field, 0) for field in GEAR_FIELDS}
+    for field in STAT_FIELDS:
+        effective[field] += stats.get(field, BASE_STAT_VALUE)
+    return effective
+
+def combat_power(effective: Dict[str, int]) -> int:
+    return int(sum(effective.get(field, 0) * weight for field, weight in COMBAT_POWER_WEIGHTS.items()))
+
+def power_update_stages() -> List[Dict[str, Any]]:
+    """Update-pipeline stages that recompute effective_stats and combat_power from stats + gear_bonus.
+
+    Appended to any player update that touches stats or gear so the
+    denormalized fields are rewritten in the same atomic write.
+    """
+    effective = {}
+    for field in GEAR_FIELDS:
+        gear = {"$ifNull": [f"$gear_bonus.{field}", 0]}
+        if field in STAT_FIELDS:
+            effective[f"effective_stats.{field}"] = {
+                "$add": [{"$ifNull": [f"$stats.{field}", BASE_STAT_VALUE]}, gear]
+            }
+        else:
+            effective[f"effective_stats.{field}"] = gear
+    power = {
+        "$add": [
+            {"$multiply": [f"$effective_stats.{field}", weight]}
+            for field, weight in COMBAT_POWER_WEIGHTS.items()
+        ]
+    }
+    return [
+        {"$set": effective},
+        {"$set": {"combat_power": {"$toInt": {"$trunc": power}}}}
+    ]
+
+def gear_delta_stages(delta: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Update-pipeline stages that add delta to gear_bonus and recompute power"""
+    gear = {
+        f"gear_bonus.{field}": {"$add": [{"$ifNull": [f"$gear_bonus.{field}", 0]}, value]}
+        for field, value in delta.items() if value
+    }
+    stages = [{"$set": gear}] if gear else []
+    return stages + power_update_stages()
@@ -0,0 +1,122 @@
+"""Daily quest rollover.
+
+At each UTC midnight the previous day's unfinished quests are failed in
+bulk, penalty zone sessions are opened for them and the new day's quests
+are pre-created with insert_many. Every worker runs the loop, but a lease in
+the scheduler_locks collection makes sure only one of them does the work;
+all steps are idempotent, so a rollover interrupted half way is finished by
+the next run.
+"""
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Dict, Any, Optional
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from database import database
+
+logger = logging.getLogger(__name__)
+
+ROLLOVER_LOCK = "daily_rollover"
+RETRY_SECONDS = 60
+
+class DailyRolloverScheduler:
+    def __init__(self, db_manager):
+        self.database = db_manager
+        self.locks = db_manager.db.scheduler_locks
+        self.enabled = os.environ.get("DAILY_ROLLOVER_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+        self.lock_seconds = int(os.environ.get("DAILY_ROLLOVER_LOCK_SECONDS", "600"))
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def acquire_lock(self) -> bool:
+        """Take or renew the rollover lease; False if another worker holds it"""
+        now = datetime.utcnow()
+        try:
+            await self.locks.find_one_and_update(
+                {"_id": ROLLOVER_LOCK, "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.lock_seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return True
+        except DuplicateKeyError:
+            # The lock document exists and belongs to a live worker
+            return False
+
+    async def release_lock(self):
+        await self.locks.update_one(
+            {"_id": ROLLOVER_LOCK, "owner": self.owner},
+            {"$set": {"expires_at": datetime.utcnow()}}
+        )
+
+    async def run_rollover(self, today: Optional[str] = None) -> Dict[str, Any]:
+        """Close yesterday's quests and open today's"""
+        today = today or self.database.quest_date()
+        yesterday = (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+        started = datetime.utcnow()
+
+        failed = await self.database.fail_daily_quests(yesterday)
+        penalties = await self.database.open_penalty_sessions(yesterday)
+        created = await self.database.create_daily_quests(today)
+        await self.locks.update_one({"_id": ROLLOVER_LOCK}, {"$set": {"last_rollover": today}})
+
+        report = {
+            "date": today,
+            "failed": failed,
+            "penalty_sessions": penalties,
+            "quests_created": created,
+            "seconds": (datetime.utcnow() - started).total_seconds()
+        }
+        logger.info(f"Daily rollover: {report}")
+        return report
+
+    async def run_if_leader(self, today: Optional[str] = None, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Run the rollover for today unless another worker holds the lock or it already ran"""
+        today = today or self.database.quest_date()
+        if not await self.acquire_lock():
+            return None
+        try:
+            if not force and await self.rollover_done(today):
+                return None
+            return await self.run_rollover(today)
+        finally:
+            await self.release_lock()
+
+    @staticmethod
+    def seconds_until_next_day() -> float:
+        now = datetime.utcnow()
+        tomorrow = datetime(now.year, now.month, now.day) + timedelta(days=1)
+        return (tomorrow - now).total_seconds()
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def rollover_done(self, today: str) -> bool:
+        lock = await self.locks.find_one({"_id": ROLLOVER_LOCK}, {"last_rollover": 1})
+        return bool(lock) and lock.get("last_rollover") == today
+
+    async def _loop(self):
+        while True:
+            today = self.database.quest_date()
+            try:
+                # Also catches up after downtime: today's rollover runs once if it was missed
+                await self.run_if_leader(today)
+                done = await self.rollover_done(today)
+            except Exception as e:
+                logger.error(f"Daily rollover failed: {e}")
+                done = False
+            # Until someone has finished today's rollover, every worker keeps retrying for the lock
+            await asyncio.sleep(self.seconds_until_next_day() + 1 if done else RETRY_SECONDS)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+scheduler = DailyRolloverScheduler(database)
@@ -0,0 +1,183 @@
+"""Response serialization and compression.
+
+Both layers are opt-in:
+
+- FAST_JSON_ENABLED: responses are rendered with orjson, and handlers that
+  already hold validated models return them through model_response(), which
+  serializes them in pydantic-core instead of re-validating them against the
+  response_model and walking them with jsonable_encoder.
+- RESPONSE_COMPRESSION_ENABLED: complete responses of at least
+  RESPONSE_COMPRESSION_MIN_BYTES are compressed with brotli or gzip,
+  whichever the client prefers in Accept-Encoding. Streams (SSE, NDJSON)
+  are never buffered or compressed.
+
+orjson and brotli are optional; without them the standard json module and
+gzip are used.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import gzip
+import json
+import os
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+import pydantic_core
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def _flag(name: str, default: str = "false") -> bool:
+    return os.environ.get(name, default).lower() not in ("0", "false", "no", "off")
+
+FAST_JSON = _flag("FAST_JSON_ENABLED")
+COMPRESSION = _flag("RESPONSE_COMPRESSION_ENABLED")
+COMPRESSION_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("RESPONSE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("RESPONSE_BROTLI_QUALITY", "5"))
+
+# Already compact, or written incrementally to the client
+UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream", "application/x-ndjson", "image/", "video/", "application/zip")
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON; orjson when it is installed and enabled"""
+    if FAST_JSON and orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps()"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def model_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Any:
+    """Serialize validated models directly, skipping FastAPI's response_model round trip.
+
+    With FAST_JSON_ENABLED off the content is returned unchanged and FastAPI
+    serializes it as before.
+    """
+    if not FAST_JSON:
+        return content
+    return Response(
+        content=pydantic_core.to_json(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
+
+def default_response_class():
+    return FastJSONResponse if FAST_JSON else JSONResponse
+
+# Compression
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The best of br/gzip the client accepts, or None"""
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete responses above a size threshold"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                response_headers = dict(message.get("headers") or [])
+                media_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                if b"content-encoding" in response_headers or media_type.startswith(UNCOMPRESSED_MEDIA_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streamed bodies and small responses go out as they are
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            response_headers: List[Tuple[bytes, bytes]] = []
+            vary = [b"Accept-Encoding"]
+            for key, value in start_message.get("headers", []):
+                if key.lower() == b"vary":
+                    vary.insert(0, value)
+                elif key.lower() != b"content-length":
+                    response_headers.append((key, value))
+            response_headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(compressed)).encode("latin-1")),
+                (b"vary", b", ".join(vary))
+            ]
+            await send({**start_message, "headers": response_headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+def add_compression(app):
+    if COMPRESSION:
+        app.add_middleware(CompressionMiddleware)
@@ -1,10 +1,14 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+import time
+IMPORT_STARTED = time.perf_counter()  # start of the "imports" startup phase
+
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
+from contextlib import contextmanager
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uuid
@@ -14,51 +18,63 @@ import asyncio
 
 # Import our models and database
 from models import *
-from database import database
+from database import database, MISSING_COMBAT_POWER
+from mongo_client import get_database, warm_up_pool, pool_stats, close_client
 from game_logic import game_logic
-from story_content import get_story_chapters, get_chapter_by_number
+import enhancement
+from indexes import index_manager
+from leaderboard import leaderboard
+import encounters
+from dataloader import loaders_for
+from scheduler import scheduler
+from serialization import model_response, dumps, default_response_class, add_compression
+from documents import from_document, timings as model_timings
+from events import event_bus, event_stream, penalty_progress, ConnectionLimitError
+from level_curve import reload_curve
+from instant_dungeons import InstantDungeon, InstantDungeonCatalog, get_catalog as get_instant_dungeon_catalog, reload_catalog as reload_instant_dungeons
+from story_content import get_compiled_chapter, get_story_index
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Index provisioning and catalog seeding are idempotent; workers restarted
+# after the first one can skip them (--skip-seed)
+SKIP_STARTUP_SEED = os.environ.get("SKIP_STARTUP_SEED", "false").lower() in ("1", "true", "yes", "on")
+
+class StartupReport:
+    """Wall-clock seconds spent in each startup phase of this worker"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "skip_seed": SKIP_STARTUP_SEED,
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "total_seconds": round(sum(self.phases.values()), 4)
+        }
+
+startup_report = StartupReport()
+startup_report.phases["imports"] = time.perf_counter() - IMPORT_STARTED
+
+# MongoDB connection - the same pooled client DatabaseManager uses
+db = get_database()
 
 # Create the main app without a prefix
-app = FastAPI(title="Solo Leveling API", description="API for the Solo Leveling RPG Game")
+app = FastAPI(title="Solo Leveling API", description="API for the Solo Leveling RPG Game",
+              default_response_class=default_response_class())
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Daily Quest Models
-class DailyQuestStatus(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    player_id: str
-    date: str
-    pushups: int = 0
-    situps: int = 0
-    running_km: float = 0.0
-    completed: bool = False
-    failed: bool = False
-    penalty_served: bool = False
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
-class DailyQuestUpdate(BaseModel):
-    pushups: Optional[int] = None
-    situps: Optional[int] = None
-    running_km: Optional[float] = None
-
-class PenaltyZoneSession(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    player_id: str
-    start_time: datetime = Field(default_factory=datetime.utcnow)
-    duration_minutes: int = 120  # 2 hours
-    survived: bool = False
-    damage_taken: int = 0
-    centipedes_killed: int = 0
-
 # Combat and Shadow Extraction Models
 class CombatResult(BaseModel):
     success: bool
@@ -70,7 +86,36 @@ class CombatResult(BaseModel):
 class ShadowExtractionAttempt(BaseModel):
     enemy_name: str
     success_rate: float
-    mana_cost: int
+    mana_cost: int = Field(ge=0)
+
+# Paginated and streamed player collections
+DEFAULT_PAGE_SIZE = 100
+
+async def player_page(collection_name: str, player_id: str, after: Optional[str], limit: Optional[int],
+                      response: Response):
+    """One keyset page; the cursor for the next page goes in the X-Next-Cursor header.
+
+    Without after and limit the whole collection is returned, as before pagination existed.
+    """
+    if after is None and limit is None:
+        return [item async for item in database.stream_player_documents(collection_name, player_id)]
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    try:
+        items, next_cursor = await database.get_player_page(collection_name, player_id, after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+def ndjson_stream(collection_name: str, player_id: str, transform=None) -> StreamingResponse:
+    """Stream every document straight from the cursor, one JSON object per line"""
+    async def lines():
+        async for item in database.stream_player_documents(collection_name, player_id):
+            data = item.model_dump(mode="json")
+            yield dumps(transform(data) if transform else data) + b"\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 # Basic API endpoints
 @api_router.get("/")
@@ -84,40 +129,147 @@ async def health_check():
 # Initialize game data on startup
 @app.on_event("startup")
 async def startup_event():
-    await database.initialize_game_data()
-    logger.info("Game data initialized successfully")
+    with startup_report.phase("db_connect"):
+        warmed = await warm_up_pool()
+    logger.info(f"MongoDB pool warmed up with {warmed} connections")
+    if SKIP_STARTUP_SEED:
+        logger.info("SKIP_STARTUP_SEED is set - index provisioning and catalog seeding skipped")
+    else:
+        with startup_report.phase("indexes"):
+            index_report = await index_manager.ensure_indexes()
+        logger.info(f"Indexes ensured: {index_report['created']}")
+        with startup_report.phase("seeding"):
+            seeded = await database.initialize_game_data()
+        logger.info(f"Game data initialized successfully: {seeded}")
+        with startup_report.phase("combat_power"):
+            backfilled = await database.backfill_combat_power(MISSING_COMBAT_POWER)
+        if backfilled:
+            logger.info(f"Backfilled combat power for {backfilled} players")
+    with startup_report.phase("dungeon_catalog"):
+        cataloged = await database.dungeon_catalog.load()
+    database.dungeon_catalog.start_periodic_reload()
+    logger.info(f"Dungeon catalog loaded with {cataloged} dungeons")
+    with startup_report.phase("story_cache"):
+        get_story_index()
+    logger.info("Story content compiled")
+    with startup_report.phase("leaderboard_cache"):
+        ranked = await leaderboard.load()
+    leaderboard.start_periodic_reload()
+    logger.info(f"Leaderboard loaded with {ranked} hunters")
+    scheduler.start()
+    logger.info(f"Startup finished: {startup_report.summary()}")
+
+# Admin Endpoints
+@api_router.get("/admin/indexes")
+async def get_index_plan():
+    """Dump the declared index plan together with an audit of the live indexes"""
+    return {
+        "plan": index_manager.describe_plan(),
+        "audit": await index_manager.audit()
+    }
+
+@api_router.get("/admin/startup")
+async def get_startup_report():
+    """How long each startup phase of this worker took"""
+    return startup_report.summary()
+
+@api_router.get("/admin/dungeon-catalog")
+async def get_dungeon_catalog_stats():
+    return database.dungeon_catalog.stats()
+
+@api_router.post("/admin/dungeon-catalog/reload")
+async def reload_dungeon_catalog():
+    """Re-read the dungeons collection after editing it"""
+    return {"dungeons": await database.dungeon_catalog.load()}
+
+@api_router.get("/admin/db-pool")
+async def get_db_pool_stats():
+    """Connection pool usage for this worker - use it to size maxPoolSize per uvicorn worker"""
+    return pool_stats()
+
+@api_router.get("/admin/player-cache")
+async def get_player_cache_stats():
+    """Player cache hit/miss/eviction counters for this worker"""
+    return database.player_cache.stats()
+
+@api_router.post("/admin/player-cache/clear")
+async def clear_player_cache():
+    """Drop every cached player in this worker"""
+    database.player_cache.clear()
+    return database.player_cache.stats()
+
+@api_router.post("/admin/shadow-army/reconcile")
+async def reconcile_shadow_army():
+    """Recompute every player's shadow army counters from the shadows collection"""
+    return {"reconciled": await database.reconcile_shadow_army()}
+
+@api_router.post("/admin/daily-rollover/run")
+async def run_daily_rollover(date: Optional[str] = None, force: bool = False):
+    """Run the daily quest rollover now (for date, default today UTC) if no other worker is running it"""
+    report = await scheduler.run_if_leader(date, force=force)
+    if report is None:
+        return {"ran": False, "message": "Another worker holds the rollover lock or it already ran for this date"}
+    return {"ran": True, **report}
+
+@api_router.get("/admin/events")
+async def get_event_stats():
+    """Open event streams and delivery counters of this worker"""
+    return event_bus.stats()
+
+@api_router.get("/admin/model-validation")
+async def get_model_validation_stats():
+    """Documents built per model with the time spent validating them"""
+    return model_timings.stats()
+
+@api_router.post("/admin/model-validation/reset")
+async def reset_model_validation_stats():
+    model_timings.reset()
+    return {"reset": True}
+
+@api_router.post("/admin/level-curve/reload")
+async def reload_level_curve():
+    """Reload the level/XP curve from LEVEL_CURVE_FILE"""
+    try:
+        curve = reload_curve()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"level_cap": curve.level_cap, "definition": curve.definition.dict()}
+
+@api_router.post("/admin/instant-dungeons/reload")
+async def reload_instant_dungeon_catalog():
+    """Reload the instant dungeon catalog from INSTANT_DUNGEONS_FILE"""
+    try:
+        catalog = reload_instant_dungeons()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"dungeons": list(catalog.dungeons)}
 
 # Player Management Endpoints
 @api_router.post("/players", response_model=Player)
 async def create_player(player_data: PlayerCreate):
     """Create a new player with initial setup"""
     try:
-        player = await database.create_player(player_data)
-        
-        # Initialize story chapters for the player
-        story_chapters = get_story_chapters()
-        for i, chapter_data in enumerate(story_chapters):
-            chapter = StoryChapter(
-                chapter_number=chapter_data["chapter_number"],
-                title=chapter_data["title"],
-                description=chapter_data["description"],
-                content=chapter_data["content"],
-                unlocked=(i == 0),
-                player_id=player.id
-            )
-            await db.story_chapters.insert_one(chapter.dict())
-            
-        return player
+        return model_response(await database.create_player(player_data))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.post("/players/batch", response_model=OnboardingResult)
+async def create_players_batch(batch: PlayerBatchCreate):
+    """Onboard many players in one call - for migrations and seeding"""
+    if len(batch.players) > 1000:
+        raise HTTPException(status_code=400, detail="At most 1000 players can be onboarded per call")
+    try:
+        return model_response(await database.onboard_players(batch.players, use_transaction=batch.use_transaction))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.get("/players/{player_id}", response_model=Player)
-async def get_player(player_id: str):
+async def get_player(player_id: str, request: Request):
     """Get player information"""
-    player = await database.get_player(player_id)
+    player = await loaders_for(request).players.load(player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
-    return player
+    return model_response(player)
 
 @api_router.put("/players/{player_id}", response_model=Player)
 async def update_player(player_id: str, updates: PlayerUpdate):
@@ -125,29 +277,19 @@ async def update_player(player_id: str, updates: PlayerUpdate):
     player = await database.update_player(player_id, updates)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
-    return player
+    await leaderboard.refresh_player(player_id)
+    return model_response(player)
 
 # Daily Quest System - The Iconic Solo Leveling Feature!
 @api_router.get("/players/{player_id}/daily-quest")
 async def get_daily_quest(player_id: str):
     """Get today's daily quest status"""
-    today = datetime.now().strftime("%Y-%m-%d")
-    
-    # Check if daily quest exists for today
-    daily_quest_doc = await db.daily_quests.find_one({
-        "player_id": player_id,
-        "date": today
-    })
-    
-    if not daily_quest_doc:
-        # Create new daily quest for today
-        daily_quest = DailyQuestStatus(player_id=player_id, date=today)
-        await db.daily_quests.insert_one(daily_quest.dict())
-        daily_quest_doc = daily_quest.dict()
+    # Normally pre-created by the daily rollover
+    daily_quest = await database.get_daily_quest(player_id, database.quest_date())
     
     # Add the penalty zone threat message
     quest_data = {
-        **daily_quest_doc,
+        **daily_quest.dict(),
         "title": "Preparation for Becoming Strong",
         "description": "Complete the daily training regimen. Failure will result in punishment.",
         "requirements": {
@@ -156,7 +298,7 @@ async def get_daily_quest(player_id: str):
             "running_km": 10.0
         },
         "penalty_warning": "⚠️ Failure to complete within 24 hours will transport you to the Penalty Zone for 2 hours!",
-        "time_remaining": "23:45:30",  # Calculate actual remaining time
+        "time_remaining": str(timedelta(seconds=int(scheduler.seconds_until_next_day()))),
         "easter_egg": "💀 The System is always watching... 👁️"
     }
     
@@ -165,16 +307,10 @@ async def get_daily_quest(player_id: str):
 @api_router.put("/players/{player_id}/daily-quest")
 async def update_daily_quest(player_id: str, update: DailyQuestUpdate):
     """Update daily quest progress"""
-    today = datetime.now().strftime("%Y-%m-%d")
-    
-    # Find today's quest
-    daily_quest_doc = await db.daily_quests.find_one({
-        "player_id": player_id,
-        "date": today
-    })
-    
-    if not daily_quest_doc:
-        raise HTTPException(status_code=404, detail="No daily quest found for today")
+    today = database.quest_date()
+    daily_quest = await database.get_daily_quest(player_id, today)
+    if daily_quest.failed:
+        raise HTTPException(status_code=400, detail="Today's daily quest has already failed")
     
     # Update progress
     update_data = {}
@@ -186,40 +322,33 @@ async def update_daily_quest(player_id: str, update: DailyQuestUpdate):
         update_data["running_km"] = min(update.running_km, 10.0)
     
     # Check if quest is completed
-    current_pushups = update_data.get("pushups", daily_quest_doc["pushups"])
-    current_situps = update_data.get("situps", daily_quest_doc["situps"])
-    current_running = update_data.get("running_km", daily_quest_doc["running_km"])
+    current_pushups = update_data.get("pushups", daily_quest.pushups)
+    current_situps = update_data.get("situps", daily_quest.situps)
+    current_running = update_data.get("running_km", daily_quest.running_km)
     
-    if current_pushups >= 100 and current_situps >= 100 and current_running >= 10.0:
-        update_data["completed"] = True
-        
-        # Award rewards
-        player = await database.get_player(player_id)
-        if player:
-            # Level up logic
-            level_info = await game_logic.level_up_player(player_id, 1000)
-            
-            # Add stat bonuses
-            new_stats = player.stats
-            new_stats.strength += 2
-            new_stats.vitality += 1
-            new_stats.agility += 1
-            
-            await database.update_player(player_id, PlayerUpdate(
-                stats=new_stats,
-                experience=player.experience + 1000
-            ))
-    
-    await db.daily_quests.update_one(
-        {"player_id": player_id, "date": today},
-        {"$set": update_data}
+    completes_now = (
+        not daily_quest.completed
+        and current_pushups >= 100 and current_situps >= 100 and current_running >= 10.0
     )
+    if completes_now:
+        update_data["completed"] = True
+    
+    updated = await database.update_daily_quest(player_id, today, update_data)
+    if updated is None and completes_now:
+        # A concurrent request completed (and rewarded) it first
+        updated = await database.get_daily_quest(player_id, today)
+    elif completes_now:
+        # Award XP and stat bonuses in one write
+        reward = await database.apply_rewards(
+            player_id, exp=1000, stat_deltas={"strength": 2, "vitality": 1, "agility": 1}
+        )
+        if reward:
+            await leaderboard.refresh_player(player_id, reward.player)
+    if updated is None:
+        raise HTTPException(status_code=400, detail="Today's daily quest has already failed")
     
     # Return updated quest with motivational messages
-    updated_quest = await db.daily_quests.find_one({
-        "player_id": player_id,
-        "date": today
-    })
+    updated_quest = updated.dict()
     
     # Add Easter egg messages based on progress
     progress_messages = [
@@ -237,19 +366,18 @@ async def update_daily_quest(player_id: str, update: DailyQuestUpdate):
 async def enter_penalty_zone(player_id: str):
     """Enter the dreaded penalty zone - Giant Centipede Desert!"""
     
-    # Check if player has failed daily quest
-    today = datetime.now().strftime("%Y-%m-%d")
-    daily_quest_doc = await db.daily_quests.find_one({
-        "player_id": player_id,
-        "date": today
-    })
-    
-    if not daily_quest_doc or daily_quest_doc.get("completed", False):
-        raise HTTPException(status_code=400, detail="No penalty required - quest completed or not found")
-    
-    # Create penalty zone session
-    penalty_session = PenaltyZoneSession(player_id=player_id)
-    await db.penalty_zones.insert_one(penalty_session.dict())
+    # The daily rollover opens a session for every failed quest; an unfinished
+    # quest for today can also be given up on by entering the zone directly
+    penalty_session = await database.get_active_penalty_session(player_id)
+    if not penalty_session:
+        daily_quest = await database.get_daily_quest(player_id, database.quest_date(), create=False)
+        if not daily_quest or daily_quest.completed:
+            raise HTTPException(status_code=400, detail="No penalty required - quest completed or not found")
+        penalty_session = await database.open_penalty_session(daily_quest)
+        if not penalty_session:
+            penalty_session = await database.get_active_penalty_session(player_id)
+        if not penalty_session:
+            raise HTTPException(status_code=400, detail="No penalty required - today's penalty was already served")
     
     return {
         "message": "⚠️ SYSTEM WARNING ⚠️",
@@ -260,7 +388,7 @@ async def enter_penalty_zone(player_id: str):
         "easter_egg": "🦂 The centipedes are the size of subway cars... Good luck! 💀",
         "survival_tip": "Keep moving. They can sense vibrations in the sand.",
         "session_id": penalty_session.id,
-        "duration_minutes": 120
+        "duration_minutes": penalty_session.duration_minutes
     }
 
 @api_router.get("/players/{player_id}/penalty-zone/{session_id}")
@@ -274,9 +402,9 @@ async def get_penalty_zone_status(player_id: str, session_id: str):
     if not session_doc:
         raise HTTPException(status_code=404, detail="Penalty zone session not found")
     
-    session = PenaltyZoneSession(**session_doc)
-    elapsed_minutes = (datetime.utcnow() - session.start_time).total_seconds() / 60
-    remaining_minutes = max(0, 120 - elapsed_minutes)
+    session = from_document(PenaltyZoneSession, session_doc)
+    progress = penalty_progress(session.start_time, session.duration_minutes)
+    remaining_minutes = progress["remaining_minutes"]
     
     # Random centipede encounter messages
     encounter_messages = [
@@ -289,22 +417,60 @@ async def get_penalty_zone_status(player_id: str, session_id: str):
     
     return {
         "session_id": session_id,
-        "elapsed_minutes": int(elapsed_minutes),
-        "remaining_minutes": int(remaining_minutes),
-        "progress_percent": min(100, (elapsed_minutes / 120) * 100),
-        "status": "SURVIVING" if remaining_minutes > 0 else "ESCAPED",
+        "elapsed_minutes": progress["elapsed_minutes"],
+        "remaining_minutes": remaining_minutes,
+        "progress_percent": progress["progress_percent"],
+        "status": progress["status"],
         "encounter_message": random.choice(encounter_messages) if remaining_minutes > 0 else "🎉 You have survived the Penalty Zone!",
         "centipedes_encountered": random.randint(3, 8),
         "damage_taken": random.randint(20, 50),
         "easter_egg": "🎮 This is harder than Dark Souls..." if remaining_minutes > 60 else "🏃‍♂️ Almost there! Don't give up!"
     }
 
+# Push events - replaces polling the player, quest, shadow and penalty zone endpoints
+class EventStreamResponse(StreamingResponse):
+    """SSE response that releases its subscription however the response ends"""
+
+    def __init__(self, subscription, content, **kwargs):
+        super().__init__(content, media_type="text/event-stream", **kwargs)
+        self.subscription = subscription
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # The stream closes it too, but only if it ever started
+            self.subscription.close()
+
+@api_router.get("/players/{player_id}/events")
+async def player_events(player_id: str, request: Request):
+    """Server-Sent Events stream of the player's level-ups, drops, quests and penalty zone countdown"""
+    if not await database.get_player(player_id):
+        raise HTTPException(status_code=404, detail="Player not found")
+    penalty_session = await database.get_active_penalty_session(player_id)
+    running = None
+    if penalty_session:
+        running = {
+            "id": penalty_session.id,
+            "start_time": penalty_session.start_time,
+            "duration_minutes": penalty_session.duration_minutes
+        }
+    try:
+        subscription = event_bus.subscribe(player_id)
+    except ConnectionLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return EventStreamResponse(
+        subscription,
+        event_stream(subscription, running, request.is_disconnected),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Shadow Extraction System - The Signature Solo Leveling Ability!
 @api_router.post("/players/{player_id}/extract-shadow")
-async def extract_shadow(player_id: str, extraction: ShadowExtractionAttempt):
+async def extract_shadow(player_id: str, extraction: ShadowExtractionAttempt, request: Request):
     """Extract a shadow from a defeated enemy - Jin-Woo's unique power!"""
     
-    player = await database.get_player(player_id)
+    player = await loaders_for(request).players.load(player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
     
@@ -349,10 +515,19 @@ async def extract_shadow(player_id: str, extraction: ShadowExtractionAttempt):
             skills=[f"{extraction.enemy_name} Strike", "Shadow Form", "Loyalty"]
         )
         
+        # Charge the mana against the stored MP, not the possibly stale loaded player
+        if await database.spend_mp(player_id, extraction.mana_cost) is None:
+            raise HTTPException(status_code=400, detail="Insufficient MP for shadow extraction")
         shadow = await database.create_shadow(player_id, shadow_data)
+        if not shadow:
+            await database.spend_mp(player_id, -extraction.mana_cost)
+            return {
+                "success": False,
+                "message": f"Your shadow army is full ({player.shadow_army.capacity} shadows)",
+                "easter_egg": "👥 'Even the Shadow Monarch needs more room...'"
+            }
         
-        # Deduct mana
-        await database.update_player(player_id, PlayerUpdate(mp=player.mp - extraction.mana_cost))
+        await leaderboard.refresh_player(player_id, shadow_delta=(shadow.stats["attack"], shadow.stats["defense"]))
         
         # Epic success messages with Easter eggs
         success_messages = [
@@ -368,7 +543,7 @@ async def extract_shadow(player_id: str, extraction: ShadowExtractionAttempt):
             "message": random.choice(success_messages),
             "shadow": shadow.dict(),
             "easter_egg": "🎭 'Arise' is the coolest spell in any manhwa! 👑",
-            "army_count": len(await database.get_player_shadows(player_id)),
+            "army_count": (await database.get_shadow_army(player_id)).current,
             "special_effect": "Dark energy swirls around the fallen enemy as their shadow rises to serve you..."
         }
     else:
@@ -387,24 +562,62 @@ async def extract_shadow(player_id: str, extraction: ShadowExtractionAttempt):
         }
 
 @api_router.get("/players/{player_id}/shadows", response_model=List[Shadow])
-async def get_player_shadows(player_id: str):
-    """Get all shadows in player's army"""
-    shadows = await database.get_player_shadows(player_id)
-    return shadows
+async def get_player_shadows(player_id: str, response: Response, after: Optional[str] = None, limit: Optional[int] = None):
+    """Get a page of the player's shadow army"""
+    return model_response(await player_page("shadows", player_id, after, limit, response), headers=response.headers)
+
+@api_router.get("/players/{player_id}/shadows/stream")
+async def stream_player_shadows(player_id: str):
+    """The whole shadow army as NDJSON"""
+    return ndjson_stream("shadows", player_id)
+
+@api_router.get("/players/{player_id}/quests", response_model=List[Quest])
+async def get_player_quests(player_id: str, response: Response, after: Optional[str] = None, limit: Optional[int] = None):
+    """Get a page of the player's quests"""
+    return model_response(await player_page("quests", player_id, after, limit, response), headers=response.headers)
+
+@api_router.get("/players/{player_id}/quests/stream")
+async def stream_player_quests(player_id: str):
+    """Every quest as NDJSON"""
+    return ndjson_stream("quests", player_id)
+
+@api_router.get("/players/{player_id}/dungeon-attempts", response_model=List[DungeonAttempt])
+async def get_player_dungeon_attempts(player_id: str, response: Response, after: Optional[str] = None,
+                                      limit: Optional[int] = None):
+    """Get a page of the player's dungeon attempt history"""
+    return model_response(await player_page("dungeon_attempts", player_id, after, limit, response), headers=response.headers)
+
+@api_router.get("/players/{player_id}/dungeon-attempts/stream")
+async def stream_player_dungeon_attempts(player_id: str):
+    """The whole dungeon attempt history as NDJSON"""
+    return ndjson_stream("dungeon_attempts", player_id)
+
+@api_router.delete("/players/{player_id}/shadows/{shadow_id}")
+async def release_shadow(player_id: str, shadow_id: str):
+    """Release a shadow from the army to free up a slot"""
+    shadow = await database.delete_shadow(player_id, shadow_id)
+    if not shadow:
+        raise HTTPException(status_code=404, detail="Shadow not found")
+    await leaderboard.refresh_player(player_id, shadow_delta=(-shadow.stats["attack"], -shadow.stats["defense"]))
+    return {
+        "success": True,
+        "shadow_army": await database.get_shadow_army(player_id),
+        "message": "🌫️ The shadow returns to the void..."
+    }
 
 @api_router.put("/players/{player_id}/shadows/{shadow_id}/upgrade")
-async def upgrade_shadow(player_id: str, shadow_id: str):
+async def upgrade_shadow(player_id: str, shadow_id: str, request: Request):
     """Upgrade a shadow soldier - Make them stronger!"""
     
-    shadow = await database.get_shadow(shadow_id)
+    shadow = await loaders_for(request).shadows.load(shadow_id)
     if not shadow or shadow.player_id != player_id:
         raise HTTPException(status_code=404, detail="Shadow not found")
     
-    # Upgrade logic
+    # Upgrade logic - the XP is only deducted if the player can afford it
     upgrade_cost = shadow.level * 1000
-    player = await database.get_player(player_id)
+    reward = await database.apply_rewards(player_id, exp=-upgrade_cost, min_experience=upgrade_cost)
     
-    if player.experience < upgrade_cost:
+    if not reward:
         return {
             "success": False,
             "message": f"Need {upgrade_cost} XP to upgrade {shadow.name}",
@@ -428,8 +641,9 @@ async def upgrade_shadow(player_id: str, shadow_id: str):
         {"$set": {"level": new_level, "stats": new_stats}}
     )
     
-    # Deduct experience
-    await database.update_player(player_id, PlayerUpdate(experience=player.experience - upgrade_cost))
+    await leaderboard.refresh_player(player_id, reward.player, shadow_delta=(
+        new_stats["attack"] - shadow.stats["attack"], new_stats["defense"] - shadow.stats["defense"]
+    ))
     
     upgrade_messages = [
         f"⚡ {shadow.name} grows stronger! Level {new_level} achieved!",
@@ -448,120 +662,70 @@ async def upgrade_shadow(player_id: str, shadow_id: str):
 
 # Instant Dungeons - Personal Training Grounds!
 @api_router.get("/players/{player_id}/instant-dungeons")
-async def get_instant_dungeons(player_id: str):
+async def get_instant_dungeons(player_id: str, request: Request):
     """Get available instant dungeons for training"""
     
-    player = await database.get_player(player_id)
+    player = await loaders_for(request).players.load(player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
     
-    # Generate level-appropriate instant dungeons
-    instant_dungeons = [
-        {
-            "id": "training_grounds",
-            "name": "🏟️ Training Grounds",
-            "description": "Perfect for beginners. Weak goblins and slimes await.",
-            "min_level": 1,
-            "max_level": 10,
-            "entry_cost": 0,
-            "rewards": ["XP", "Basic Equipment", "Goblin Shadows"],
-            "easter_egg": "🎮 Tutorial dungeon - even your grandma could clear this!"
-        },
-        {
-            "id": "shadow_realm",
-            "name": "🌑 Shadow Realm",
-            "description": "Where shadows come to train. Mysterious and dangerous.",
-            "min_level": 15,
-            "max_level": 30,
-            "entry_cost": 100,
-            "rewards": ["Shadow Essence", "Dark Equipment", "Rare Shadows"],
-            "easter_egg": "👻 'Welcome to the shadow realm, Jimbo!' - Yu-Gi-Oh vibes"
-        },
-        {
-            "id": "monarchs_trial",
-            "name": "👑 Monarch's Trial",
-            "description": "The ultimate test. Only for those who dare to become kings.",
-            "min_level": 40,
-            "max_level": 50,
-            "entry_cost": 1000,
-            "rewards": ["Monarch Equipment", "Ancient Shadows", "Crown Fragments"],
-            "easter_egg": "🏆 'Heavy is the head that wears the crown...' 👑"
-        }
-    ]
-    
-    # Filter dungeons based on player level
-    available_dungeons = [
-        d for d in instant_dungeons 
-        if player.level >= d["min_level"]
-    ]
+    catalog = get_instant_dungeon_catalog()
     
     return {
-        "available_dungeons": available_dungeons,
+        "available_dungeons": catalog.unlocked_for(player.level),
+        "in_level_range": [dungeon["id"] for dungeon in catalog.in_range_for(player.level)],
         "player_level": player.level,
         "recommendation": "Start with Training Grounds if you're new to instant dungeons!",
         "pro_tip": "💡 Instant dungeons respawn infinitely - perfect for grinding!"
     }
 
+def enterable_instant_dungeon(catalog: InstantDungeonCatalog, player: Player, dungeon_id: str) -> InstantDungeon:
+    """The instant dungeon the player wants to enter; 404 if unknown, 400 below its min_level"""
+    dungeon = catalog.get(dungeon_id)
+    if not dungeon:
+        raise HTTPException(status_code=404, detail="Instant dungeon not found")
+    if player.level < dungeon.min_level:
+        raise HTTPException(status_code=400, detail=f"{dungeon.name} requires level {dungeon.min_level}")
+    return dungeon
+
+async def settle_instant_dungeon(player_id: str, dungeon: InstantDungeon, runs: int, total_exp: int) -> Optional[RewardResult]:
+    """Charge the entry cost of every run and award the XP in one guarded write"""
+    entry_cost = dungeon.entry_cost * runs
+    if entry_cost == 0 and total_exp == 0:
+        return None
+    reward = await database.apply_rewards(
+        player_id, exp=total_exp - entry_cost, min_experience=entry_cost or None
+    )
+    if not reward:
+        if entry_cost:
+            raise HTTPException(status_code=400, detail=f"Need {entry_cost} XP to enter {dungeon.name} {runs}x")
+        return None
+    await leaderboard.refresh_player(player_id, reward.player)
+    return reward
+
 @api_router.post("/players/{player_id}/instant-dungeons/{dungeon_id}/enter")
-async def enter_instant_dungeon(player_id: str, dungeon_id: str):
+async def enter_instant_dungeon(player_id: str, dungeon_id: str, request: Request):
     """Enter an instant dungeon for training"""
     
-    player = await database.get_player(player_id)
+    player = await loaders_for(request).players.load(player_id)
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
+    catalog = get_instant_dungeon_catalog()
+    dungeon = enterable_instant_dungeon(catalog, player, dungeon_id)
     
     # Simulate dungeon encounter
-    combat_results = []
-    total_exp = 0
-    shadows_extracted = []
-    
-    # Different enemies based on dungeon
-    dungeon_enemies = {
-        "training_grounds": ["Goblin", "Slime", "Wolf"],
-        "shadow_realm": ["Shadow Goblin", "Dark Wraith", "Void Walker"],
-        "monarchs_trial": ["Elite Knight", "Ancient Dragon", "Demon Lord"]
-    }
+    table = catalog.table_for(dungeon.id)
+    rolls = encounters.roll_runs(player.level, player.combat_power, table, runs=1)
+    combat_results = encounters.encounter_log(rolls, 0, table)
+    total_exp = sum(result["exp_gained"] for result in combat_results)
+    shadows_extracted = [result["enemy"] for result in combat_results if result["shadow_available"]]
     
-    enemies = dungeon_enemies.get(dungeon_id, ["Goblin"])
-    num_encounters = random.randint(3, 7)
+    # Pay the entry cost and level up the player
+    reward = await settle_instant_dungeon(player_id, dungeon, 1, total_exp)
+    level_info = reward.level_up_info() if reward and total_exp > 0 else None
     
-    for i in range(num_encounters):
-        enemy = random.choice(enemies)
-        
-        # Combat simulation
-        player_power = game_logic.calculate_combat_power(player, [])
-        enemy_power = random.randint(50, 200) * (player.level // 5 + 1)
-        
-        victory = player_power > enemy_power * 0.7  # 70% success threshold
-        
-        if victory:
-            exp_gained = random.randint(100, 300) * (player.level // 5 + 1)
-            total_exp += exp_gained
-            
-            # Chance for shadow extraction
-            if random.random() < 0.3:  # 30% chance
-                shadows_extracted.append(enemy)
-            
-            combat_results.append({
-                "encounter": i + 1,
-                "enemy": enemy,
-                "result": "Victory! ⚔️",
-                "exp_gained": exp_gained,
-                "shadow_available": enemy in shadows_extracted
-            })
-        else:
-            combat_results.append({
-                "encounter": i + 1,
-                "enemy": enemy,
-                "result": "Defeat... 💀",
-                "exp_gained": 0,
-                "shadow_available": False
-            })
-            break  # End dungeon on defeat
-    
-    # Level up player
-    if total_exp > 0:
-        level_info = await game_logic.level_up_player(player_id, total_exp)
+    if shadows_extracted:
+        event_bus.publish(player_id, "drop", {"source": dungeon_id, "shadows_available": shadows_extracted})
     
     completion_messages = [
         "🎉 Instant dungeon cleared! Your training pays off!",
@@ -574,42 +738,69 @@ async def enter_instant_dungeon(player_id: str, dungeon_id: str):
         "dungeon_cleared": len([r for r in combat_results if "Victory" in r["result"]]) > 0,
         "encounters": combat_results,
         "total_exp_gained": total_exp,
+        "entry_cost_paid": dungeon.entry_cost,
         "shadows_available_for_extraction": shadows_extracted,
-        "level_up_info": level_info if total_exp > 0 else None,
+        "level_up_info": level_info,
         "completion_message": random.choice(completion_messages),
         "easter_egg": f"🎲 RNG was {'kind' if total_exp > 500 else 'cruel'} to you today!",
         "next_tip": "Don't forget to extract those shadows! 👻"
     }
 
+AUTO_GRIND_MAX_RUNS = 10000
+AUTO_GRIND_MAX_LOG_SAMPLE = 20
+
+@api_router.post("/players/{player_id}/instant-dungeons/{dungeon_id}/auto-grind")
+async def auto_grind_instant_dungeon(player_id: str, dungeon_id: str, request: Request,
+                                     runs: int = 100, log_sample: int = 0):
+    """Run many instant dungeon runs server-side and apply all XP at once"""
+    
+    player = await loaders_for(request).players.load(player_id)
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+    
+    runs = max(1, min(runs, AUTO_GRIND_MAX_RUNS))
+    log_sample = max(0, min(log_sample, AUTO_GRIND_MAX_LOG_SAMPLE))
+    catalog = get_instant_dungeon_catalog()
+    dungeon = enterable_instant_dungeon(catalog, player, dungeon_id)
+    
+    # Every run uses the player's power at the start of the grind
+    table = catalog.table_for(dungeon.id)
+    rolls = encounters.roll_runs(player.level, player.combat_power, table, runs)
+    summary = encounters.summarize(rolls, table, log_sample)
+    
+    # Every run pays the entry cost; nothing is awarded unless all of them can be paid
+    reward = await settle_instant_dungeon(player_id, dungeon, summary["runs"], summary["total_exp"])
+    level_info = reward.level_up_info() if reward and summary["total_exp"] > 0 else None
+    
+    if summary["shadow_candidates"]:
+        event_bus.publish(player_id, "drop", {"source": dungeon_id, "shadow_candidates": summary["shadow_candidates"]})
+    
+    return {
+        **summary,
+        "entry_cost_paid": dungeon.entry_cost * summary["runs"],
+        "level_up_info": level_info,
+        "easter_egg": f"🤖 {summary['runs']} runs on autopilot - the System approves of efficiency!"
+    }
+
 # Enhanced Story System with Rich Narrative
 @api_router.get("/players/{player_id}/story")
-async def get_player_story_progress(player_id: str):
-    """Get player's story progress with enhanced narrative"""
-    
-    chapters = await database.get_player_story_chapters(player_id)
+async def get_player_story_progress(player_id: str, include_content: bool = False):
+    """Get player's story progress with enhanced narrative; chapter content only with include_content"""
     
-    if not chapters:
-        # Initialize story chapters if they don't exist
-        story_chapters = get_story_chapters()
-        for i, chapter_data in enumerate(story_chapters):
-            chapter = StoryChapter(
-                chapter_number=chapter_data["chapter_number"],
-                title=chapter_data["title"],
-                description=chapter_data["description"],
-                content=chapter_data["content"],
-                unlocked=(i == 0),
-                player_id=player_id
-            )
-            await db.story_chapters.insert_one(chapter.dict())
-        
+    if include_content:
         chapters = await database.get_player_story_chapters(player_id)
+    else:
+        chapters = await database.get_player_story_summaries(player_id)
+    if not chapters:
+        raise HTTPException(status_code=404, detail="Player not found")
     
     # Add narrative enhancements
     enhanced_chapters = []
     for chapter in chapters:
+        content_length = len(chapter.content) if include_content else chapter.content_length
         enhanced_chapter = {
             **chapter.dict(),
-            "reading_time": f"{len(chapter.content) * 2} minutes",
+            "reading_time": f"{content_length * 2} minutes",
             "difficulty": "📖 Narrative" if chapter.chapter_number <= 2 else "⚔️ Action-Packed",
             "emotional_impact": random.choice(["😢 Heartbreaking", "😤 Intense", "😱 Shocking", "🔥 Epic", "😊 Inspiring"]),
             "fan_rating": f"⭐ {random.uniform(4.5, 5.0):.1f}/5.0"
@@ -635,100 +826,67 @@ async def get_player_story_progress(player_id: str):
 async def get_story_chapter_content(chapter_number: int):
     """Get rich story chapter content with enhanced narrative"""
     
-    chapter_data = get_chapter_by_number(chapter_number)
-    if not chapter_data:
+    chapter = get_compiled_chapter(chapter_number)
+    if not chapter:
         raise HTTPException(status_code=404, detail="Chapter not found")
     
-    # Enhance the story content with narrative elements
-    enhanced_content = []
-    
-    for content_piece in chapter_data["content"]:
-        enhanced_piece = {**content_piece}
-        
-        # Add atmospheric descriptions
-        if content_piece["type"] == "narrative":
-            enhanced_piece["atmosphere"] = random.choice([
-                "🌙 Dark and mysterious",
-                "⚡ Tense and electrifying", 
-                "🌟 Awe-inspiring",
-                "💀 Ominous and foreboding",
-                "🔥 Intense and dramatic"
-            ])
-            enhanced_piece["background_music"] = random.choice([
-                "🎵 Epic orchestral theme",
-                "🎶 Mysterious ambient sounds",
-                "🎼 Intense battle music",
-                "🎸 Emotional piano melody"
-            ])
-        
-        # Add choice consequences preview
-        if content_piece["type"] == "choice":
-            for option in enhanced_piece["options"]:
-                option["preview"] = f"This choice will affect your character development..."
-                option["popularity"] = f"{random.randint(15, 45)}% of players chose this"
-        
-        enhanced_content.append(enhanced_piece)
-    
-    # Add chapter metadata
-    chapter_meta = {
-        "word_count": sum(len(c.get("text", "")) for c in chapter_data["content"]),
-        "estimated_reading_time": f"{len(chapter_data['content']) * 3} minutes",
-        "themes": ["Power", "Growth", "Determination", "Friendship", "Sacrifice"],
-        "easter_eggs_count": random.randint(2, 5),
-        "fan_favorite_moment": "The moment when Jin-Woo first hears 'The System has awakened'",
-        "trivia": "🤓 This chapter is based on the early manhwa chapters where everything changed for Jin-Woo!"
-    }
-    
-    return {
-        "chapter": {
-            **chapter_data,
-            "content": enhanced_content,
-            "metadata": chapter_meta
-        },
-        "navigation": {
-            "previous_chapter": chapter_number - 1 if chapter_number > 1 else None,
-            "next_chapter": chapter_number + 1 if chapter_number < 6 else None
-        },
-        "reader_engagement": {
-            "likes": random.randint(5000, 15000),
-            "comments": random.randint(200, 800),
-            "shares": random.randint(50, 200)
-        },
-        "easter_egg": "🎭 'The weakest hunter becomes the strongest' - Classic shounen vibes! 💪"
-    }
+    # The static payload is pre-serialized; only the random flourishes are filled in here
+    return Response(content=chapter.render_payload(), media_type="application/json")
 
 # Equipment Enhancement System - Upgrade Your Gear!
+def with_enhancement_info(item_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Add enhancement info to a serialized equipment item"""
+    item_dict["enhancement_level"] = item_dict.get("enhancement_level", 0)
+    item_dict["max_enhancement"] = enhancement.MAX_LEVEL
+    item_dict["enhancement_cost"] = game_logic.enhancement_cost(item_dict["enhancement_level"])
+    item_dict["success_rate"] = game_logic.enhancement_success_rate(item_dict["enhancement_level"])
+    return item_dict
+
 @api_router.get("/players/{player_id}/equipment", response_model=List[Equipment])
-async def get_player_equipment(player_id: str):
-    """Get all player equipment with enhancement info"""
-    equipment = await database.get_player_equipment(player_id)
-    
-    # Add enhancement info to each item
-    enhanced_equipment = []
-    for item in equipment:
-        item_dict = item.dict()
-        item_dict["enhancement_level"] = getattr(item, "enhancement_level", 0)
-        item_dict["max_enhancement"] = 10
-        item_dict["enhancement_cost"] = (item_dict["enhancement_level"] + 1) * 1000
-        item_dict["success_rate"] = max(10, 100 - (item_dict["enhancement_level"] * 10))
-        enhanced_equipment.append(item_dict)
-    
-    return enhanced_equipment
+async def get_player_equipment(player_id: str, response: Response, after: Optional[str] = None, limit: Optional[int] = None):
+    """Get a page of player equipment with enhancement info"""
+    equipment = await player_page("equipment", player_id, after, limit, response)
+    return [with_enhancement_info(item.dict()) for item in equipment]
+
+@api_router.get("/players/{player_id}/equipment/stream")
+async def stream_player_equipment(player_id: str):
+    """All player equipment with enhancement info as NDJSON"""
+    return ndjson_stream("equipment", player_id, with_enhancement_info)
+
+@api_router.get("/enhancement/economy")
+async def get_enhancement_economy(start_level: int = 0):
+    """Cost/success curves plus expected XP cost, spread and attempt percentiles to every level"""
+    if not 0 <= start_level < enhancement.MAX_LEVEL:
+        raise HTTPException(status_code=400, detail=f"start_level must be between 0 and {enhancement.MAX_LEVEL - 1}")
+    return {
+        "max_level": enhancement.MAX_LEVEL,
+        "curves": enhancement.curves(),
+        "table": enhancement.economy_table(start_level),
+        "easter_egg": "🧮 The System did the math so you don't have to brute-force it!"
+    }
+
+@api_router.get("/players/{player_id}/equipment/{item_id}/enhancement-forecast")
+async def get_enhancement_forecast(player_id: str, item_id: str, target_level: int = enhancement.MAX_LEVEL):
+    """Expected XP cost to take one item from its current level to target_level"""
+    item = await database.get_player_item(player_id, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    try:
+        return enhancement.forecast(item.enhancement_level, target_level)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.post("/players/{player_id}/equipment/{item_id}/enhance")
-async def enhance_equipment(player_id: str, item_id: str):
+async def enhance_equipment(player_id: str, item_id: str, request: Request, use_transaction: bool = False):
     """Enhance equipment - Risk vs Reward!"""
     
-    # Get equipment
-    equipment_list = await database.get_player_equipment(player_id)
-    item = next((e for e in equipment_list if e.id == item_id), None)
-    
+    item = await database.get_player_item(player_id, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Equipment not found")
     
-    enhancement_level = getattr(item, "enhancement_level", 0)
+    enhancement_level = item.enhancement_level
     
-    if enhancement_level >= 10:
+    if enhancement_level >= enhancement.MAX_LEVEL:
         return {
             "success": False,
             "message": "Equipment is already at maximum enhancement level!",
@@ -736,10 +894,12 @@ async def enhance_equipment(player_id: str, item_id: str):
         }
     
     # Calculate costs and success rate
-    enhancement_cost = (enhancement_level + 1) * 1000
-    success_rate = max(10, 100 - (enhancement_level * 10))
+    enhancement_cost = game_logic.enhancement_cost(enhancement_level)
+    success_rate = game_logic.enhancement_success_rate(enhancement_level)
     
-    player = await database.get_player(player_id)
+    player = await loaders_for(request).players.load(player_id)
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
     if player.experience < enhancement_cost:
         return {
             "success": False,
@@ -747,28 +907,19 @@ async def enhance_equipment(player_id: str, item_id: str):
             "easter_egg": "💸 'Enhancement is expensive!' - Every MMO player ever"
         }
     
-    # Roll for success
+    # Roll for success, then charge XP and update the item in one guarded operation
     success = random.randint(1, 100) <= success_rate
+    stat_boost = game_logic.enhancement_stat_boost(item) if success else 0
+    reward = await database.enhance_equipment(
+        item, 1 if success else 0, stat_boost, enhancement_cost, use_transaction=use_transaction
+    )
+    if not reward:
+        raise HTTPException(status_code=409, detail="Your XP or this item changed during enhancement - try again")
     
     if success:
         # Successful enhancement
         new_level = enhancement_level + 1
-        stat_boost = int((item.attack or item.defense or 10) * 0.15)  # 15% boost
-        
-        # Update item stats
-        update_data = {"enhancement_level": new_level}
-        if item.attack:
-            update_data["attack"] = item.attack + stat_boost
-        if item.defense:
-            update_data["defense"] = item.defense + stat_boost
-        
-        await db.equipment.update_one(
-            {"id": item_id},
-            {"$set": update_data}
-        )
-        
-        # Deduct experience
-        await database.update_player(player_id, PlayerUpdate(experience=player.experience - enhancement_cost))
+        await leaderboard.refresh_player(player_id)
         
         success_messages = [
             f"✨ SUCCESS! {item.name} is now +{new_level}!",
@@ -796,7 +947,6 @@ async def enhance_equipment(player_id: str, item_id: str):
         
         # In some games, failure downgrades or destroys items
         # Let's be nice and just consume resources
-        await database.update_player(player_id, PlayerUpdate(experience=player.experience - enhancement_cost))
         
         return {
             "success": False,
@@ -806,13 +956,69 @@ async def enhance_equipment(player_id: str, item_id: str):
             "encouragement": "🌟 Failure is just practice for success! Try again!"
         }
 
+@api_router.post("/players/{player_id}/equipment/{item_id}/enhance/auto")
+async def auto_enhance_equipment(player_id: str, item_id: str, request: Request,
+                                 target_level: int = enhancement.MAX_LEVEL, use_transaction: bool = False):
+    """Keep enhancing until the item reaches target_level or the XP runs out"""
+    
+    item = await database.get_player_item(player_id, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    player = await loaders_for(request).players.load(player_id)
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+    
+    # Every roll is resolved up front; the outcome is written once
+    outcome = game_logic.roll_enhancements(item, player.experience, target_level)
+    if not outcome["attempts"]:
+        return {
+            "success": False,
+            "message": f"Nothing to do - {item.name} is +{item.enhancement_level} and the next attempt costs "
+                       f"{game_logic.enhancement_cost(item.enhancement_level)} XP",
+            "enhancement_level": item.enhancement_level
+        }
+    
+    levels_gained = outcome["final_level"] - outcome["start_level"]
+    reward = await database.enhance_equipment(
+        item, levels_gained, outcome["stat_increase"], outcome["total_cost"], use_transaction=use_transaction
+    )
+    if not reward:
+        raise HTTPException(status_code=409, detail="Your XP or this item changed during enhancement - try again")
+    await leaderboard.refresh_player(player_id)
+    
+    return {
+        "success": levels_gained > 0,
+        "message": f"⚒️ {len(outcome['attempts'])} attempts: {item.name} is now +{outcome['final_level']}",
+        **outcome,
+        "remaining_exp": reward.player.experience,
+        "easter_egg": "🎰 'Just one more click...' - the System did it for you"
+    }
+
+# Dungeon catalog
+@api_router.get("/dungeons", response_model=List[Dungeon])
+async def list_dungeons(difficulty: Optional[HunterRank] = None, min_level: Optional[int] = None,
+                        max_level: Optional[int] = None):
+    """Dungeons by recommended level, optionally for one difficulty or level range"""
+    catalog = database.dungeon_catalog
+    if min_level is None and max_level is None:
+        dungeons = catalog.by_difficulty(difficulty) if difficulty else catalog.all()
+    else:
+        dungeons = catalog.between(min_level if min_level is not None else 0,
+                                   max_level if max_level is not None else 10 ** 9)
+        if difficulty:
+            dungeons = [dungeon for dungeon in dungeons if dungeon.difficulty == difficulty]
+    return model_response(list(dungeons))
+
 # Combat System for Dungeons
 @api_router.post("/players/{player_id}/dungeons/{dungeon_id}/combat")
-async def dungeon_combat(player_id: str, dungeon_id: str):
+async def dungeon_combat(player_id: str, dungeon_id: str, request: Request):
     """Engage in dungeon combat with enhanced battle system"""
     
-    player = await database.get_player(player_id)
-    dungeon = await database.get_dungeon(dungeon_id)
+    loaders = loaders_for(request)
+    player, dungeon = await asyncio.gather(
+        loaders.players.load(player_id),
+        loaders.dungeons.load(dungeon_id)
+    )
     
     if not player or not dungeon:
         raise HTTPException(status_code=404, detail="Player or dungeon not found")
@@ -841,7 +1047,9 @@ async def dungeon_combat(player_id: str, dungeon_id: str):
         )
         
         # Award experience
-        await game_logic.level_up_player(player_id, combat_result["exp_gained"])
+        reward = await database.apply_rewards(player_id, exp=combat_result["exp_gained"])
+        if reward:
+            await leaderboard.refresh_player(player_id, reward.player)
         
         result = {
             "success": True,
@@ -856,6 +1064,7 @@ async def dungeon_combat(player_id: str, dungeon_id: str):
         # Add loot if equipment dropped
         if combat_result.get("equipment_drop"):
             result["loot_message"] = "💎 Rare equipment obtained! Check your inventory!"
+            event_bus.publish(player_id, "drop", {"source": dungeon_id, "equipment": combat_result["equipment_drop"]})
         
         return result
     else:
@@ -876,6 +1085,32 @@ async def dungeon_combat(player_id: str, dungeon_id: str):
             "tip": "💡 Consider upgrading your equipment or leveling up before retrying"
         }
 
+# Hunter Rankings
+@api_router.get("/rankings")
+async def get_rankings(rank: Optional[HunterRank] = None, offset: int = 0, limit: int = 50):
+    """Top hunters by total power, overall or for a single hunter rank"""
+    limit = max(1, min(limit, 100))
+    return {
+        "category": "hunter",
+        "rank": rank,
+        "total": leaderboard.total(rank),
+        "rankings": leaderboard.top(rank, offset, limit)
+    }
+
+@api_router.get("/rankings/players/{player_id}")
+async def get_player_ranking(player_id: str, radius: int = 5, rank: Optional[HunterRank] = None):
+    """A hunter's own position and the hunters around them"""
+    result = leaderboard.around(player_id, max(0, min(radius, 50)), rank)
+    if not result:
+        raise HTTPException(status_code=404, detail="Player is not ranked")
+    return result
+
+@api_router.post("/admin/rankings/rebuild")
+async def rebuild_rankings():
+    """Recompute every hunter's power and rewrite the rankings"""
+    ranked = await leaderboard.rebuild()
+    return {"ranked": ranked}
+
 # Fun Easter Eggs and Secret Endpoints
 @api_router.get("/easter-eggs/jin-woo-quotes")
 async def get_jin_woo_quotes():
@@ -921,8 +1156,12 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Opt-in brotli/gzip for large responses
+add_compression(app)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -933,7 +1172,10 @@ logger = logging.getLogger(__name__)
 # Shutdown handler
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    leaderboard.stop_periodic_reload()
+    database.dungeon_catalog.stop_periodic_reload()
+    scheduler.stop()
+    close_client()
     logger.info("Database connection closed")
 
 # Root endpoint for testing
@@ -946,24 +1188,18 @@ async def root():
         "tip": "💡 Access the API documentation at /docs for all available endpoints!"
     }
 
-# Include the router in the main app
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+    parser = argparse.ArgumentParser(description="Run the Solo Leveling API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--skip-seed", action="store_true",
+                        help="skip index provisioning and catalog seeding, e.g. for rolling restarts")
+    args = parser.parse_args()
+    if args.skip_seed:
+        # Read by every worker when it imports server:app
+        os.environ["SKIP_STARTUP_SEED"] = "true"
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers)
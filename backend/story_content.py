@@ -1,5 +1,12 @@
 # Solo Leveling Story Content
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Mapping, Optional, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+import copy
+import json
+import random
+import re
 
 def get_story_chapters() -> List[Dict[str, Any]]:
     """
@@ -465,14 +472,165 @@ def get_story_chapters() -> List[Dict[str, Any]]:
         }
     ]
 
+# Presentation flourishes overlaid on every chapter response
+ATMOSPHERES = [
+    "🌙 Dark and mysterious",
+    "⚡ Tense and electrifying", 
+    "🌟 Awe-inspiring",
+    "💀 Ominous and foreboding",
+    "🔥 Intense and dramatic"
+]
+
+BACKGROUND_MUSIC = [
+    "🎵 Epic orchestral theme",
+    "🎶 Mysterious ambient sounds",
+    "🎼 Intense battle music",
+    "🎸 Emotional piano melody"
+]
+
+CHAPTER_THEMES = ["Power", "Growth", "Determination", "Friendship", "Sacrifice"]
+
+@dataclass(frozen=True)
+class CompiledChapter:
+    """A story chapter with everything that does not change per request precomputed"""
+    chapter_number: int
+    title: str
+    description: str
+    content: Tuple[Dict[str, Any], ...]  # shared, treat as read-only
+    word_count: int
+    content_length: int
+    estimated_reading_time: str
+    previous_chapter: Optional[int]
+    next_chapter: Optional[int]
+    payload_segments: Tuple[bytes, ...]  # static JSON around the random slots
+    payload_slots: Tuple[Callable[[], Any], ...]
+
+    def render_payload(self) -> bytes:
+        """Serialized chapter response with fresh values for the random slots"""
+        parts = [self.payload_segments[0]]
+        for slot, segment in zip(self.payload_slots, self.payload_segments[1:]):
+            parts.append(json.dumps(slot(), ensure_ascii=False).encode("utf-8"))
+            parts.append(segment)
+        return b"".join(parts)
+
+class _PayloadTemplate:
+    """Collects random slots while the static response structure is built"""
+    _SLOT_PATTERN = re.compile(r'"\\u0000slot(\d+)\\u0000"')
+
+    def __init__(self):
+        self.slots: List[Callable[[], Any]] = []
+
+    def slot(self, generator: Callable[[], Any]) -> str:
+        self.slots.append(generator)
+        return f"\x00slot{len(self.slots) - 1}\x00"
+
+    def compile(self, payload: Dict[str, Any]) -> Tuple[Tuple[bytes, ...], Tuple[Callable[[], Any], ...]]:
+        serialized = json.dumps(payload, ensure_ascii=False)
+        pieces = self._SLOT_PATTERN.split(serialized)
+        # split() alternates static text and captured slot numbers
+        segments = tuple(piece.encode("utf-8") for piece in pieces[0::2])
+        slots = tuple(self.slots[int(number)] for number in pieces[1::2])
+        return segments, slots
+
+def _compile_chapter(chapter_data: Dict[str, Any], previous_chapter: Optional[int],
+                     next_chapter: Optional[int]) -> CompiledChapter:
+    content = chapter_data["content"]
+    word_count = sum(len(c.get("text", "")) for c in content)
+    estimated_reading_time = f"{len(content) * 3} minutes"
+
+    template = _PayloadTemplate()
+    enhanced_content = []
+    for content_piece in content:
+        enhanced_piece = {**content_piece}
+
+        # Add atmospheric descriptions
+        if content_piece["type"] == "narrative":
+            enhanced_piece["atmosphere"] = template.slot(lambda: random.choice(ATMOSPHERES))
+            enhanced_piece["background_music"] = template.slot(lambda: random.choice(BACKGROUND_MUSIC))
+
+        # Add choice consequences preview
+        if content_piece["type"] == "choice":
+            enhanced_piece["options"] = [
+                {
+                    **option,
+                    "preview": "This choice will affect your character development...",
+                    "popularity": template.slot(lambda: f"{random.randint(15, 45)}% of players chose this")
+                }
+                for option in content_piece["options"]
+            ]
+
+        enhanced_content.append(enhanced_piece)
+
+    payload = {
+        "chapter": {
+            **chapter_data,
+            "content": enhanced_content,
+            "metadata": {
+                "word_count": word_count,
+                "estimated_reading_time": estimated_reading_time,
+                "themes": CHAPTER_THEMES,
+                "easter_eggs_count": template.slot(lambda: random.randint(2, 5)),
+                "fan_favorite_moment": "The moment when Jin-Woo first hears 'The System has awakened'",
+                "trivia": "🤓 This chapter is based on the early manhwa chapters where everything changed for Jin-Woo!"
+            }
+        },
+        "navigation": {
+            "previous_chapter": previous_chapter,
+            "next_chapter": next_chapter
+        },
+        "reader_engagement": {
+            "likes": template.slot(lambda: random.randint(5000, 15000)),
+            "comments": template.slot(lambda: random.randint(200, 800)),
+            "shares": template.slot(lambda: random.randint(50, 200))
+        },
+        "easter_egg": "🎭 'The weakest hunter becomes the strongest' - Classic shounen vibes! 💪"
+    }
+    payload_segments, payload_slots = template.compile(payload)
+
+    return CompiledChapter(
+        chapter_number=chapter_data["chapter_number"],
+        title=chapter_data["title"],
+        description=chapter_data["description"],
+        content=tuple(content),
+        word_count=word_count,
+        content_length=len(content),
+        estimated_reading_time=estimated_reading_time,
+        previous_chapter=previous_chapter,
+        next_chapter=next_chapter,
+        payload_segments=payload_segments,
+        payload_slots=payload_slots
+    )
+
+@lru_cache(maxsize=1)
+def get_story_index() -> Mapping[int, CompiledChapter]:
+    """Compile the story corpus once into an immutable index keyed by chapter number"""
+    chapters = sorted(get_story_chapters(), key=lambda c: c["chapter_number"])
+    numbers = [c["chapter_number"] for c in chapters]
+    index = {}
+    for i, chapter_data in enumerate(chapters):
+        index[chapter_data["chapter_number"]] = _compile_chapter(
+            chapter_data,
+            previous_chapter=numbers[i - 1] if i > 0 else None,
+            next_chapter=numbers[i + 1] if i + 1 < len(numbers) else None
+        )
+    return MappingProxyType(index)
+
+def get_compiled_chapter(chapter_number: int) -> Optional[CompiledChapter]:
+    """O(1) lookup of a compiled chapter"""
+    return get_story_index().get(chapter_number)
+
 def get_chapter_by_number(chapter_number: int) -> Dict[str, Any]:
     """Get a specific chapter by number"""
-    chapters = get_story_chapters()
-    for chapter in chapters:
-        if chapter["chapter_number"] == chapter_number:
-            return chapter
-    return None
+    chapter = get_compiled_chapter(chapter_number)
+    if chapter is None:
+        return None
+    return {
+        "chapter_number": chapter.chapter_number,
+        "title": chapter.title,
+        "description": chapter.description,
+        "content": copy.deepcopy(list(chapter.content))
+    }
 
 def get_total_chapters() -> int:
     """Get the total number of available chapters"""
-    return len(get_story_chapters())
\ No newline at end of file
+    return len(get_story_index())
@@ -4,7 +4,7 @@ import { Button } from "../components/ui/button";
 import { Progress } from "../components/ui/progress";
 import { Badge } from "../components/ui/badge";
 import { Alert, AlertDescription } from "../components/ui/alert";
-import { dailyQuestAPI } from "../services/api";
+import { dailyQuestAPI, eventsAPI } from "../services/api";
 import { useAuth } from "../context/AuthContext";
 import { 
   Timer,
@@ -33,6 +33,32 @@ const DailyQuest = () => {
     loadDailyQuest();
   }, [player]);
 
+  // Penalty zone countdown - pushed by the server instead of polled
+  useEffect(() => {
+    if (!player || !penaltySession) return;
+    const events = eventsAPI.subscribe(player.id);
+    
+    events.addEventListener("penalty_tick", (message) => {
+      const tick = JSON.parse(message.data);
+      if (tick.session_id === penaltySession) {
+        setPenaltyZone((current) => ({ ...current, ...tick }));
+      }
+    });
+    
+    events.addEventListener("penalty_ended", (message) => {
+      const { session_id } = JSON.parse(message.data);
+      if (session_id !== penaltySession) return;
+      events.close();
+      setTimeout(() => {
+        alert("🎉 You survived the Penalty Zone! 🎉\n\n💀 The giant centipedes couldn't catch you!\n⚡ You've gained mental fortitude from this ordeal!");
+        setPenaltyZone(null);
+        setPenaltySession(null);
+      }, 1000);
+    });
+    
+    return () => events.close();
+  }, [player, penaltySession]);
+
   // Easter egg messages for different progress states
   const getProgressMessage = (progress) => {
     if (progress === 0) return "🌅 'A new day, a new chance to grow stronger!' - Jin-Woo";
@@ -82,28 +108,8 @@ const DailyQuest = () => {
     try {
       const penaltyData = await dailyQuestAPI.enterPenaltyZone(player.id);
       setPenaltyZone(penaltyData);
+      // Status updates arrive on the event stream opened for this session
       setPenaltySession(penaltyData.session_id);
-      
-      // Start penalty zone status updates
-      const interval = setInterval(async () => {
-        try {
-          const status = await dailyQuestAPI.getPenaltyZoneStatus(player.id, penaltyData.session_id);
-          setPenaltyZone(status);
-          
-          if (status.status === "ESCAPED") {
-            clearInterval(interval);
-            setTimeout(() => {
-              alert("🎉 You survived the Penalty Zone! 🎉\n\n💀 The giant centipedes couldn't catch you!\n⚡ You've gained mental fortitude from this ordeal!");
-              setPenaltyZone(null);
-              setPenaltySession(null);
-            }, 1000);
-          }
-        } catch (error) {
-          console.error("Failed to get penalty zone status:", error);
-          clearInterval(interval);
-        }
-      }, 5000); // Update every 5 seconds
-      
     } catch (error) {
       console.error("Failed to enter penalty zone:", error);
     }
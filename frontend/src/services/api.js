@@ -102,11 +102,13 @@ export const dailyQuestAPI = {
     const response = await api.post(`/players/${playerId}/penalty-zone`);
     return response.data;
   },
+};
 
-  // Get penalty zone status
-  async getPenaltyZoneStatus(playerId, sessionId) {
-    const response = await api.get(`/players/${playerId}/penalty-zone/${sessionId}`);
-    return response.data;
+// Push events (Server-Sent Events) - level-ups, drops, quests and the penalty zone countdown
+export const eventsAPI = {
+  // Open the player's event stream; call close() on the result when done
+  subscribe(playerId) {
+    return new EventSource(`${API_BASE_URL}/api/players/${playerId}/events`);
   },
 };
 
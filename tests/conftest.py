@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# The backend modules import each other as top-level modules (python server.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "tests")
@@ -0,0 +1,70 @@
+import pytest
+
+import cache
+from cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+def test_entries_expire_after_ttl(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl_seconds=30)
+    ttl_cache.set("a", 1)
+    clock.now += 29.9
+    assert ttl_cache.get("a") == 1
+    clock.now += 0.1
+    assert ttl_cache.get("a") is None
+    assert ttl_cache.stats()["expirations"] == 1
+
+def test_least_recently_used_entry_is_evicted(clock):
+    ttl_cache = TTLCache(maxsize=2, ttl_seconds=30)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 1 and ttl_cache.get("c") == 3
+    assert ttl_cache.evictions == 1
+
+def test_read_started_before_invalidation_does_not_fill_cache(clock):
+    ttl_cache = TTLCache()
+    version = ttl_cache.version
+    # A write lands while the read is still waiting on the database
+    ttl_cache.invalidate("player")
+    ttl_cache.set("player", "stale", version=version)
+    assert ttl_cache.get("player") is None
+
+    ttl_cache.set("player", "fresh", version=ttl_cache.version)
+    assert ttl_cache.get("player") == "fresh"
+
+def test_invalidate_and_clear(clock):
+    ttl_cache = TTLCache()
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.invalidate("a")
+    assert ttl_cache.get("a") is None and ttl_cache.get("b") == 2
+    ttl_cache.clear()
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.invalidations == 2
+
+def test_disabled_cache_stores_nothing(clock):
+    ttl_cache = TTLCache(enabled=False)
+    ttl_cache.set("a", 1)
+    assert ttl_cache.get("a") is None
+    assert TTLCache(maxsize=0).enabled is False
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("TEST_CACHE_ENABLED", "off")
+    monkeypatch.setenv("TEST_CACHE_SIZE", "5")
+    monkeypatch.setenv("TEST_CACHE_TTL_SECONDS", "2.5")
+    ttl_cache = TTLCache.from_env("TEST_CACHE")
+    assert (ttl_cache.enabled, ttl_cache.maxsize, ttl_cache.ttl_seconds) == (False, 5, 2.5)
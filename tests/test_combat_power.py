@@ -0,0 +1,46 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+import power
+from database import DatabaseManager, MISSING_COMBAT_POWER
+from models import EquipmentCreate, ItemRarity, PlayerCreate
+
+def run(coro):
+    return asyncio.run(coro)
+
+async def setup():
+    manager = DatabaseManager(AsyncMongoMockClient()["combat_power_tests"])
+    player = await manager.create_player(PlayerCreate(name="Jinwoo"))
+    return manager, player
+
+async def expected_power(manager, player_id):
+    equipped = await manager.equipment.find({"player_id": player_id, "equipped": True}).to_list(None)
+    doc = await manager.players.find_one({"id": player_id})
+    return power.combat_power(power.effective_stats(doc["stats"], power.sum_bonuses(equipped)))
+
+def test_concurrent_equips_leave_power_matching_equipped_set():
+    async def scenario():
+        manager, player = await setup()
+        swords = [
+            await manager.create_equipment(player.id, EquipmentCreate(
+                name=f"Sword {i}", type="weapon", category="sword", rarity=ItemRarity.RARE, attack=50 * (i + 1)))
+            for i in range(3)
+        ]
+        await asyncio.gather(*(manager.equip_item(player.id, sword.id) for sword in swords))
+        doc = await manager.players.find_one({"id": player.id})
+        return doc["combat_power"], await expected_power(manager, player.id)
+    stored, expected = run(scenario())
+    assert stored == expected
+
+def test_backfill_only_touches_players_without_combat_power():
+    async def scenario():
+        manager, player = await setup()
+        await manager.create_player(PlayerCreate(name="Jinah"))
+        await manager.players.update_one({"id": player.id}, {"$unset": {"combat_power": 1, "effective_stats": 1}})
+        backfilled = await manager.backfill_combat_power(MISSING_COMBAT_POWER)
+        doc = await manager.players.find_one({"id": player.id})
+        return backfilled, doc["combat_power"], await expected_power(manager, player.id)
+    backfilled, stored, expected = run(scenario())
+    assert backfilled == 1
+    assert stored == expected > 0
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import DuplicateKeyError
+
+from database import DatabaseManager
+from models import DailyQuestStatus, PlayerCreate
+from scheduler import DailyRolloverScheduler
+
+TODAY = "2026-03-10"
+YESTERDAY = "2026-03-09"
+
+async def setup():
+    manager = DatabaseManager(AsyncMongoMockClient()["daily_quest_tests"])
+    await manager.daily_quests.create_index([("player_id", 1), ("date", 1)], unique=True)
+    return manager
+
+async def create_player(manager, name: str, updated_at: datetime) -> str:
+    player = await manager.create_player(PlayerCreate(name=name))
+    await manager.players.update_one({"id": player.id}, {"$set": {"updated_at": updated_at}})
+    return player.id
+
+def test_rollover_skips_dormant_players():
+    async def scenario():
+        manager = await setup()
+        active = await create_player(manager, "Active", datetime(2026, 3, 9, 18))
+        trained = await create_player(manager, "Trained", datetime(2026, 1, 1))
+        dormant = await create_player(manager, "Dormant", datetime(2026, 1, 1))
+        await manager.daily_quests.insert_many([
+            DailyQuestStatus(player_id=trained, date=YESTERDAY, pushups=40).dict(),
+            DailyQuestStatus(player_id=dormant, date=YESTERDAY).dict()
+        ])
+        report = await DailyRolloverScheduler(manager).run_rollover(TODAY)
+        quests = await manager.daily_quests.find({"date": TODAY}).to_list(None)
+        return report, {quest["player_id"] for quest in quests}, (active, trained, dormant)
+    report, players_with_quests, (active, trained, dormant) = asyncio.run(scenario())
+    assert players_with_quests == {active, trained}
+    assert report["failed"] == 2 and report["penalty_sessions"] == 2
+    assert report["quests_created"] == 2
+
+def test_get_daily_quest_survives_concurrent_creation(monkeypatch):
+    async def scenario():
+        manager = await setup()
+        original_find_one = manager.daily_quests.find_one
+        calls = {"find_one": 0}
+
+        async def racing_find_one(*args, **kwargs):
+            calls["find_one"] += 1
+            if calls["find_one"] == 1:
+                # Another request creates the quest right after our first read
+                await manager.daily_quests.insert_one(DailyQuestStatus(player_id="p1", date=TODAY).dict())
+                return None
+            return await original_find_one(*args, **kwargs)
+
+        async def losing_upsert(*args, **kwargs):
+            raise DuplicateKeyError("E11000 duplicate key error")
+
+        monkeypatch.setattr(manager.daily_quests, "find_one", racing_find_one)
+        monkeypatch.setattr(manager.daily_quests, "find_one_and_update", losing_upsert)
+        return await manager.get_daily_quest("p1", TODAY)
+    quest = asyncio.run(scenario())
+    assert quest.player_id == "p1" and quest.date == TODAY
+
+def test_manual_penalty_entry_opens_one_session_per_quest():
+    async def scenario():
+        manager = await setup()
+        quest = await manager.get_daily_quest("p1", TODAY)
+        first = await manager.open_penalty_session(quest)
+        second = await manager.open_penalty_session(quest)
+        stored = await manager.get_daily_quest("p1", TODAY)
+        sessions = await manager.penalty_zones.count_documents({"player_id": "p1"})
+        # The rollover does not open a second session for the same quest
+        await manager.daily_quests.update_one({"id": quest.id}, {"$set": {"failed": True}})
+        reopened = await manager.open_penalty_sessions(TODAY)
+        return first, second, stored, sessions, reopened
+    first, second, stored, sessions, reopened = asyncio.run(scenario())
+    assert first is not None and second is None
+    assert stored.penalty_session_id == first.id
+    assert sessions == 1 and reopened == 0
+
+def test_completed_quest_gets_no_manual_penalty():
+    async def scenario():
+        manager = await setup()
+        quest = await manager.get_daily_quest("p1", TODAY)
+        await manager.daily_quests.update_one({"id": quest.id}, {"$set": {"completed": True}})
+        return await manager.open_penalty_session(quest), await manager.penalty_zones.count_documents({})
+    session, sessions = asyncio.run(scenario())
+    assert session is None and sessions == 0
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from dataloader import DataLoader
+
+class FakeSource:
+    def __init__(self, fail_times: int = 0):
+        self.calls = []
+        self.fail_times = fail_times
+
+    async def get_many(self, keys):
+        self.calls.append(list(keys))
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("database unavailable")
+        return {key: key.upper() for key in keys if key != "missing"}
+
+def test_keys_loaded_in_the_same_tick_share_one_batch():
+    async def scenario():
+        source = FakeSource()
+        loader = DataLoader(source.get_many)
+        values = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"), loader.load("missing"))
+        return values, source.calls, loader.batches
+    values, calls, batches = asyncio.run(scenario())
+    assert values == ["A", "B", "A", None]
+    assert calls == [["a", "b", "missing"]] and batches == 1
+
+def test_loaded_keys_are_memoized_until_cleared():
+    async def scenario():
+        source = FakeSource()
+        loader = DataLoader(source.get_many)
+        await loader.load("a")
+        await loader.load("a")
+        loader.clear("a")
+        await loader.load("a")
+        loader.prime("b", "primed")
+        return await loader.load("b"), source.calls
+    primed, calls = asyncio.run(scenario())
+    assert calls == [["a"], ["a"]]
+    assert primed == "primed"
+
+def test_batches_are_split_at_max_batch_size():
+    async def scenario():
+        source = FakeSource()
+        loader = DataLoader(source.get_many, max_batch_size=2)
+        values = await loader.load_many(["a", "b", "c", "d", "e"])
+        return values, source.calls
+    values, calls = asyncio.run(scenario())
+    assert values == ["A", "B", "C", "D", "E"]
+    assert calls == [["a", "b"], ["c", "d"], ["e"]]
+
+def test_failed_batch_fails_its_callers_and_is_retried():
+    async def scenario():
+        source = FakeSource(fail_times=1)
+        loader = DataLoader(source.get_many)
+        results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+        return results, await loader.load("a")
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == "A"
+
+def test_bad_batch_result_does_not_leave_callers_hanging():
+    async def scenario():
+        async def broken(keys):
+            return None
+        loader = DataLoader(broken)
+        with pytest.raises(AttributeError):
+            await asyncio.wait_for(loader.load("a"), timeout=1)
+    asyncio.run(scenario())
+
+def test_cancelled_caller_does_not_cancel_other_callers():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow(keys):
+            await release.wait()
+            return {key: key.upper() for key in keys}
+        loader = DataLoader(slow)
+        first = asyncio.ensure_future(loader.load("a"))
+        second = asyncio.ensure_future(loader.load("a"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        release.set()
+        return await asyncio.wait_for(second, timeout=1), loader._tasks
+    value, tasks = asyncio.run(scenario())
+    assert value == "A"
+    assert not tasks
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pydantic import ValidationError
+
+import documents
+from database import VERSIONED_COLLECTIONS, DatabaseManager
+from documents import current_version, from_document
+from models import *
+
+SAMPLES = {
+    Player: Player(name="Jinwoo", level=12, combat_power=340),
+    Equipment: Equipment(name="Kasaka's Fang", type="weapon", category="dagger", rarity=ItemRarity.RARE,
+                         attack=35, player_id="p1"),
+    Shadow: Shadow(name="Igris", type="Knight", rarity=ItemRarity.LEGENDARY, skills=["Sword Dance"], player_id="p1"),
+    Quest: Quest(title="Hunt", description="Clear a dungeon", type=QuestType.DAILY, reward="XP", player_id="p1"),
+    DungeonAttempt: DungeonAttempt(player_id="p1", dungeon_id="d1", cleared=True, rewards_gained=["XP"]),
+    DailyQuestStatus: DailyQuestStatus(player_id="p1", date="2026-03-10", pushups=40, penalty_session_id="s1"),
+    PenaltyZoneSession: PenaltyZoneSession(player_id="p1", quest_date="2026-03-09"),
+    Dungeon: Dungeon(name="Double Dungeon", difficulty=HunterRank.S, recommended_level=30,
+                     monsters=["Statue"], rewards=["Key"], description="Hidden")
+}
+
+def stored_precision(instance):
+    """The instance with its datetimes cut to BSON's millisecond precision"""
+    return instance.model_copy(update={
+        name: value.replace(microsecond=value.microsecond // 1000 * 1000)
+        for name, value in instance.__dict__.items() if isinstance(value, datetime)
+    })
+
+def test_every_versioned_model_has_a_sample():
+    assert set(VERSIONED_COLLECTIONS.values()) == set(SAMPLES)
+
+def stored_documents():
+    """Each sample as it comes back out of its collection"""
+    async def scenario():
+        db = AsyncMongoMockClient()["document_tests"]
+        stored = {}
+        for collection_name, model in VERSIONED_COLLECTIONS.items():
+            await db[collection_name].insert_one(SAMPLES[model].dict())
+            stored[model] = await db[collection_name].find_one()
+        return stored
+    return asyncio.run(scenario())
+
+def test_stored_documents_read_back_as_the_written_models():
+    for model, doc in stored_documents().items():
+        assert doc["schema_version"] == current_version(model)
+        assert from_document(model, doc) == stored_precision(SAMPLES[model])
+
+def test_old_and_missing_schema_versions_are_validated():
+    doc = stored_documents()[Player]
+    # Written before schema_version and combat_power existed
+    for field in ("schema_version", "combat_power", "effective_stats"):
+        del doc[field]
+    doc["rank"] = "E"
+    player = from_document(Player, doc)
+    assert player.rank is HunterRank.E and player.combat_power == 0
+    assert player.schema_version == current_version(Player)
+
+    doc = stored_documents()[Shadow]
+    doc["schema_version"] = 0
+    doc["level"] = "not a level"
+    with pytest.raises(ValidationError):
+        from_document(Shadow, doc)
+
+def test_builds_are_timed_per_model(monkeypatch):
+    monkeypatch.setattr(documents, "timings", documents.BuildTimings())
+    stored = stored_documents()
+    for _ in range(3):
+        from_document(Quest, stored[Quest])
+    stats = documents.timings.stats()["models"]
+    assert list(stats) == ["Quest"] and stats["Quest"]["documents"] == 3
+    documents.timings.reset()
+    assert documents.timings.stats() == {"models": {}}
+
+def test_manager_reads_go_through_from_document(monkeypatch):
+    monkeypatch.setattr(documents, "timings", documents.BuildTimings())
+
+    async def scenario():
+        manager = DatabaseManager(AsyncMongoMockClient()["document_tests"])
+        player = await manager.create_player(PlayerCreate(name="Jinwoo"))
+        manager.player_cache.invalidate(player.id)
+        return player, await manager.get_player(player.id)
+    created, loaded = asyncio.run(scenario())
+    assert loaded == stored_precision(created)
+    assert documents.timings.stats()["models"]["Player"]["documents"] >= 1
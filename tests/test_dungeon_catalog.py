@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from database import DatabaseManager
+from dungeon_catalog import DungeonCatalog
+from models import Dungeon, HunterRank
+
+DUNGEONS = [
+    Dungeon(name="Red Gate", difficulty=HunterRank.C, recommended_level=35, monsters=["Ice Elf"],
+            rewards=["Ice Crystal"], description="Frozen"),
+    Dungeon(name="Goblin Cave", difficulty=HunterRank.E, recommended_level=5, monsters=["Goblin"],
+            rewards=["Dagger"], description="Damp"),
+    Dungeon(name="Orc Fortress", difficulty=HunterRank.C, recommended_level=30, monsters=["High Orc"],
+            rewards=["Axe"], description="Loud"),
+    Dungeon(name="Spider Nest", difficulty=HunterRank.D, recommended_level=15, monsters=["Spider"],
+            rewards=["Silk"], description="Sticky")
+]
+# Added after the catalog was loaded
+DOUBLE_DUNGEON = Dungeon(name="Double Dungeon", difficulty=HunterRank.S, recommended_level=1, monsters=["Statue"],
+                         rewards=["Key"], description="Hidden")
+
+async def loaded_catalog(dungeons=DUNGEONS) -> DungeonCatalog:
+    collection = AsyncMongoMockClient()["catalog_tests"]["dungeons"]
+    if dungeons:
+        await collection.insert_many([dungeon.dict() for dungeon in dungeons])
+    catalog = DungeonCatalog(collection)
+    await catalog.load()
+    return catalog
+
+def names(dungeons):
+    return [dungeon.name for dungeon in dungeons]
+
+def test_indexes():
+    catalog = asyncio.run(loaded_catalog())
+    assert len(catalog.snapshot) == 4 and catalog.loaded
+    red_gate = DUNGEONS[0]
+    assert catalog.get(red_gate.id).name == "Red Gate"
+    assert catalog.get("missing") is None
+    assert (catalog.stats()["hits"], catalog.stats()["misses"]) == (1, 1)
+    assert catalog.by_name("Spider Nest").id == DUNGEONS[3].id
+    assert catalog.by_name("Double Dungeon") is None
+    assert names(catalog.by_difficulty(HunterRank.C)) == ["Orc Fortress", "Red Gate"]
+    assert catalog.by_difficulty(HunterRank.S) == ()
+    assert names(catalog.all()) == ["Goblin Cave", "Spider Nest", "Orc Fortress", "Red Gate"]
+    # Bounds are inclusive
+    assert names(catalog.between(15, 30)) == ["Spider Nest", "Orc Fortress"]
+    assert names(catalog.between(31, 34)) == []
+    assert names(catalog.between(0, 100)) == names(catalog.all())
+
+def test_snapshots_are_read_only():
+    catalog = asyncio.run(loaded_catalog())
+    with pytest.raises(TypeError):
+        catalog.snapshot.by_id["new"] = DUNGEONS[0]
+    with pytest.raises(TypeError):
+        catalog.snapshot.by_difficulty[HunterRank.S] = ()
+
+def test_an_empty_catalog():
+    catalog = asyncio.run(loaded_catalog([]))
+    assert catalog.loaded and len(catalog.snapshot) == 0
+    assert catalog.all() == () and catalog.between(0, 100) == ()
+
+def test_refresh_swaps_in_a_new_snapshot():
+    async def scenario():
+        catalog = await loaded_catalog()
+        before = catalog.snapshot
+        await catalog.collection.update_one({"name": "Red Gate"}, {"$set": {"recommended_level": 40}})
+        await catalog.collection.insert_one(DOUBLE_DUNGEON.dict())
+        return before, await catalog.load(), catalog
+    before, count, catalog = asyncio.run(scenario())
+    assert count == 5 and catalog.snapshot is not before
+    assert catalog.by_name("Red Gate").recommended_level == 40
+    assert names(catalog.by_difficulty(HunterRank.S)) == ["Double Dungeon"]
+    # Readers still holding the old snapshot see it unchanged
+    assert len(before) == 4 and before.by_name["Red Gate"].recommended_level == 35
+
+def test_periodic_reload_keeps_the_previous_snapshot_when_a_load_fails(monkeypatch, caplog):
+    async def scenario():
+        catalog = await loaded_catalog()
+        before, loaded_at = catalog.snapshot, catalog.loaded_at
+        attempts = []
+
+        def find_fails(*args, **kwargs):
+            attempts.append(1)
+            raise ConnectionError("primary stepped down")
+        catalog.reload_interval = 0.01
+        original = catalog.collection.find
+        monkeypatch.setattr(catalog.collection, "find", find_fails)
+        catalog.start_periodic_reload()
+        await asyncio.sleep(0.05)
+        failed = (catalog.snapshot is before, catalog.loaded_at == loaded_at, len(attempts))
+        # The loop keeps going and picks up the collection once it is readable again
+        monkeypatch.setattr(catalog.collection, "find", original)
+        await catalog.collection.delete_one({"name": "Goblin Cave"})
+        await asyncio.sleep(0.05)
+        catalog.stop_periodic_reload()
+        return failed, catalog
+    (kept, same_load_time, attempts), catalog = asyncio.run(scenario())
+    assert kept and same_load_time and attempts >= 2
+    assert "Dungeon catalog reload failed: primary stepped down" in caplog.text
+    assert len(catalog.snapshot) == 3 and catalog.by_name("Goblin Cave") is None
+
+def test_unknown_ids_fall_through_to_the_collection():
+    async def scenario():
+        manager = DatabaseManager(AsyncMongoMockClient()["catalog_tests"])
+        await manager.initialize_game_data()
+        await manager.dungeon_catalog.load()
+        await manager.dungeons.insert_one(DOUBLE_DUNGEON.dict())
+        known = manager.dungeon_catalog.all()[0]
+        return known, await manager.get_dungeons([known.id, DOUBLE_DUNGEON.id, "missing"])
+    known, found = asyncio.run(scenario())
+    assert set(found) == {known.id, DOUBLE_DUNGEON.id}
+    assert found[known.id] is known
+    assert found[DOUBLE_DUNGEON.id].name == "Double Dungeon"
@@ -0,0 +1,112 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import encounters
+import server
+from database import DatabaseManager
+from dataloader import RequestLoaders
+from leaderboard import Leaderboard
+from models import Player, PlayerCreate, RewardResult
+
+TABLE = encounters.EncounterTable(enemies=("Goblin", "Slime"), exp_range=(100, 300), shadow_chance=0.5)
+
+def roll(combat_power: int, runs: int = 2000, level: int = 1):
+    return encounters.roll_runs(level, combat_power, TABLE, runs, rng=np.random.default_rng(3))
+
+def test_runs_stop_at_the_first_defeat():
+    rolls = roll(combat_power=100)
+    fought, victories = rolls["fought"], rolls["victories"]
+    lost = fought & ~victories
+    # At most one defeat per run, and nothing is fought after it
+    assert (lost.sum(axis=1) <= 1).all()
+    after_defeat = np.cumsum(lost, axis=1) - lost > 0
+    assert not (fought & after_defeat).any()
+    # Fought encounters are a prefix of the run
+    assert (np.diff(fought.astype(int), axis=1) <= 0).all()
+    assert lost.any() and victories.any()
+
+def test_encounter_counts_follow_the_plan_when_every_fight_is_won():
+    rolls = roll(combat_power=10 ** 6)
+    counts = rolls["fought"].sum(axis=1)
+    assert counts.min() == encounters.ENCOUNTER_RANGE[0] and counts.max() == encounters.ENCOUNTER_RANGE[1]
+    assert (rolls["victories"] == rolls["fought"]).all()
+
+def test_exp_and_shadows_only_come_from_victories():
+    rolls = roll(combat_power=120, level=10)
+    multiplier = encounters.level_multiplier(10)
+    won_exp = rolls["exp"][rolls["victories"]]
+    assert (rolls["exp"][~rolls["victories"]] == 0).all()
+    assert won_exp.min() >= 100 * multiplier and won_exp.max() <= 300 * multiplier
+    assert not (rolls["shadow"] & ~rolls["victories"]).any()
+
+def test_summary_matches_the_per_run_logs():
+    rolls = roll(combat_power=150, runs=50)
+    summary = encounters.summarize(rolls, TABLE, log_sample=50)
+    logs = summary["encounter_logs"]
+    assert summary["runs"] == 50 and len(logs) == 50
+    assert summary["encounters"] == sum(len(log) for log in logs)
+    assert summary["total_exp"] == sum(entry["exp_gained"] for log in logs for entry in log)
+    assert sum(summary["shadow_candidates"].values()) == sum(entry["shadow_available"] for log in logs for entry in log)
+    assert summary["clears"] == sum(any(entry["result"] == encounters.VICTORY_LABEL for entry in log) for log in logs)
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = DatabaseManager(AsyncMongoMockClient()["encounter_tests"])
+
+    async def apply_rewards(player_id, exp=0, min_experience=None, **kwargs):
+        # mongomock cannot run the level curve pipeline; keep the guarded XP write
+        query = {"id": player_id}
+        if min_experience is not None:
+            query["experience"] = {"$gte": min_experience}
+        doc = await manager.players.find_one_and_update(query, {"$inc": {"experience": exp}}, {"_id": 0})
+        if not doc:
+            return None
+        player = Player(**doc)
+        return RewardResult(player=player, exp_gained=exp, old_level=player.level, new_level=player.level)
+    monkeypatch.setattr(manager, "apply_rewards", apply_rewards)
+    monkeypatch.setattr(server, "database", manager)
+    monkeypatch.setattr(server, "leaderboard", Leaderboard(manager))
+    monkeypatch.setattr(server, "loaders_for", lambda request: RequestLoaders(manager))
+    return manager
+
+@pytest.fixture
+def client(manager):
+    return TestClient(server.app)
+
+def create_player(manager, level: int = 1, experience: int = 0) -> str:
+    async def scenario():
+        player = await manager.create_player(PlayerCreate(name="Jinwoo"))
+        await manager.players.update_one({"id": player.id}, {"$set": {"level": level, "experience": experience}})
+        return player.id
+    return asyncio.run(scenario())
+
+def experience(manager, player_id: str) -> int:
+    return asyncio.run(manager.players.find_one({"id": player_id}))["experience"]
+
+def test_auto_grind_enforces_min_level(client, manager):
+    player_id = create_player(manager, level=1, experience=10 ** 6)
+    response = client.post(f"/api/players/{player_id}/instant-dungeons/shadow_realm/auto-grind", params={"runs": 5})
+    assert response.status_code == 400
+    assert experience(manager, player_id) == 10 ** 6
+
+def test_auto_grind_charges_the_entry_cost_of_every_run(client, manager):
+    player_id = create_player(manager, level=20, experience=10 ** 6)
+    response = client.post(f"/api/players/{player_id}/instant-dungeons/shadow_realm/auto-grind", params={"runs": 5})
+    body = response.json()
+    assert response.status_code == 200 and body["entry_cost_paid"] == 500
+    assert experience(manager, player_id) == 10 ** 6 + body["total_exp"] - 500
+
+def test_auto_grind_without_enough_xp_awards_nothing(client, manager):
+    player_id = create_player(manager, level=20, experience=150)
+    response = client.post(f"/api/players/{player_id}/instant-dungeons/shadow_realm/auto-grind", params={"runs": 2})
+    assert response.status_code == 400
+    assert experience(manager, player_id) == 150
+
+def test_unknown_instant_dungeon_is_a_404(client, manager):
+    player_id = create_player(manager)
+    assert client.post(f"/api/players/{player_id}/instant-dungeons/nowhere/enter").status_code == 404
+    assert client.post(f"/api/players/{player_id}/instant-dungeons/nowhere/auto-grind").status_code == 404
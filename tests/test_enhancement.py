@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+import pytest
+
+import enhancement
+
+def geometric_sums(start: int, target: int):
+    """Closed forms for the no-downgrade chain: one geometric number of attempts per level"""
+    levels = range(start, target)
+    p = [enhancement.success_probability(level) for level in levels]
+    c = [enhancement.cost(level) for level in levels]
+    return {
+        "expected_cost": sum(ci / pi for ci, pi in zip(c, p)),
+        "cost_std": math.sqrt(sum(ci ** 2 * (1 - pi) / pi ** 2 for ci, pi in zip(c, p))),
+        "expected_attempts": sum(1 / pi for pi in p),
+        "attempts_std": math.sqrt(sum((1 - pi) / pi ** 2 for pi in p)),
+    }
+
+@pytest.mark.parametrize("start,target", [(0, 1), (0, 5), (3, 7), (0, enhancement.MAX_LEVEL), (9, 10)])
+def test_forecast_matches_closed_form(start, target):
+    forecast = enhancement.forecast(start, target)
+    for field, value in geometric_sums(start, target).items():
+        assert forecast[field] == pytest.approx(value, rel=1e-9)
+
+def test_attempt_distribution_is_a_distribution():
+    pmf = enhancement.attempt_distribution(0, enhancement.MAX_LEVEL)
+    attempts = np.arange(len(pmf))
+    assert pmf.min() >= 0
+    assert pmf.sum() == pytest.approx(1, abs=1e-8)
+    # The first MAX_LEVEL attempts can only all succeed
+    assert pmf[:enhancement.MAX_LEVEL].sum() == 0
+    assert pmf[enhancement.MAX_LEVEL] == pytest.approx(
+        np.prod([enhancement.success_probability(level) for level in range(enhancement.MAX_LEVEL)])
+    )
+    assert (attempts * pmf).sum() == pytest.approx(enhancement.forecast(0, enhancement.MAX_LEVEL)["expected_attempts"], rel=1e-6)
+    assert enhancement.attempt_distribution(5, 5).tolist() == [1.0]
+
+def test_percentiles_are_ordered():
+    forecast = enhancement.forecast(0, enhancement.MAX_LEVEL)
+    assert enhancement.MAX_LEVEL <= forecast["attempts_p50"] <= forecast["attempts_p90"] <= forecast["attempts_p99"]
+
+@pytest.mark.parametrize("start,target", [(-1, 3), (3, 3), (5, 2), (0, enhancement.MAX_LEVEL + 1)])
+def test_forecast_rejects_bad_ranges(start, target):
+    with pytest.raises(ValueError):
+        enhancement.forecast(start, target)
+
+def test_simulation_agrees_with_the_chain():
+    comparison = enhancement.compare_with_simulation(0, 6, trials=50000, rng=np.random.default_rng(11))
+    assert abs(comparison["cost_z"]) < 4 and abs(comparison["attempts_z"]) < 4
+
+def test_downgrades_make_enhancing_dearer(monkeypatch):
+    baseline = enhancement.forecast(0, 5)["expected_cost"]
+    monkeypatch.setattr(enhancement, "FAILURE_DOWNGRADE_CHANCE", 0.5)
+    enhancement._forecast.cache_clear()
+    enhancement._attempt_distribution.cache_clear()
+    try:
+        downgraded = enhancement.forecast(0, 5)
+        # +0 -> +1 cannot drop below the start level, so the first step is unchanged
+        assert enhancement.forecast(0, 1)["expected_cost"] == pytest.approx(geometric_sums(0, 1)["expected_cost"])
+    finally:
+        enhancement._forecast.cache_clear()
+        enhancement._attempt_distribution.cache_clear()
+    assert downgraded["expected_cost"] > baseline
+    assert enhancement.attempt_distribution(0, 5).sum() == pytest.approx(1, abs=1e-8)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import events
+import server
+from database import DatabaseManager
+from events import ConnectionLimitError, EventBus, event_stream, penalty_progress
+from models import PlayerCreate
+
+START = datetime(2026, 3, 10, 12)
+
+def parse(frame: str):
+    fields = dict(line.split(": ", 1) for line in frame.strip().split("\n") if not line.startswith(":"))
+    return fields.get("event"), json.loads(fields["data"]) if "data" in fields else None
+
+async def frames(stream, count: int):
+    return [parse(await stream.__anext__()) for _ in range(count)]
+
+def test_full_queue_drops_the_oldest_events():
+    bus = EventBus(queue_size=2)
+    subscription = bus.subscribe("p1")
+    for level in (2, 3, 4):
+        bus.publish("p1", "level_up", {"new_level": level})
+    queued = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+    assert [event["data"]["new_level"] for event in queued] == [3, 4]
+    assert subscription.dropped == 1 and bus.stats()["dropped"] == 1
+
+def test_a_lagging_stream_is_told_how_much_it_missed():
+    async def scenario():
+        bus = EventBus(queue_size=2)
+        subscription = bus.subscribe("p1")
+        for level in (2, 3, 4):
+            bus.publish("p1", "level_up", {"new_level": level})
+        stream = event_stream(subscription)
+        await stream.__anext__()  # retry interval
+        received = await frames(stream, 4)
+        await stream.aclose()
+        return [frame for frame in received if frame != (None, None)]  # heartbeats
+    assert asyncio.run(scenario())[:3] == [
+        ("connected", {"player_id": "p1"}),
+        ("lagged", {"dropped": 1}),
+        ("level_up", {"new_level": 3})
+    ]
+
+def test_connection_limits():
+    bus = EventBus(max_connections=3, max_connections_per_player=2)
+    bus.subscribe("p1")
+    bus.subscribe("p1")
+    with pytest.raises(ConnectionLimitError):
+        bus.subscribe("p1")
+    bus.subscribe("p2")
+    with pytest.raises(ConnectionLimitError):
+        bus.subscribe("p3")
+    assert bus.stats()["connections"] == 3 and bus.stats()["rejected"] == 2
+
+def test_closing_the_stream_unsubscribes():
+    async def scenario():
+        bus = EventBus(max_connections_per_player=1)
+        subscription = bus.subscribe("p1")
+        stream = event_stream(subscription)
+        await stream.__anext__()
+        await stream.aclose()
+        return bus, subscription
+    bus, subscription = asyncio.run(scenario())
+    assert bus.stats()["connections"] == 0 and not bus.is_subscribed("p1")
+    assert bus.publish("p1", "level_up") == 0
+    subscription.close()  # closing twice is harmless
+    assert bus.stats()["connections"] == 0
+    bus.subscribe("p1")
+
+def test_a_stream_that_never_starts_frees_its_slot(monkeypatch):
+    bus = EventBus(max_connections_per_player=1)
+    monkeypatch.setattr(server, "event_bus", bus)
+    manager = DatabaseManager(AsyncMongoMockClient()["event_tests"])
+    monkeypatch.setattr(server, "database", manager)
+
+    class Request:
+        async def is_disconnected(self):
+            return True
+
+    async def receive():
+        await asyncio.sleep(60)
+
+    async def send(message):
+        # The client is gone before the stream's first frame
+        raise OSError("connection reset")
+
+    async def scenario():
+        player = await manager.create_player(PlayerCreate(name="Jinwoo"))
+        for _ in range(3):
+            response = await server.player_events(player.id, Request())
+            with pytest.raises(Exception):  # the OSError, possibly in an ExceptionGroup
+                await response({"type": "http"}, receive, send)
+        return player
+    player = asyncio.run(scenario())
+    assert bus.stats()["connections"] == 0 and bus.stats()["rejected"] == 0
+    bus.subscribe(player.id)
+
+def test_penalty_progress_is_derived_from_the_start_time():
+    assert penalty_progress(START, 60, now=START + timedelta(minutes=15)) == {
+        "elapsed_minutes": 15,
+        "remaining_minutes": 45,
+        "remaining_seconds": 2700,
+        "progress_percent": 25.0,
+        "status": "SURVIVING"
+    }
+    ended = penalty_progress(START, 60, now=START + timedelta(minutes=61))
+    assert (ended["remaining_seconds"], ended["progress_percent"], ended["status"]) == (0, 100, "ESCAPED")
+    # A clock behind the start time counts as not started
+    assert penalty_progress(START, 60, now=START - timedelta(minutes=5))["elapsed_minutes"] == 0
+
+def stream_penalty(started_minutes_ago: int, count: int):
+    async def scenario():
+        subscription = EventBus().subscribe("p1")
+        session = {"id": "s1", "start_time": datetime.utcnow() - timedelta(minutes=started_minutes_ago),
+                   "duration_minutes": 60}
+        stream = event_stream(subscription, session)
+        await stream.__anext__()  # retry interval
+        received = await frames(stream, count)
+        await stream.aclose()
+        return received
+    return asyncio.run(scenario())
+
+def test_stream_ticks_a_running_penalty(monkeypatch):
+    monkeypatch.setattr(events, "PENALTY_TICK_SECONDS", 0.01)
+    received = stream_penalty(started_minutes_ago=30, count=3)
+    assert [name for name, _ in received] == ["connected", "penalty_tick", "penalty_tick"]
+    tick = received[1][1]
+    assert tick["session_id"] == "s1" and tick["status"] == "SURVIVING"
+    assert 29 <= tick["remaining_minutes"] <= 30
+
+def test_stream_ends_an_escaped_penalty(monkeypatch):
+    monkeypatch.setattr(events, "HEARTBEAT_SECONDS", 0.01)
+    received = stream_penalty(started_minutes_ago=61, count=4)
+    assert [name for name, _ in received[:3]] == ["connected", "penalty_tick", "penalty_ended"]
+    assert received[1][1]["status"] == "ESCAPED" and received[2][1] == {"session_id": "s1"}
+    # Back to heartbeats
+    assert received[3] == (None, None)
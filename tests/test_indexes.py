@@ -0,0 +1,34 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from indexes import IndexManager, IndexSpec
+
+PLAN = [
+    IndexSpec(collection="shadows", keys=[("id", 1)], unique=True, reason="by id"),
+    IndexSpec(collection="shadows", keys=[("player_id", 1), ("_id", 1)], reason="pages by player"),
+    IndexSpec(collection="quests", keys=[("player_id", 1)], reason="by player"),
+]
+
+def test_one_conflicting_index_does_not_block_the_others():
+    async def scenario():
+        mongo_db = AsyncMongoMockClient()["index_tests"]
+        # Duplicate ids make the unique index impossible to build
+        await mongo_db.shadows.insert_many([{"id": "s1", "player_id": "p1"}, {"id": "s1", "player_id": "p2"}])
+        report = await IndexManager(mongo_db, PLAN).ensure_indexes()
+        return report, await mongo_db.shadows.index_information(), await mongo_db.quests.index_information()
+    report, shadow_indexes, quest_indexes = asyncio.run(scenario())
+    assert list(report["errors"]) == ["shadows.id_1"]
+    assert report["created"]["shadows"] == ["player_id_1__id_1"]
+    assert "player_id_1__id_1" in shadow_indexes and "id_1" not in shadow_indexes
+    assert "player_id_1" in quest_indexes
+
+def test_ensure_indexes_is_idempotent():
+    async def scenario():
+        mongo_db = AsyncMongoMockClient()["index_tests"]
+        manager = IndexManager(mongo_db, PLAN)
+        await manager.ensure_indexes()
+        return await manager.ensure_indexes(), await mongo_db.shadows.index_information()
+    report, shadow_indexes = asyncio.run(scenario())
+    assert report["errors"] == {}
+    assert {"id_1", "player_id_1__id_1"} <= set(shadow_indexes)
@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+from pydantic import ValidationError
+
+import instant_dungeons
+from instant_dungeons import DEFAULT_INSTANT_DUNGEONS, InstantDungeonCatalog
+
+DUNGEON = {"id": "ant_island", "name": "Jeju Island", "description": "Ants",
+           "min_level": 60, "max_level": 80, "entry_cost": 5000, "enemies": ["Soldier Ant", "Ant King"]}
+
+def test_level_index_matches_a_scan():
+    catalog = InstantDungeonCatalog(DEFAULT_INSTANT_DUNGEONS)
+    for level in range(0, 60):
+        assert [d["id"] for d in catalog.unlocked_for(level)] == \
+            [d.id for d in DEFAULT_INSTANT_DUNGEONS if d.min_level <= level]
+        assert {d["id"] for d in catalog.in_range_for(level)} == \
+            {d.id for d in DEFAULT_INSTANT_DUNGEONS if d.min_level <= level <= d.max_level}
+
+@pytest.fixture
+def catalog_file(tmp_path, monkeypatch):
+    path = tmp_path / "instant_dungeons.json"
+    path.write_text(json.dumps([DUNGEON]))
+    monkeypatch.setattr(instant_dungeons, "_catalog", instant_dungeons._catalog)
+    monkeypatch.setattr(instant_dungeons, "_catalog_file", None)
+    monkeypatch.setattr(instant_dungeons, "_catalog_mtime", None)
+    monkeypatch.setattr(instant_dungeons, "_last_check", 0.0)
+    instant_dungeons.reload_catalog(str(path))
+    return path
+
+def rewrite(path, content, monkeypatch, seconds: int):
+    path.write_text(content)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + seconds))
+    monkeypatch.setattr(instant_dungeons, "_last_check", 0.0)
+
+@pytest.mark.parametrize("content", [
+    "[{not json",
+    json.dumps([{**DUNGEON, "min_level": None}]),
+    json.dumps([{**DUNGEON, "enemies": 3}]),
+    json.dumps({"id": "not a list"}),
+    json.dumps([["not", "an", "object"]]),
+])
+def test_bad_catalog_file_keeps_previous_catalog(catalog_file, monkeypatch, content):
+    previous = instant_dungeons.get_catalog()
+    assert previous.get("ant_island") is not None
+
+    rewrite(catalog_file, content, monkeypatch, 10)
+    assert instant_dungeons.get_catalog() is previous
+    assert instant_dungeons._catalog_mtime == os.path.getmtime(catalog_file)
+
+def test_wrong_types_are_validation_errors(tmp_path):
+    path = tmp_path / "instant_dungeons.json"
+    path.write_text(json.dumps([{**DUNGEON, "max_level": None}]))
+    with pytest.raises(ValidationError):
+        instant_dungeons.reload_catalog(str(path))
@@ -0,0 +1,97 @@
+import asyncio
+import random
+from datetime import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+from database import DatabaseManager
+from leaderboard import HUNTER_CATEGORY, Leaderboard, RankIndex
+from models import PlayerCreate
+
+class SmallRankIndex(RankIndex):
+    # Small sublists so splits and empty sublists are exercised
+    LOAD = 4
+
+def expected_order(powers: dict) -> list:
+    return [pid for pid, _ in sorted(powers.items(), key=lambda item: (-item[1], item[0]))]
+
+def test_rank_index_matches_a_full_sort():
+    rng = random.Random(7)
+    powers = {f"p{i:03}": rng.randint(0, 50) for i in range(60)}
+    index = SmallRankIndex.from_items(list(powers.items())[:20])
+    for player_id, power in list(powers.items())[20:]:
+        index.upsert(player_id, power)
+    for _ in range(200):
+        player_id = rng.choice(list(powers))
+        if rng.random() < 0.2 and player_id in index:
+            index.remove(player_id)
+            del powers[player_id]
+        else:
+            powers[player_id] = rng.randint(0, 50)
+            index.upsert(player_id, powers[player_id])
+
+    order = expected_order(powers)
+    assert len(index) == len(powers)
+    assert [pid for pid, _ in index.slice(0, len(index))] == order
+    assert all(index.position(pid) == position for position, pid in enumerate(order))
+    assert index.slice(10, 5) == [(pid, powers[pid]) for pid in order[10:15]]
+
+def test_rank_index_edges():
+    index = RankIndex.from_items([("b", 10), ("a", 10), ("c", 30)])
+    assert index.slice(0, 3) == [("c", 30), ("a", 10), ("b", 10)]
+    assert index.slice(3, 5) == [] and index.slice(-1, 5) == [] and index.slice(0, 0) == []
+    assert index.position("missing") is None and not index.remove("missing")
+    assert index.power("a") == 10 and index.power("missing") is None
+    index.remove("c")
+    assert index.position("a") == 0
+
+async def setup():
+    manager = DatabaseManager(AsyncMongoMockClient()["leaderboard_tests"])
+    players = [await manager.create_player(PlayerCreate(name=name)) for name in ("Jinwoo", "Cha Hae-In")]
+    return manager, players
+
+def test_refresh_keeps_shadow_power_without_aggregating(monkeypatch):
+    async def scenario():
+        manager, (player, _) = await setup()
+        board = Leaderboard(manager)
+        await board.rebuild()
+        aggregations = []
+        original = manager.get_shadow_power_totals
+
+        async def counting(*args, **kwargs):
+            aggregations.append(args)
+            return await original(*args, **kwargs)
+        monkeypatch.setattr(manager, "get_shadow_power_totals", counting)
+
+        await board.refresh_player(player.id, shadow_delta=(100, 50))
+        ranking = await board.refresh_player(player.id)
+        doc = await manager.rankings.find_one({"category": HUNTER_CATEGORY, "player_id": player.id})
+        return aggregations, ranking, doc, player
+    aggregations, ranking, doc, player = asyncio.run(scenario())
+    assert aggregations == []
+    assert (doc["shadow_attack"], doc["shadow_defense"]) == (100, 50)
+    assert ranking.total_power == player.combat_power + 15
+
+def test_load_applies_only_changed_rankings():
+    async def scenario():
+        manager, (player, other) = await setup()
+        board = Leaderboard(manager)
+        await board.load()  # empty collection: rebuilds
+        # Another worker raises one player's power
+        await manager.rankings.update_one(
+            {"category": HUNTER_CATEGORY, "player_id": other.id},
+            {"$set": {"combat_power": 10 ** 6, "updated_at": datetime.utcnow()}}
+        )
+        queries = []
+        original_find = manager.rankings.find
+
+        def recording_find(query, *args, **kwargs):
+            queries.append(query)
+            return original_find(query, *args, **kwargs)
+        board.rankings.find = recording_find
+        loaded = await board.load()
+        return loaded, queries, board.top(limit=2), other
+    loaded, queries, top, other = asyncio.run(scenario())
+    assert loaded == 2
+    assert "updated_at" in queries[0]
+    assert top[0].player_id == other.id and top[0].total_power == 10 ** 6
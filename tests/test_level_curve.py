@@ -0,0 +1,91 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import level_curve
+from level_curve import CurveDefinition, LevelCurve
+
+def naive_level(curve: LevelCurve, total_exp: int) -> int:
+    level = 1
+    while level < curve.level_cap and total_exp >= curve.requirement(level):
+        total_exp -= curve.requirement(level)
+        level += 1
+    return level
+
+@pytest.fixture
+def curve():
+    return LevelCurve(CurveDefinition())
+
+def test_level_for_exp_matches_level_by_level_loop(curve):
+    for total_exp in [0, 999, 1000, 2999, 3000, 6499, 6500, 10 ** 6, 10 ** 12, 10 ** 40]:
+        assert curve.level_for_exp(total_exp) == naive_level(curve, total_exp)
+
+def test_level_for_exp_boundaries(curve):
+    assert curve.level_for_exp(curve.thresholds[0] - 1) == 1
+    assert curve.level_for_exp(curve.thresholds[0]) == 2
+    assert curve.level_for_exp(curve.thresholds[-1]) == curve.level_cap
+    assert curve.level_for_exp(10 ** 80) == curve.level_cap
+
+def test_levels_for_exp_is_vectorized_level_for_exp(curve):
+    exps = [0, 1000, 2999, 3000, 10 ** 9]
+    assert curve.levels_for_exp(exps).tolist() == [curve.level_for_exp(e) for e in exps]
+
+def test_stat_points_between(curve):
+    assert curve.stat_points_between(1, 1) == 0
+    assert curve.stat_points_between(5, 3) == 0
+    assert curve.stat_points_between(1, 2) == 3
+    assert curve.stat_points_between(10, 11) == 4
+    assert curve.stat_points_between(1, 30) == sum(curve.stat_bonus(level) for level in range(2, 31))
+    # Levels past the cap earn nothing more
+    assert curve.stat_points_between(1, 500) == curve.stat_points_between(1, curve.level_cap)
+
+def test_stat_points_are_additive(curve):
+    rng = np.random.default_rng(0)
+    for a, b, c in np.sort(rng.integers(1, 100, size=(50, 3)), axis=1).tolist():
+        assert curve.stat_points_between(a, b) + curve.stat_points_between(b, c) == curve.stat_points_between(a, c)
+
+def test_rank_for_level(curve):
+    assert [curve.rank_for_level(level) for level in (1, 9, 10, 29, 30, 49, 50, 100)] == \
+        ["E", "E", "D", "C", "B", "A", "S", "S"]
+
+@pytest.fixture
+def curve_file(tmp_path, monkeypatch):
+    path = tmp_path / "curve.json"
+    path.write_text(json.dumps({"level_cap": 60}))
+    monkeypatch.setattr(level_curve, "_curve", level_curve._curve)
+    monkeypatch.setattr(level_curve, "_curve_file", None)
+    monkeypatch.setattr(level_curve, "_curve_mtime", None)
+    monkeypatch.setattr(level_curve, "_last_check", 0.0)
+    level_curve.reload_curve(str(path))
+    return path
+
+def test_malformed_curve_file_keeps_previous_curve(curve_file, monkeypatch):
+    previous = level_curve.get_curve()
+    assert previous.level_cap == 60
+
+    curve_file.write_text("{not json")
+    stat = os.stat(curve_file)
+    os.utime(curve_file, (stat.st_atime, stat.st_mtime + 10))
+    monkeypatch.setattr(level_curve, "_last_check", 0.0)
+    assert level_curve.get_curve() is previous
+    assert level_curve._curve_mtime == os.path.getmtime(curve_file)
+
+    # Invalid values are rejected the same way
+    curve_file.write_text(json.dumps({"level_cap": "lots"}))
+    os.utime(curve_file, (stat.st_atime, stat.st_mtime + 20))
+    monkeypatch.setattr(level_curve, "_last_check", 0.0)
+    assert level_curve.get_curve() is previous
+
+def test_fixed_curve_file_is_picked_up(curve_file, monkeypatch):
+    curve_file.write_text("[]")
+    stat = os.stat(curve_file)
+    os.utime(curve_file, (stat.st_atime, stat.st_mtime + 10))
+    monkeypatch.setattr(level_curve, "_last_check", 0.0)
+    assert level_curve.get_curve().level_cap == 60
+
+    curve_file.write_text(json.dumps({"level_cap": 80}))
+    os.utime(curve_file, (stat.st_atime, stat.st_mtime + 20))
+    monkeypatch.setattr(level_curve, "_last_check", 0.0)
+    assert level_curve.get_curve().level_cap == 80
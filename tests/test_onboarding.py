@@ -0,0 +1,59 @@
+import asyncio
+import uuid
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import DuplicateKeyError
+
+import models
+from database import DatabaseManager
+from models import PlayerCreate
+
+TAKEN_ID = "taken-player-id"
+
+@pytest.fixture
+def manager():
+    manager = DatabaseManager(AsyncMongoMockClient()["onboarding_tests"])
+    asyncio.run(manager.players.create_index("id", unique=True))
+    asyncio.run(manager.players.insert_one({"id": TAKEN_ID, "name": "Hwang Dongsuk"}))
+    return manager
+
+@pytest.fixture
+def colliding_ids(monkeypatch):
+    """The second player generated gets the id that is already taken"""
+    uuid4 = uuid.uuid4
+    generated = iter([uuid4(), TAKEN_ID])
+    monkeypatch.setattr(models.uuid, "uuid4", lambda: next(generated, None) or uuid4())
+
+async def starter_owners(manager):
+    owners = {}
+    for collection_name in ("equipment", "skills", "quests"):
+        docs = await getattr(manager, collection_name).find({}, {"player_id": 1}).to_list(None)
+        owners[collection_name] = {doc["player_id"] for doc in docs}
+    return owners
+
+def test_a_duplicate_id_fails_only_its_player(manager, colliding_ids):
+    async def scenario():
+        players = [PlayerCreate(name=name) for name in ("Jinwoo", "Dongsuk", "Jinho")]
+        result = await manager.onboard_players(players)
+        return result, await starter_owners(manager), await manager.players.count_documents({})
+    result, owners, stored = asyncio.run(scenario())
+    assert (result.inserted, result.failed) == (2, 1)
+    assert [player.name for player in result.players] == ["Jinwoo", "Jinho"]
+    assert [error["name"] for error in result.errors] == ["Dongsuk"]
+    assert stored == 3
+    # Starter documents exist only for the players that were created
+    created = {player.id for player in result.players}
+    assert TAKEN_ID not in created
+    assert all(player_ids == created for player_ids in owners.values())
+
+def test_create_player_raises_when_its_id_is_taken(manager, monkeypatch):
+    monkeypatch.setattr(models.uuid, "uuid4", lambda: TAKEN_ID)
+    with pytest.raises(DuplicateKeyError):
+        asyncio.run(manager.create_player(PlayerCreate(name="Dongsuk")))
+    assert asyncio.run(starter_owners(manager)) == {"equipment": set(), "skills": set(), "quests": set()}
+
+def test_a_clean_batch_reports_every_player(manager):
+    result = asyncio.run(manager.onboard_players([PlayerCreate(name=str(n)) for n in range(5)]))
+    assert (result.inserted, result.failed, result.errors) == (5, 0, [])
+    assert len({player.id for player in result.players}) == 5
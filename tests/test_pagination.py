@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from database import DatabaseManager
+from models import ItemRarity, Shadow
+
+PLAYER_ID = "player-1"
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = DatabaseManager(AsyncMongoMockClient()["pagination_tests"])
+    shadows = [Shadow(player_id=PLAYER_ID, name=f"Shadow {i}", type="Soldier", rarity=ItemRarity.COMMON)
+               for i in range(25)]
+    shadows.append(Shadow(player_id="someone-else", name="Other", type="Soldier", rarity=ItemRarity.COMMON))
+    asyncio.run(manager.shadows.insert_many([shadow.dict() for shadow in shadows]))
+    monkeypatch.setattr(server, "database", manager)
+    return manager
+
+@pytest.fixture
+def client(manager):
+    return TestClient(server.app)
+
+def test_page_cursor_walks_every_document_once(manager):
+    names, after = [], None
+    while True:
+        items, after = asyncio.run(manager.get_player_page("shadows", PLAYER_ID, after, 10))
+        names += [item.name for item in items]
+        if after is None:
+            break
+    assert names == [f"Shadow {i}" for i in range(25)]
+
+def test_last_full_page_has_no_cursor(manager):
+    items, after = asyncio.run(manager.get_player_page("shadows", PLAYER_ID, None, 25))
+    assert len(items) == 25 and after is None
+
+def test_invalid_cursor_is_rejected(manager):
+    with pytest.raises(ValueError):
+        asyncio.run(manager.get_player_page("shadows", PLAYER_ID, "not-an-object-id", 10))
+
+def test_endpoint_returns_everything_without_paging_params(client):
+    response = client.get(f"/api/players/{PLAYER_ID}/shadows")
+    assert response.status_code == 200
+    assert len(response.json()) == 25
+    assert "x-next-cursor" not in response.headers
+
+def test_endpoint_pages_with_cursor_header(client):
+    response = client.get(f"/api/players/{PLAYER_ID}/shadows", params={"limit": 10})
+    first_page = [shadow["name"] for shadow in response.json()]
+    cursor = response.headers["x-next-cursor"]
+    assert first_page == [f"Shadow {i}" for i in range(10)]
+
+    response = client.get(f"/api/players/{PLAYER_ID}/shadows", params={"after": cursor})
+    assert [shadow["name"] for shadow in response.json()] == [f"Shadow {i}" for i in range(10, 25)]
+    assert "x-next-cursor" not in response.headers
+
+def test_cursor_header_is_exposed_to_browsers(client):
+    response = client.get(f"/api/players/{PLAYER_ID}/shadows", params={"limit": 5},
+                          headers={"Origin": "http://localhost:3000"})
+    assert "x-next-cursor" in response.headers["access-control-expose-headers"].lower()
+
+def test_bad_cursor_is_a_400(client):
+    response = client.get(f"/api/players/{PLAYER_ID}/shadows", params={"after": "nope"})
+    assert response.status_code == 400
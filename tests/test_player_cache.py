@@ -0,0 +1,23 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from database import DatabaseManager
+from models import PlayerCreate
+
+def test_spend_mp_uses_stored_mp_not_cached_player():
+    async def scenario():
+        manager = DatabaseManager(AsyncMongoMockClient()["player_cache_tests"])
+        player = await manager.create_player(PlayerCreate(name="Jinwoo"))
+        cached = await manager.get_player(player.id)
+        # Another worker spends most of the MP behind this process's cache
+        await manager.players.update_one({"id": player.id}, {"$set": {"mp": 30}})
+        spent = await manager.spend_mp(player.id, 20)
+        refused = await manager.spend_mp(player.id, 20)
+        refunded = await manager.spend_mp(player.id, -20)
+        return cached.mp, spent, refused, refunded, (await manager.get_player(player.id)).mp
+    cached_mp, spent, refused, refunded, final_mp = asyncio.run(scenario())
+    assert cached_mp > 30
+    assert spent == 10
+    assert refused is None
+    assert refunded == final_mp == 30
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import database
+from database import DatabaseManager
+from level_curve import get_curve
+from models import Equipment, HunterRank, PlayerCreate
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = DatabaseManager(AsyncMongoMockClient()["reward_tests"])
+    manager.writes = 0
+    original = manager.players.find_one_and_update
+
+    async def find_one_and_update(query, update, projection=None, return_document=None, session=None, **kwargs):
+        manager.writes += 1
+        if not isinstance(update, list):
+            return await original(query, update, projection=projection, return_document=return_document, **kwargs)
+        # mongomock runs update pipelines only through aggregate, and has no $unset stage there
+        stages = [{"$project": {stage["$unset"]: 0}} if "$unset" in stage else stage for stage in update]
+        docs = await manager.players.aggregate([{"$match": query}] + stages).to_list(None)
+        if not docs:
+            return None
+        await manager.players.replace_one({"_id": docs[0]["_id"]}, docs[0])
+        return {key: value for key, value in docs[0].items() if key != "_id"}
+    monkeypatch.setattr(manager.players, "find_one_and_update", find_one_and_update)
+    return manager
+
+def reward(manager, setup: dict, **kwargs):
+    async def scenario():
+        player = await manager.create_player(PlayerCreate(name="Jinwoo"))
+        await manager.players.update_one({"id": player.id}, {"$set": setup})
+        writes = manager.writes
+        result = await manager.apply_rewards(player.id, **kwargs)
+        doc = await manager.players.find_one({"id": player.id}, {"_id": 0})
+        return result, doc, manager.writes - writes
+    return asyncio.run(scenario())
+
+def test_a_multi_level_jump_is_one_write(manager):
+    curve = get_curve()
+    result, doc, writes = reward(manager, {}, exp=20000, stat_deltas={"strength": 3})
+    new_level = curve.level_for_exp(20000)
+    assert writes == 1 and new_level >= 4
+    assert (result.old_level, result.new_level, result.leveled_up) == (1, new_level, True)
+    assert result.stat_points_gained == curve.stat_points_between(1, new_level)
+    assert doc["level"] == new_level and doc["experience"] == 20000
+    assert doc["rank"] == curve.rank_for_level(new_level)
+    assert doc["experience_to_next"] == curve.requirement(new_level + 1)
+    assert doc["stats"]["strength"] == result.player.stats.strength == 13
+    assert doc["combat_power"] == result.player.combat_power
+    assert "_previous_level" not in doc
+
+def test_min_experience_refuses_an_over_spend(manager):
+    result, doc, writes = reward(manager, {"experience": 100}, exp=-150, min_experience=150)
+    assert result is None and writes == 1
+    assert doc["experience"] == 100 and "last_reward" not in doc
+
+def test_spending_xp_never_lowers_the_level(manager):
+    curve = get_curve()
+    level = curve.level_for_exp(20000)
+    setup = {"experience": 20000, "level": level, "rank": curve.rank_for_level(level),
+             "experience_to_next": curve.requirement(level + 1)}
+    result, doc, _ = reward(manager, setup, exp=-19000, min_experience=19000)
+    assert (result.old_level, result.new_level, result.leveled_up) == (level, level, False)
+    assert result.stat_points_gained == 0 and result.new_rank is None
+    assert doc["experience"] == 1000 and doc["level"] == level
+    assert (doc["rank"], doc["experience_to_next"]) == (setup["rank"], setup["experience_to_next"])
+
+def test_the_write_records_what_it_applied(manager):
+    curve = get_curve()
+    level = 9
+    setup = {"experience": curve.thresholds[level - 2], "level": level, "rank": curve.rank_for_level(level)}
+    result, doc, _ = reward(manager, setup, exp=curve.requirement(level + 1), stat_deltas={"agility": 1})
+    last_reward = doc["last_reward"]
+    assert (last_reward["exp"], last_reward["stats"]) == (curve.requirement(level + 1), {"agility": 1})
+    assert (last_reward["previous_level"], last_reward["previous_rank"]) == (level, setup["rank"])
+    assert result.old_level == last_reward["previous_level"] and result.new_level == level + 1
+    assert result.exp_gained == last_reward["exp"]
+    # Crossing into level 10 is a rank change
+    assert result.new_rank == HunterRank(curve.rank_for_level(level + 1)) != HunterRank(setup["rank"])
+
+def enhance(manager, monkeypatch, concurrent_level=None):
+    """Enhance the starter weapon by one level for 100 XP; concurrent_level is what another request raised it to first"""
+    published = []
+    monkeypatch.setattr(database.event_bus, "publish", lambda player_id, event, data: published.append(event))
+
+    async def scenario():
+        player = await manager.create_player(PlayerCreate(name="Jinwoo"))
+        await manager.players.update_one({"id": player.id}, {"$set": {"experience": 500}})
+        item = await manager.equipment.find_one({"player_id": player.id, "type": "weapon"}, {"_id": 0})
+        if concurrent_level is not None:
+            await manager.equipment.update_one({"id": item["id"]}, {"$set": {"enhancement_level": concurrent_level}})
+        published.clear()
+        writes = manager.writes
+        result = await manager.enhance_equipment(Equipment(**item), levels_gained=1, stat_boost=2, cost=100)
+        player_doc = await manager.players.find_one({"id": player.id})
+        item_doc = await manager.equipment.find_one({"id": item["id"]})
+        return result, player_doc, item_doc, await manager.get_player(player.id), manager.writes - writes
+    result, player_doc, item_doc, cached, writes = asyncio.run(scenario())
+    return result, player_doc, item_doc, cached, writes, published
+
+def test_enhancing_charges_once_and_publishes_after_the_item_is_raised(manager, monkeypatch):
+    result, player_doc, item_doc, cached, writes, published = enhance(manager, monkeypatch)
+    assert result.exp_gained == -100 and writes == 1
+    assert player_doc["experience"] == cached.experience == 400
+    assert item_doc["enhancement_level"] == 1
+    assert published == ["experience"]
+
+def test_a_lost_enhancement_race_refunds_silently(manager, monkeypatch):
+    result, player_doc, item_doc, cached, writes, published = enhance(manager, monkeypatch, concurrent_level=3)
+    assert result is None
+    # The refund is a plain $inc, not a second reward pipeline
+    assert writes == 1
+    assert player_doc["experience"] == cached.experience == 500
+    assert player_doc["level"] == 1
+    assert item_doc["enhancement_level"] == 3
+    assert published == []
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import BulkWriteError
+
+from database import DatabaseManager
+
+def manager():
+    return DatabaseManager(AsyncMongoMockClient()["seeding_tests"])
+
+async def catalog(manager):
+    return {doc["name"]: doc for doc in await manager.dungeons.find({}, {"_id": 0}).to_list(None)}
+
+def test_seeding_twice_is_idempotent_and_keeps_ids():
+    async def scenario():
+        db = manager()
+        first = await db.initialize_game_data()
+        seeded = await catalog(db)
+        second = await db.initialize_game_data()
+        return first, second, seeded, await catalog(db)
+    first, second, seeded, reseeded = asyncio.run(scenario())
+    assert first == {"inserted": 4, "updated": 0}
+    assert second == {"inserted": 0, "updated": 0}
+    assert reseeded == seeded
+    assert len({doc["id"] for doc in reseeded.values()}) == 4
+
+def test_seeding_keeps_edited_dungeons_unless_overwriting():
+    async def scenario():
+        db = manager()
+        await db.initialize_game_data()
+        before = await catalog(db)
+        await db.dungeons.update_one({"name": "Red Gate"}, {"$set": {"recommended_level": 40}})
+        kept = await db.initialize_game_data()
+        edited = await catalog(db)
+        reset = await db.initialize_game_data(overwrite_dungeons=True)
+        return before, kept, edited, reset, await catalog(db)
+    before, kept, edited, reset, after = asyncio.run(scenario())
+    assert kept["updated"] == 0 and edited["Red Gate"]["recommended_level"] == 40
+    assert reset == {"inserted": 0, "updated": 1}
+    assert after["Red Gate"]["recommended_level"] == 35
+    assert after["Red Gate"]["id"] == before["Red Gate"]["id"]
+    assert after["Red Gate"]["created_at"] == before["Red Gate"]["created_at"]
+
+def racing_bulk_write(*codes):
+    async def bulk_write(requests, ordered=True):
+        raise BulkWriteError({
+            "writeErrors": [{"index": index, "code": code, "errmsg": "error"} for index, code in enumerate(codes)],
+            "nUpserted": 3,
+            "nModified": 0
+        })
+    return bulk_write
+
+def test_seeding_tolerates_a_concurrent_seed(monkeypatch):
+    db = manager()
+    # Another worker inserted one of the names between our upsert's match and insert
+    monkeypatch.setattr(db.dungeons, "bulk_write", racing_bulk_write(11000))
+    assert asyncio.run(db.initialize_game_data()) == {"inserted": 3, "updated": 0}
+
+def test_seeding_raises_other_write_errors(monkeypatch):
+    db = manager()
+    monkeypatch.setattr(db.dungeons, "bulk_write", racing_bulk_write(11000, 121))
+    with pytest.raises(BulkWriteError):
+        asyncio.run(db.initialize_game_data())
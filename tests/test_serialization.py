@@ -0,0 +1,117 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+import serialization
+from serialization import CompressionMiddleware, negotiate_encoding
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    # Only its presence matters for negotiation
+    monkeypatch.setattr(serialization, "brotli", object())
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(serialization, "brotli", None)
+
+@pytest.mark.parametrize("header, expected", [
+    ("br, gzip", "br"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("br;q=0.5, gzip;q=0.5", "br"),  # ties go to the smaller encoding
+    ("gzip;q=0, br;q=0", None),
+    ("*", "br"),
+    ("*;q=0.5, br;q=0", "gzip"),
+    ("*;q=0", None),
+    ("deflate", None),
+    ("gzip;q=oops, br;q=0.1", "br"),  # an unreadable q counts as 0
+    ("", None),
+])
+def test_negotiation_with_brotli(with_brotli, header, expected):
+    assert negotiate_encoding(header) == expected
+
+@pytest.mark.parametrize("header, expected", [
+    ("br, gzip;q=0.1", "gzip"),
+    ("br", None),
+    ("*", "gzip"),
+    ("GZip", "gzip"),
+])
+def test_negotiation_without_brotli(without_brotli, header, expected):
+    assert negotiate_encoding(header) == expected
+
+@pytest.mark.parametrize("header, expected", [
+    # identity is never chosen as a coding; refusing it does not make other codings acceptable
+    ("identity;q=0", None),
+    ("gzip, identity;q=0", "gzip"),
+    ("identity;q=0, *", "gzip"),
+])
+def test_negotiation_with_identity_refused(without_brotli, header, expected):
+    assert negotiate_encoding(header) == expected
+
+def respond(messages, accept_encoding: str = "gzip", minimum_size: int = 100):
+    """Run CompressionMiddleware over an app that sends messages; what reaches the client"""
+    async def app(scope, receive, send):
+        for message in messages:
+            await send(message)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []}
+    asyncio.run(CompressionMiddleware(app, minimum_size=minimum_size)(scope, receive, send))
+    return sent
+
+def start(media_type: str, body: bytes = b"", *extra):
+    headers = [(b"content-type", media_type.encode()), (b"content-length", str(len(body)).encode()), *extra]
+    return {"type": "http.response.start", "status": 200, "headers": headers}
+
+def body(content: bytes, more_body: bool = False):
+    return {"type": "http.response.body", "body": content, "more_body": more_body}
+
+def header_values(message, name: bytes):
+    return [value for key, value in message["headers"] if key.lower() == name]
+
+PAYLOAD = json.dumps([{"name": "Igris", "rank": "Knight"}] * 20).encode()
+
+def test_large_responses_are_compressed_with_a_new_content_length(without_brotli):
+    head, tail = respond([start("application/json", PAYLOAD), body(PAYLOAD)])
+    assert header_values(head, b"content-encoding") == [b"gzip"]
+    assert header_values(head, b"content-length") == [str(len(tail["body"])).encode()]
+    assert len(tail["body"]) < len(PAYLOAD)
+    assert gzip.decompress(tail["body"]) == PAYLOAD
+
+def test_size_threshold(without_brotli):
+    small = PAYLOAD[:99]
+    messages = [start("application/json", small), body(small)]
+    assert respond(messages) == messages
+    head, _ = respond([start("application/json", PAYLOAD[:100]), body(PAYLOAD[:100])])
+    assert header_values(head, b"content-encoding") == [b"gzip"]
+
+def test_existing_vary_is_merged(without_brotli):
+    head, _ = respond([start("application/json", PAYLOAD, (b"vary", b"Origin")), body(PAYLOAD)])
+    assert header_values(head, b"vary") == [b"Origin, Accept-Encoding"]
+
+@pytest.mark.parametrize("media_type", ["text/event-stream", "application/x-ndjson"])
+def test_streams_pass_through(without_brotli, media_type):
+    messages = [start(media_type), body(PAYLOAD, more_body=True), body(PAYLOAD, more_body=True), body(b"")]
+    assert respond(messages) == messages
+    # Even one complete chunk is left alone
+    messages = [start(media_type), body(PAYLOAD)]
+    assert respond(messages) == messages
+
+def test_other_streamed_bodies_pass_through(without_brotli):
+    messages = [start("application/json"), body(PAYLOAD, more_body=True), body(PAYLOAD)]
+    assert respond(messages) == messages
+
+def test_encoded_or_unrequested_responses_pass_through(without_brotli):
+    messages = [start("application/json", PAYLOAD, (b"content-encoding", b"br")), body(PAYLOAD)]
+    assert respond(messages) == messages
+    messages = [start("application/json", PAYLOAD), body(PAYLOAD)]
+    assert respond(messages, accept_encoding="") == messages
+    assert respond(messages, accept_encoding="identity;q=0") == messages
@@ -0,0 +1,49 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from database import DatabaseManager
+from models import ItemRarity, PlayerCreate, Shadow, ShadowCreate
+
+def shadow_data(i: int = 0) -> ShadowCreate:
+    return ShadowCreate(name=f"Shadow {i}", type="Knight", rarity=ItemRarity.COMMON,
+                        stats={"attack": 100, "defense": 50, "hp": 500, "mp": 50}, skills=["Shadow Form"])
+
+def legacy_shadow(player_id: str, i: int = 0) -> dict:
+    return Shadow(**shadow_data(i).dict(), player_id=player_id).model_dump(mode="json")
+
+async def setup():
+    manager = DatabaseManager(AsyncMongoMockClient()["shadow_army_tests"])
+    player = await manager.create_player(PlayerCreate(name="Jinwoo"))
+    return manager, player
+
+def test_capacity_is_enforced_for_new_armies():
+    async def scenario():
+        manager, player = await setup()
+        created = [await manager.create_shadow(player.id, shadow_data(i)) for i in range(12)]
+        return created, await manager.get_shadow_army(player.id)
+    created, army = asyncio.run(scenario())
+    assert sum(shadow is not None for shadow in created) == 10
+    assert army.current == 10 and army.capacity == 10
+
+def test_armies_from_before_the_limit_keep_growing():
+    async def scenario():
+        manager, player = await setup()
+        # Shadows extracted before the counters were maintained
+        await manager.shadows.insert_many([legacy_shadow(player.id, i) for i in range(15)])
+        created = [await manager.create_shadow(player.id, shadow_data(i)) for i in range(15, 30)]
+        return created, await manager.get_shadow_army(player.id)
+    created, army = asyncio.run(scenario())
+    assert all(shadow is not None for shadow in created)
+    assert army.current == 30 and army.capacity is None
+
+def test_releasing_uncounted_shadows_never_goes_negative():
+    async def scenario():
+        manager, player = await setup()
+        legacy = legacy_shadow(player.id)
+        await manager.shadows.insert_one(legacy)
+        released = await manager.delete_shadow(player.id, legacy["id"])
+        return released, await manager.get_shadow_army(player.id)
+    released, army = asyncio.run(scenario())
+    assert released
+    assert army.current == 0 and army.by_rarity.get("Common") == 0
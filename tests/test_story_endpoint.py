@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from database import DatabaseManager
+from models import PlayerCreate
+from story_content import get_story_chapters
+
+# The random flourishes differ between calls
+RANDOM_FIELDS = ("emotional_impact", "fan_rating")
+
+@pytest.fixture
+def player_id(monkeypatch):
+    manager = DatabaseManager(AsyncMongoMockClient()["story_endpoint_tests"])
+    monkeypatch.setattr(server, "database", manager)
+    player = asyncio.run(manager.create_player(PlayerCreate(name="Jinwoo")))
+    asyncio.run(manager.players.update_one({"id": player.id},
+                                           {"$set": {"story_progress": {"unlocked": 0b011, "completed": 0b001}}}))
+    return player.id
+
+@pytest.fixture
+def client(player_id):
+    return TestClient(server.app)
+
+def story(client, player_id, **params):
+    response = client.get(f"/api/players/{player_id}/story", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+def test_summaries_leave_out_the_content(client, player_id):
+    body = story(client, player_id)
+    pages = {chapter["chapter_number"]: len(chapter["content"]) for chapter in get_story_chapters()}
+    assert [chapter["chapter_number"] for chapter in body["chapters"]] == sorted(pages)
+    for chapter in body["chapters"]:
+        assert "content" not in chapter
+        assert chapter["content_length"] == pages[chapter["chapter_number"]]
+        assert chapter["reading_time"] == f"{chapter['content_length'] * 2} minutes"
+    assert [(chapter["unlocked"], chapter["completed"]) for chapter in body["chapters"][:3]] == \
+        [(True, True), (True, False), (False, False)]
+    assert body["progress"] == {"completed": 1, "total": len(pages), "percentage": int(100 / len(pages))}
+
+def test_include_content_returns_the_chapters_with_the_same_metadata(client, player_id):
+    summaries = story(client, player_id)
+    full = story(client, player_id, include_content="true")
+    assert full["progress"] == summaries["progress"]
+    for chapter, summary in zip(full["chapters"], summaries["chapters"], strict=True):
+        assert len(chapter["content"]) == summary["content_length"]
+        assert "content_length" not in chapter
+        shared = set(summary) - {"content_length", *RANDOM_FIELDS}
+        assert {field: chapter[field] for field in shared} == {field: summary[field] for field in shared}
+
+def test_unknown_players_are_not_found(client):
+    assert client.get("/api/players/missing/story").status_code == 404
+    assert client.get("/api/players/missing/story", params={"include_content": "true"}).status_code == 404
@@ -0,0 +1,71 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from database import DatabaseManager
+from models import PlayerCreate, StoryChapter
+from story_content import get_story_chapters
+
+FIELDS = ("chapter_number", "title", "description", "unlocked", "completed")
+
+async def legacy_player(manager, name: str, unlocked: set, completed: set) -> str:
+    """A player as the old onboarding left it: a full copy of every chapter, no story_progress"""
+    player = await manager.create_player(PlayerCreate(name=name))
+    await manager.players.update_one({"id": player.id}, {"$unset": {"story_progress": 1}})
+    for chapter_data in get_story_chapters():
+        number = chapter_data["chapter_number"]
+        chapter = StoryChapter(
+            chapter_number=number,
+            title=chapter_data["title"],
+            description=chapter_data["description"],
+            content=chapter_data["content"],
+            unlocked=number == 1 or number in unlocked,
+            completed=number in completed,
+            player_id=player.id
+        )
+        await manager.story_chapters.insert_one(chapter.dict())
+    return player.id
+
+def compacted(runs: int = 1):
+    async def scenario():
+        manager = DatabaseManager(AsyncMongoMockClient()["story_tests"])
+        reader = await legacy_player(manager, "Jinwoo", unlocked={2, 3}, completed={1, 2})
+        newcomer = await legacy_player(manager, "Jinah", unlocked=set(), completed=set())
+        before = {
+            player_id: [StoryChapter(**doc) for doc in
+                        await manager.story_chapters.find({"player_id": player_id}).sort("chapter_number").to_list(None)]
+            for player_id in (reader, newcomer)
+        }
+        migrated = [await manager.compact_story_chapters() for _ in range(runs)]
+        after = {}
+        for player_id in (reader, newcomer):
+            doc = await manager.players.find_one({"id": player_id})
+            after[player_id] = {
+                "progress": doc["story_progress"],
+                "chapters": await manager.get_player_story_chapters(player_id),
+                "summaries": await manager.get_player_story_summaries(player_id)
+            }
+        return migrated, before, after, (reader, newcomer), await manager.story_chapters.count_documents({})
+    return asyncio.run(scenario())
+
+def test_copies_become_bitmask_progress():
+    migrated, _, after, (reader, newcomer), copies_left = compacted()
+    assert migrated == [2] and copies_left == 0
+    assert after[reader]["progress"] == {"unlocked": 0b111, "completed": 0b011}
+    assert after[newcomer]["progress"] == {"unlocked": 0b001, "completed": 0}
+
+def test_compacting_twice_changes_nothing():
+    migrated, _, after, (reader, _), _ = compacted(runs=2)
+    assert migrated == [2, 0]
+    assert after[reader]["progress"] == {"unlocked": 0b111, "completed": 0b011}
+
+def test_chapters_render_as_before_from_the_shared_templates():
+    _, before, after, players, _ = compacted()
+    for player_id in players:
+        chapters, summaries = after[player_id]["chapters"], after[player_id]["summaries"]
+        assert [chapter.dict(include=set(FIELDS) | {"content"}) for chapter in chapters] == \
+            [chapter.dict(include=set(FIELDS) | {"content"}) for chapter in before[player_id]]
+        assert [summary.dict(include=set(FIELDS)) for summary in summaries] == \
+            [chapter.dict(include=set(FIELDS)) for chapter in before[player_id]]
+        assert [summary.content_length for summary in summaries] == [len(chapter.content) for chapter in before[player_id]]
+        assert all(chapter.player_id == player_id for chapter in chapters + summaries)